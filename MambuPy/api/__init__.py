@@ -10,6 +10,7 @@ Objects using `Mambu REST API <https://api.mambu.com/?python>`_
     MambuPy.api.interfaces
     MambuPy.api.vos
     MambuPy.api.mambustruct
+    MambuPy.api.session
     MambuPy.api.mambuproduct
     MambuPy.api.mambuloan
     MambuPy.api.mambutransaction
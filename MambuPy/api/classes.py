@@ -18,6 +18,14 @@ class GenericClass:  # pragma: no coverage
 class MambuMapObj:
     """An object with dictionary-like behaviour for key-value data"""
 
+    _lazy_keys = frozenset()
+    """Keys of _attrs holding values not converted yet.
+
+    Reading them, or data depending on them, through the dict-like or
+    object-like behaviour converts them first, calling `_convertLazyAttrs`
+    (see :py:meth:`MambuPy.api.mambustruct.MambuStruct._convertLazyAttrs`).
+    """
+
     def __init__(self, cf_class=GenericClass, **kwargs):
         self._attrs = {}
         self._cf_class = cf_class
@@ -44,6 +52,8 @@ class MambuMapObj:
             # if it doesn't exists as property, AttributeError raises
             return object.__getattribute__(self, name)
         except AttributeError:
+            if object.__getattribute__(self, "_lazy_keys") and name[:2] != "__":
+                self._convertLazyAttrs(name)
             # try to read the _attrs property
             _attrs = object.__getattribute__(self, "_attrs")
             if isinstance(_attrs, list) or name not in _attrs:
@@ -70,6 +80,7 @@ class MambuMapObj:
         if name[0] == "_":
             object.__setattr__(self, name, value)
         else:
+            self.__convert_lazy(name)
             try:
                 # _attrs needs to exist to make the magic happen!
                 # ... if not, AttributeError raises
@@ -97,8 +108,15 @@ class MambuMapObj:
                 # all else assign it as a property of the object
                 object.__setattr__(self, name, value)
 
+    def __convert_lazy(self, key=None):
+        """Converts key if it's lazy, or every lazy key if key is None"""
+        if object.__getattribute__(self, "_lazy_keys"):
+            self._convertLazyAttrs(key)
+
     def __getitem__(self, key):
         """Dict-like key query"""
+        if object.__getattribute__(self, "_lazy_keys"):
+            self._convertLazyAttrs(key)
         # if a cf_class, just return its value
         if self._attrs[key].__class__.__name__ == self._cf_class.__name__:
             return self._attrs[key]["value"]
@@ -106,6 +124,7 @@ class MambuMapObj:
 
     def __setitem__(self, key, value):
         """Dict-like set"""
+        self.__convert_lazy(key)
         # if no _attrs attribute, should be automatically created?
         if (
             key in self._attrs
@@ -119,10 +138,12 @@ class MambuMapObj:
 
     def __delitem__(self, key):
         """Dict-like del key"""
+        self.__convert_lazy(key)
         del self._attrs[key]
 
     def __str__(self):
         """Mambu object str gives a string representation of the _attrs attribute."""
+        self.__convert_lazy()
         try:
             return self.__class__.__name__ + " - " + str(self._attrs)
         except AttributeError:
@@ -177,20 +198,24 @@ class MambuMapObj:
         If dict-like (not iterable), it's the number of keys holded on the _attrs dictionary.
         If list-like (iterable), it's the number of elements of the _attrs list.
         """
+        self.__convert_lazy()
         return len(self._attrs)
 
     def __contains__(self, item):
         """Dict-like and List-like behaviour"""
+        self.__convert_lazy(item)
         return item in self._attrs
 
     def get(self, key, default=None):
         """Dict-like behaviour"""
+        self.__convert_lazy(key)
         if isinstance(self._attrs, dict):
             return self._attrs.get(key, default)
         raise NotImplementedError  # if _attrs is not a dict
 
     def keys(self):
         """Dict-like behaviour"""
+        self.__convert_lazy()
         try:
             return self._attrs.keys()
         except AttributeError:
@@ -198,6 +223,7 @@ class MambuMapObj:
 
     def items(self):
         """Dict-like behaviour"""
+        self.__convert_lazy()
         try:
             return self._attrs.items()
         except AttributeError:
@@ -205,6 +231,7 @@ class MambuMapObj:
 
     def values(self):
         """Dict-like behaviour"""
+        self.__convert_lazy()
         try:
             return self._attrs.values()
         except AttributeError:
@@ -212,6 +239,7 @@ class MambuMapObj:
 
     def has_key(self, key):
         """Dict-like behaviour"""
+        self.__convert_lazy(key)
         try:
             if isinstance(self._attrs, dict):
                 return key in self._attrs
@@ -3,6 +3,12 @@
 .. autosummary::
    :toctree: _autosummary
 
+    MambuPy.api.connector.cache
+    MambuPy.api.connector.keyset
     MambuPy.api.connector.mambuconnector
+    MambuPy.api.connector.pagination
+    MambuPy.api.connector.ratelimit
     MambuPy.api.connector.rest
+    MambuPy.api.connector.rest_async
+    MambuPy.api.connector.singleflight
 """
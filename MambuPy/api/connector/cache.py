@@ -0,0 +1,417 @@
+"""Cache of the responses of Mambu to reads.
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+
+Every connector of the process shares a single cache (see
+`get_response_cache`). Reads of the prefixes with a TTL (see the apicache*
+configs on :py:mod:`MambuPy.mambuconfig`) are answered from it while fresh,
+writes to a prefix forget every response cached for it.
+
+The cache is meant for reference data (products, branches, centres, roles,
+custom fields), which changes seldom but is read all the time.
+
+The cache lives in memory, unless an apicachefile is configured: then it is
+kept on that SQLite file, shared by every process (and every run) using
+it, so that short lived processes don't download the reference data again
+each time they start (see `warm`).
+"""
+
+from collections import OrderedDict
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from MambuPy.mambuutil import (
+    apicachefile,
+    apicachesize,
+    apicachettl,
+    apiurl,
+    setup_logging,
+)
+
+
+logger = setup_logging(__name__)
+
+
+class ResponseCache:
+    """LRU cache of responses, each one kept up to the TTL of its prefix.
+
+    When full, the least recently used response is evicted. Mutable
+    responses (eg. decoded lists) are copied in and out of the cache, so
+    callers may modify what they get.
+    """
+
+    def __init__(self, maxsize=0, ttls=None, clock=time.monotonic):
+        """Args:
+        maxsize (int): maximum number of responses kept. 0 disables the
+                       cache
+        ttls (dict): seconds to keep the responses of each prefix. Responses
+                     of prefixes not included are not cached
+        clock (function): returns the current time, in seconds
+        """
+        self.maxsize = maxsize
+        self.ttls = dict(ttls or {})
+        self._clock = clock
+        self.reset()
+
+    def reset(self):
+        """Forgets every response and the metrics."""
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, prefix):
+        """Seconds the responses of a prefix are kept.
+
+        Args:
+          prefix (str): entity's URL prefix
+
+        Returns:
+          int seconds, 0 if they're not cached
+        """
+        if self.maxsize <= 0:
+            return 0
+        return self.ttls.get(prefix, 0)
+
+    def get(self, key):
+        """A fresh response from the cache.
+
+        Args:
+          key (hashable): identifies the request
+
+        Returns:
+          the response, None if it's not cached (or expired)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _copy(entry[2])
+
+    def set(self, prefix, key, value):
+        """Keeps a response in the cache, for the TTL of its prefix.
+
+        Args:
+          prefix (str): entity's URL prefix
+          key (hashable): identifies the request
+          value (obj): the response
+        """
+        ttl = self.ttl(prefix)
+        if not ttl or value is None:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, prefix, _copy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix=None):
+        """Forgets the responses cached for a prefix.
+
+        Args:
+          prefix (str): entity's URL prefix, every one by default
+        """
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+                return
+            for key in [k for k, v in self._entries.items() if v[1] == prefix]:
+                del self._entries[key]
+
+    def stats(self):
+        """Metrics of the cache.
+
+        Returns:
+          dict with the hits, the misses and the responses kept
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def _after_fork_in_child(self):
+        """Forgets what was inherited from the parent process."""
+        self.reset()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """ResponseCache kept on a SQLite file, shared by several processes.
+
+    Responses are kept by tenant: the same file may hold the cache of
+    several tenants, each instance only sees the responses of its own.
+    Keys are stored hashed, so the credentials that are part of them are
+    not written on the file.
+
+    maxsize caps the responses kept for the tenant, evicting the least
+    recently used ones. Since the file outlives processes, expiration uses
+    the wall clock.
+    """
+
+    def __init__(self, path, tenant=apiurl, maxsize=0, ttls=None, clock=time.time):
+        """Args:
+        path (str): SQLite file, created if it doesn't exist
+        tenant (str): Mambu tenant whose responses are kept
+        maxsize (int): maximum number of responses kept for the tenant.
+                       0 disables the cache
+        ttls (dict): seconds to keep the responses of each prefix. Responses
+                     of prefixes not included are not cached
+        clock (function): returns the current (epoch) time, in seconds
+        """
+        self.path = path
+        self.tenant = tenant
+        self.maxsize = maxsize
+        self.ttls = dict(ttls or {})
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._connect()
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError as dberr:  # pragma: no cover
+            logger.debug("WAL not available for %s: %s", self.path, dberr)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   tenant TEXT NOT NULL,
+                   key TEXT NOT NULL,
+                   prefix TEXT NOT NULL,
+                   expires REAL NOT NULL,
+                   accessed REAL NOT NULL,
+                   kind TEXT NOT NULL,
+                   value BLOB,
+                   PRIMARY KEY (tenant, key))"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_prefix ON responses (tenant, prefix)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed "
+            "ON responses (tenant, accessed)"
+        )
+
+    def close(self):
+        """Closes the SQLite file."""
+        with self._lock:
+            self._conn.close()
+
+    def reset(self):
+        """Forgets every response of the tenant, and the metrics."""
+        self.invalidate()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """A fresh response from the cache.
+
+        Args:
+          key (hashable): identifies the request
+
+        Returns:
+          the response, None if it's not cached (or expired)
+        """
+        hashed = _hash(key)
+        with self._lock:
+            now = self._clock()
+            row = self._conn.execute(
+                "SELECT expires, kind, value FROM responses "
+                "WHERE tenant = ? AND key = ?",
+                (self.tenant, hashed),
+            ).fetchone()
+            if row is not None and row[0] <= now:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE tenant = ? AND key = ?",
+                    (self.tenant, hashed),
+                )
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE tenant = ? AND key = ?",
+                (now, self.tenant, hashed),
+            )
+            self.hits += 1
+        if row[1] == "bytes":
+            return bytes(row[2])
+        return json.loads(row[2])
+
+    def set(self, prefix, key, value):
+        """Keeps a response in the cache, for the TTL of its prefix.
+
+        Args:
+          prefix (str): entity's URL prefix
+          key (hashable): identifies the request
+          value (bytes or json serializable): the response
+        """
+        ttl = self.ttl(prefix)
+        if not ttl or value is None:
+            return
+        if isinstance(value, bytes):
+            kind, stored = "bytes", value
+        else:
+            kind, stored = "json", json.dumps(value)
+        with self._lock:
+            now = self._clock()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(tenant, key, prefix, expires, accessed, kind, value) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.tenant, _hash(key), prefix, now + ttl, now, kind, stored),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE tenant = ? AND expires <= ?",
+                (self.tenant, now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE tenant = ? AND key IN ("
+                "SELECT key FROM responses WHERE tenant = ? "
+                "ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.tenant, self.tenant, self.maxsize),
+            )
+
+    def invalidate(self, prefix=None):
+        """Forgets the responses cached for a prefix.
+
+        Args:
+          prefix (str): entity's URL prefix, every one by default
+        """
+        with self._lock:
+            if prefix is None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE tenant = ?", (self.tenant,)
+                )
+            else:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE tenant = ? AND prefix = ?",
+                    (self.tenant, prefix),
+                )
+
+    def stats(self):
+        """Metrics of the cache.
+
+        Returns:
+          dict with the hits, the misses (of this process) and the responses
+          kept for the tenant
+        """
+        with self._lock:
+            size = self._conn.execute(
+                "SELECT COUNT(*) FROM responses WHERE tenant = ?", (self.tenant,)
+            ).fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def _after_fork_in_child(self):
+        """Opens the SQLite file again, keeping what's cached on it."""
+        self._connect()
+
+
+def _hash(key):
+    return hashlib.sha256(
+        json.dumps(key, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _copy(value):
+    if isinstance(value, (bytes, str)):
+        return value
+    return copy.deepcopy(value)
+
+
+def _parse_ttls(ttls):
+    """TTLs by prefix, from a config like ``branches:3600,centres:60``.
+
+    Args:
+      ttls (str): comma separated prefix:seconds pairs
+
+    Returns:
+      dict of int seconds, by prefix
+    """
+    parsed = {}
+    for pair in (ttls or "").split(","):
+        if ":" not in pair:
+            continue
+        prefix, seconds = pair.split(":", 1)
+        parsed[prefix.strip()] = int(seconds)
+    return parsed
+
+
+if apicachefile:
+    _response_cache = SQLiteResponseCache(
+        apicachefile, maxsize=int(apicachesize), ttls=_parse_ttls(apicachettl)
+    )
+else:
+    _response_cache = ResponseCache(
+        maxsize=int(apicachesize), ttls=_parse_ttls(apicachettl)
+    )
+
+
+def get_response_cache():
+    """The cache shared by every connector of the process.
+
+    Returns:
+      ResponseCache
+    """
+    return _response_cache
+
+
+def warm(entities=None, **kwargs):
+    """Fills the cache with the reference data of Mambu.
+
+    Meant to be run before (or at the start of) short lived processes, when
+    the cache is kept on a file.
+
+    Args:
+      entities (list): MambuEntity classes whose get_all responses are
+                       cached. By default branches, centres, loan products,
+                       user roles, custom fields and custom field sets
+      kwargs (dict): extra parameters for each get_all. May include a user,
+                     pwd and url to connect to Mambu.
+
+    Returns:
+      dict with the number of entities retrieved, by prefix
+    """
+    if entities is None:
+        from MambuPy.api.mambubranch import MambuBranch
+        from MambuPy.api.mambucentre import MambuCentre
+        from MambuPy.api.mambucustomfield import MambuCustomField, MambuCustomFieldSet
+        from MambuPy.api.mambuproduct import MambuProduct
+        from MambuPy.api.mamburole import MambuRole
+
+        entities = [
+            MambuBranch,
+            MambuCentre,
+            MambuProduct,
+            MambuRole,
+            MambuCustomField,
+            MambuCustomFieldSet,
+        ]
+
+    warmed = {}
+    for entity in entities:
+        if not _response_cache.ttl(entity._prefix):
+            logger.warning("%s responses are not cached", entity._prefix)
+        warmed[entity._prefix] = len(entity.get_all(**kwargs))
+    return warmed
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_response_cache._after_fork_in_child)
@@ -0,0 +1,149 @@
+"""Keyset pagination of searches on Mambu.
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+
+Instead of moving an offset deeper and deeper into the results (slower
+with each window, and skipping or repeating elements when they change
+between windows), each window is searched with an extra filter on the
+sorting field: only the elements after the last one already seen.
+
+Mambu sorts searches by a single field. When that field is unique
+(encodedKey, id) it is the key itself. Otherwise the key is the field plus
+the encodedKey: the next window filters after the previous distinct value
+of the field, so the elements tied with the last one come again, and the
+ones already seen are dropped by their encodedKey.
+"""
+
+import copy
+import json
+
+from MambuPy.mambuutil import OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE, MambuPyError
+
+
+UNIQUE_FIELDS = ["encodedKey", "id"]
+"""fields whose value is unique for each element"""
+
+
+class KeysetCursor:
+    """Position of a keyset paginated search, window after window.
+
+    Usage::
+
+        cursor = KeysetCursor(data, limit)
+        window = cursor.next_window()
+        while window is not None:
+            elements = cursor.feed(request(*window))
+            window = cursor.next_window()
+    """
+
+    def __init__(self, data, limit=None, window_size=None):
+        """Args:
+        data (dict): body of the search (filterCriteria, sortingCriteria).
+                     Sorted by encodedKey ASC if no sortingCriteria
+        limit (int): maximum number of elements to retrieve, all if None
+        window_size (int): maximum elements of each window (apipagination
+                           by default)
+        """
+        self.data = copy.copy(data or {})
+        sorting = self.data.setdefault(
+            "sortingCriteria", {"field": "encodedKey", "order": "ASC"}
+        )
+        self.field = sorting["field"]
+        self.order = sorting["order"]
+        self.remaining = limit or None
+        self.window_size = window_size or OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE
+        self.done = False
+        self._after = None
+        self._seen = set()
+        self._requested = 0
+
+    @property
+    def operator(self):
+        """Filter operator to search after a value, for the sorting field."""
+        if self.field.lower().endswith("date"):
+            return "AFTER" if self.order == "ASC" else "BEFORE"
+        return "MORE_THAN" if self.order == "ASC" else "LESS_THAN"
+
+    def next_window(self):
+        """Body and limit for the request of the next window.
+
+        Returns:
+          tuple with the body (dict) and the limit (int) of the search for the
+          next window, None when there are no more windows
+        """
+        if self.done:
+            return None
+        self._requested = self.window_size
+        if self.remaining is not None:
+            self._requested = min(self._requested, self.remaining + len(self._seen))
+
+        data = copy.copy(self.data)
+        if self._after is not None:
+            data["filterCriteria"] = list(data.get("filterCriteria") or []) + [
+                {"field": self.field, "operator": self.operator, "value": self._after}
+            ]
+        return data, self._requested
+
+    def feed(self, elements):
+        """Takes the response for the last window requested.
+
+        Args:
+          elements (list): decoded elements of the response
+
+        Returns:
+          list of the elements not seen on previous windows
+
+        Raises:
+          `MambuPyError`: when the elements lack the sorting field (or the
+                          encodedKey), or when a whole window has the same
+                          value on the sorting field, so that the search
+                          can't move after it
+        """
+        new = [elem for elem in elements if elem.get("encodedKey") not in self._seen]
+        if self.remaining is not None:
+            new = new[: self.remaining]
+            self.remaining -= len(new)
+        if len(elements) < self._requested or self.remaining == 0:
+            self.done = True
+            return new
+
+        try:
+            values = [elem[self.field] for elem in elements]
+        except KeyError:
+            raise MambuPyError(
+                "keyset pagination needs {} on every element".format(self.field)
+            )
+        if self.field in UNIQUE_FIELDS:
+            self._after = values[-1]
+            return new
+
+        tied = [elem for elem, value in zip(elements, values) if value == values[-1]]
+        if len(tied) == len(elements):
+            raise MambuPyError(
+                "more than {} elements with {} {}, keyset pagination can't "
+                "move after them".format(len(elements), self.field, values[-1])
+            )
+        try:
+            self._seen = {elem["encodedKey"] for elem in tied}
+        except KeyError:
+            raise MambuPyError("keyset pagination needs encodedKey on every element")
+        self._after = values[-len(tied) - 1]
+        return new
+
+    def feed_content(self, content):
+        """Takes the response content for the last window requested.
+
+        Args:
+          content (bytes): response content (json [])
+
+        Returns:
+          tuple with the response content without the elements seen on
+          previous windows (json []), and that same content decoded (list)
+        """
+        elements = json.loads(content.decode())
+        page = self.feed(elements)
+        if len(page) != len(elements):
+            content = json.dumps(page).encode()
+        return content, page
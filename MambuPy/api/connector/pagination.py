@@ -0,0 +1,139 @@
+"""Offset pagination of lists on Mambu.
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+
+Mambu responds at most OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE elements at a
+time, so a list is requested window by window, moving the offset, until
+covering the given limit (or until Mambu responds with less elements than
+requested). The windows are planned here, the connectors (sync or async)
+only make the requests.
+"""
+
+import copy
+
+from MambuPy.mambuutil import OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE
+
+
+class OffsetCursor:
+    """Position of an offset paginated list, window after window.
+
+    Usage::
+
+        cursor = OffsetCursor(params)
+        window = cursor.next_window()
+        while window is not None:
+            cursor.feed(request(window))
+            window = cursor.next_window()
+
+    Or, knowing the total number of elements after the first window::
+
+        cursor.feed(request(cursor.next_window()))
+        if not cursor.done:
+            for window in cursor.windows(total):
+                request(window)
+    """
+
+    def __init__(self, params=None, window_size=None):
+        """Args:
+        params (dict): query parameters, limit is the total number of
+                       elements to retrieve (all if None) and offset the
+                       first one
+        window_size (int): maximum elements of each window
+                           (OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE by default)
+        """
+        self.params = copy.copy(params or {})
+        self.remaining = self.params.get("limit") or None
+        self.offset = self.params.get("offset") or 0
+        self.window_size = window_size or OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE
+        self.done = False
+        self._requested = 0
+
+    def __window(self, offset, limit):
+        params = copy.copy(self.params)
+        params["offset"] = offset
+        params["limit"] = limit
+        return params
+
+    def next_window(self):
+        """Query parameters for the request of the next window.
+
+        Returns:
+          dict with the params of the next window, None when there are no
+          more windows
+        """
+        if self.done:
+            return None
+        self._requested = self.window_size
+        if self.remaining is not None:
+            self._requested = min(self._requested, self.remaining)
+        return self.__window(self.offset, self._requested)
+
+    def feed(self, elements):
+        """Takes the response for the last window requested.
+
+        Args:
+          elements (list): decoded elements of the response
+
+        Returns:
+          the same elements
+        """
+        self.offset += self._requested
+        if self.remaining is not None:
+            self.remaining -= self._requested
+        if len(elements) < self._requested or self.remaining == 0:
+            self.done = True
+        return elements
+
+    def windows(self, total):
+        """Query parameters for every window left, all at once.
+
+        Args:
+          total (int): number of elements of the list (the items-total
+                       header of a response with paginationDetails ON)
+
+        Returns:
+          list of dicts with the params of each window, in the order of
+          their offsets
+        """
+        end = total
+        if self.remaining is not None:
+            end = min(total, self.offset + self.remaining)
+        windows = [
+            self.__window(offset, min(self.window_size, end - offset))
+            for offset in range(self.offset, end, self.window_size)
+        ]
+        self.done = True
+        return windows
+
+
+def items_total(headers):
+    """Number of elements of a list, according to Mambu.
+
+    Args:
+      headers (dict): headers of a response with paginationDetails ON
+
+    Returns:
+      int, None if Mambu does not tell
+    """
+    try:
+        return int(headers["items-total"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def cat_pages(pages):
+    """Appends several responses with json lists into a single one.
+
+    Each page is copied just once, so it takes linear time on the total
+    size of the pages.
+
+    Args:
+      pages (list of bytes): response contents (json [])
+
+    Returns:
+      response content (bytes json [])
+    """
+    items = [page.strip()[1:-1].strip() for page in pages]
+    return b"[" + b",".join([item for item in items if item]) + b"]"
@@ -0,0 +1,211 @@
+"""Client-side rate limiting of the requests to Mambu.
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+
+Every connector of the process shares a single limiter (see
+`get_rate_limiter`), so all the threads making requests to Mambu keep,
+together, under the rate Mambu allows, instead of each one finding the
+limit on its own. That includes the async connectors, which wait for it
+with `AdaptiveRateLimiter.acquire_async`.
+"""
+
+import asyncio
+from email.utils import parsedate_to_datetime
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from MambuPy.mambuutil import apiratelimit
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate adapts to the responses of Mambu (AIMD).
+
+    Each request takes a token, tokens are refilled at the current rate.
+
+    The rate is decreased multiplicatively when Mambu responds 429 (Too
+    Many Requests), at most once per cooldown seconds so that the 429s of
+    several threads at once count as one. Every request is also paused
+    until the time Mambu says in the Retry-After header of a 429, or, when
+    there's no Retry-After, for an exponential backoff (backoff seconds,
+    doubled on each 429 until a successful response).
+
+    The rate is increased additively with every successful response
+    (increase requests per second, for each second worth of requests), up to
+    max_rate. It isn't increased while the latency of the responses is
+    above latency_factor times its usual value, a sign of a loaded tenant.
+    """
+
+    def __init__(
+        self,
+        max_rate=100.0,
+        min_rate=0.5,
+        increase=1.0,
+        decrease=0.5,
+        cooldown=1.0,
+        latency_factor=2.0,
+        backoff=1.0,
+        max_backoff=60.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        """Args:
+        max_rate (float): maximum (and initial) requests per second. If 0
+                          or less, requests are only paused by Retry-After
+        min_rate (float): minimum requests per second
+        increase (float): requests per second to increase the rate
+        decrease (float): factor to multiply the rate by on a 429
+        cooldown (float): seconds between two decreases of the rate
+        latency_factor (float): latency over its usual value to stop
+                                increasing the rate
+        backoff (float): seconds to pause on the first 429 without
+                         Retry-After
+        max_backoff (float): maximum seconds to pause on a 429 without
+                             Retry-After
+        clock (function): returns the current time, in seconds
+        sleep (function): waits some seconds
+        """
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.latency_factor = latency_factor
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Goes back to the initial state: maximum rate, no pauses."""
+        self._lock = threading.Lock()
+        self.rate = self.max_rate
+        self._tokens = 1.0
+        self._refilled = self._clock()
+        self._paused_until = 0.0
+        self._decreased = float("-inf")
+        self._backoffs = 0
+        self._latency = None
+
+    @property
+    def enabled(self):
+        """Are requests limited by a rate?"""
+        return self.max_rate > 0
+
+    def acquire(self):
+        """Waits until a request may be made."""
+        wait = self.__take()
+        while wait:
+            self._sleep(wait)
+            wait = self.__take()
+
+    async def acquire_async(self):
+        """Waits until a request may be made, without blocking the event
+        loop."""
+        wait = self.__take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self.__take()
+
+    def __take(self):
+        """Takes a token for a request, if there's one.
+
+        Returns:
+          0 when the request may be made, else the seconds to wait before
+          trying again
+        """
+        with self._lock:
+            now = self._clock()
+            wait = self._paused_until - now
+            if wait > 0:
+                return wait
+            if not self.enabled:
+                return 0
+            self._tokens = min(1.0, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0
+            return (1.0 - self._tokens) / self.rate
+
+    def on_response(self, status_code, retry_after=None, latency=None):
+        """Adapts the rate to a response of Mambu.
+
+        Args:
+          status_code (int): HTTP status of the response
+          retry_after (str): Retry-After header of the response, if any
+          latency (float): seconds the request took
+        """
+        with self._lock:
+            now = self._clock()
+            if status_code == 429:
+                pause = _retry_after_seconds(retry_after)
+                if now - self._decreased >= self.cooldown:
+                    self._decreased = now
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    if not retry_after:
+                        pause = min(
+                            self.max_backoff, self.backoff * 2 ** self._backoffs
+                        )
+                        self._backoffs += 1
+                if pause:
+                    self._paused_until = max(self._paused_until, now + pause)
+                return
+
+            self._backoffs = 0
+
+            congested = False
+            if latency is not None:
+                if self._latency is None:
+                    self._latency = latency
+                congested = latency > self._latency * self.latency_factor
+                self._latency = 0.8 * self._latency + 0.2 * latency
+            if not congested and self.enabled:
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+
+def _retry_after_seconds(retry_after):
+    """Seconds to wait according to a Retry-After header.
+
+    Args:
+      retry_after (str): seconds, or an HTTP date
+
+    Returns:
+      float seconds (0 if there's nothing to wait)
+    """
+    if not retry_after:
+        return 0.0
+    try:
+        return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        pass
+    try:
+        date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return 0.0
+    if date is None:
+        return 0.0
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+_rate_limiter = AdaptiveRateLimiter(max_rate=float(apiratelimit))
+
+
+def get_rate_limiter():
+    """The rate limiter shared by every connector of the process.
+
+    Returns:
+      AdaptiveRateLimiter
+    """
+    return _rate_limiter
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_rate_limiter.reset)
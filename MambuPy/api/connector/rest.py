@@ -8,11 +8,15 @@ Currently supports REST.
 """
 
 import base64
+from concurrent.futures import ThreadPoolExecutor
 import copy
+import itertools
 import json
 import mimetypes
 import os
 import re
+import threading
+import time
 import uuid
 
 import requests
@@ -20,7 +24,12 @@ from requests_toolbelt.multipart.encoder import MultipartEncoder
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
+from .cache import get_response_cache
+from .keyset import KeysetCursor
 from .mambuconnector import MambuConnector, MambuConnectorReader, MambuConnectorWriter
+from .pagination import OffsetCursor, cat_pages, items_total
+from .ratelimit import get_rate_limiter
+from .singleflight import get_single_flight
 from MambuPy.mambuutil import (
     ALLOWED_UPLOAD_MIMETYPES,
     DETAILSLEVEL,
@@ -37,22 +46,34 @@ from MambuPy.mambuutil import (
     apiuser,
     setup_logging,
     activate_request_session_objects,
+    apikeepalive,
+    apipoolconnections,
+    apipoolmaxsize,
+    apipoolprewarm,
 )
 
 
 logger = setup_logging(__name__)
 
 
-def _configure_retry_strategy(session, retries=5):
+def _configure_retry_strategy(session, retries=5, pool_connections=10, pool_maxsize=10):
     """Configure retry strategy for a session.
 
+    429 (Too Many Requests) responses are not retried here, but by the
+    connector, through the rate limiter (see
+    :py:mod:`MambuPy.api.connector.ratelimit`).
+
     Args:
         session (requests.Session): The session to configure
         retries (int, optional): Number of retries. Defaults to 5.
+        pool_connections (int, optional): Number of hosts whose connections
+            are pooled. Defaults to 10.
+        pool_maxsize (int, optional): Maximum connections kept in the pool
+            of each host. Defaults to 10.
     """
     retry_strategy = Retry(
         total=retries,
-        status_forcelist=[429, 500, 502, 503, 504],
+        status_forcelist=[500, 502, 503, 504],
         backoff_factor=1,
         allowed_methods=[
             "HEAD",
@@ -65,11 +86,55 @@ def _configure_retry_strategy(session, retries=5):
             "PATCH",
         ],
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+    )
     session.mount("https://", adapter)
     session.mount("http://", adapter)
 
 
+def _mambu_error(status_code, content):
+    """Builds a MambuError from an error response of Mambu.
+
+    Args:
+        status_code (int): HTTP status code of the response
+        content (bytes): raw content of the response
+
+    Returns:
+        MambuError: the exception describing the error responded by Mambu
+    """
+    try:
+        content = json.loads(content.decode())
+    except ValueError:
+        # in case content doesn't conforms to json
+        content = {
+            "errors": [
+                {
+                    "errorCode": "UNKNOWN",
+                    "errorReason": content.decode(),
+                },
+            ]
+        }
+    try:
+        error = content["errors"][0]
+    except KeyError:
+        error = content
+    return MambuError(
+        "{} ({}) - {}{}".format(
+            error["errorCode"] if "errorCode" in error else error["returnCode"],
+            status_code,
+            (
+                error["errorReason"]
+                if "errorReason" in error
+                else error["returnStatus"]
+            ),
+            " (" + error["errorSource"] + ")" if "errorSource" in error else "",
+        )
+    )
+
+
 class SessionSingleton:
     """Singleton class to manage HTTP sessions for MambuPy.
 
@@ -77,6 +142,14 @@ class SessionSingleton:
     across all requests to the Mambu API. This helps improve performance by reusing
     TCP connections.
 
+    The session is shared by every thread, its pool keeps up to apipoolmaxsize
+    connections to each host (see :py:mod:`MambuPy.mambuconfig`), so that many
+    threads may make requests concurrently. Its creation is guarded by a lock.
+
+    The session is not shared across processes: a forked child process builds
+    a new one the first time it needs it, instead of sending requests over the
+    connections of its parent.
+
     Example:
         >>> session = SessionSingleton()
         >>> session.get_session()  # Returns a requests.Session object
@@ -86,6 +159,8 @@ class SessionSingleton:
 
     __instance = None
     __session = None
+    __pid = None
+    __lock = threading.Lock()
     _RETRIES = 5
 
     def __new__(cls):
@@ -95,22 +170,71 @@ class SessionSingleton:
             SessionSingleton: The singleton instance.
         """
         if cls.__instance is None:
-            cls.__instance = super(SessionSingleton, cls).__new__(cls)
+            with cls.__lock:
+                if cls.__instance is None:
+                    cls.__instance = super(SessionSingleton, cls).__new__(cls)
         return cls.__instance
 
     def get_session(self):
         """Get the requests.Session object.
 
-        If no session exists, create a new one. Otherwise, return the existing one.
+        If no session exists (or it was created by another process), create a new
+        one. Otherwise, return the existing one.
 
         Returns:
             requests.Session: The session object to use for HTTP requests.
         """
-        if self.__session is None:
-            self.__session = requests.Session()
-            _configure_retry_strategy(self.__session, self._RETRIES)
+        if self.__session is None or self.__pid != os.getpid():
+            with self.__lock:
+                if self.__session is None or self.__pid != os.getpid():
+                    session = requests.Session()
+                    _configure_retry_strategy(
+                        session,
+                        self._RETRIES,
+                        pool_connections=int(apipoolconnections),
+                        pool_maxsize=int(apipoolmaxsize),
+                    )
+                    if apikeepalive.lower() != "true":
+                        session.headers["Connection"] = "close"
+                    self.__prewarm(
+                        session, apiurl, min(int(apipoolprewarm), int(apipoolmaxsize))
+                    )
+                    SessionSingleton.__session = session
+                    SessionSingleton.__pid = os.getpid()
         return self.__session
 
+    @classmethod
+    def _after_fork_in_child(cls):
+        """Forgets the session (and lock) inherited from the parent process."""
+        cls.__lock = threading.Lock()
+        cls.__session = None
+        cls.__pid = None
+
+    @staticmethod
+    def __prewarm(session, url, connections):
+        """Opens connections to a Mambu tenant before any request needs them.
+
+        Args:
+            session (requests.Session): The session whose pool gets the connections
+            url (str): Mambu tenant
+            connections (int): Number of connections to open
+        """
+        if connections <= 0:
+            return
+
+        def head(_):
+            try:
+                session.head("https://{}/api/".format(url), timeout=10)
+            except requests.exceptions.RequestException as rerr:
+                logger.debug("prewarming connection to %s: %s", url, rerr)
+
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(head, range(connections)))
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=SessionSingleton._after_fork_in_child)
+
 
 class MambuConnectorREST(MambuConnector, MambuConnectorReader, MambuConnectorWriter):
     """A connector for Mambu REST API"""
@@ -125,9 +249,22 @@ class MambuConnectorREST(MambuConnector, MambuConnectorReader, MambuConnectorWri
         }
         self.__set_authorization_header(user, pwd)
         self.__set_url(url)
-        self._session = None
+        self._session = self._http_session()
+        self._pid = os.getpid()
+
+    def _http_session(self):
+        """Session for the requests of the connector.
+
+        Subclasses may override it to use another transport (see
+        `MambuPy.api.connector.rest_async.MambuConnectorRESTAsync`).
+
+        Returns:
+          requests.Session shared by every connector, None to make each
+          request on its own session
+        """
         if activate_request_session_objects.lower() == "true":
-            self._session = SessionSingleton().get_session()
+            return SessionSingleton().get_session()
+        return None
 
     def __set_authorization_header(self, user, pwd):
         self._headers["Authorization"] = "Basic {}".format(
@@ -137,7 +274,7 @@ class MambuConnectorREST(MambuConnector, MambuConnectorReader, MambuConnectorWri
     def __set_url(self, url):
         self._tenant = url
 
-    def __request_headers(self, method, content_type):
+    def _request_headers(self, method, content_type):
         headers = copy.copy(self._headers)
 
         if method in ["POST", "PATCH", "PUT"]:
@@ -148,12 +285,12 @@ class MambuConnectorREST(MambuConnector, MambuConnectorReader, MambuConnectorWri
 
         return headers
 
-    def __request_params(self, params):
+    def _request_params(self, params):
         if not params:
             params = {}
         return params
 
-    def __request_data(self, data):
+    def _request_data(self, data):
         if data is not None:
             try:
                 data = json.dumps(data)
@@ -177,9 +314,73 @@ class MambuConnectorREST(MambuConnector, MambuConnectorReader, MambuConnectorWri
         Raises:
           `MambuError`: in case of 400 or 500 response codes
         """
-        headers = self.__request_headers(method, content_type)
-        params = self.__request_params(params)
-        data = self.__request_data(data)
+        if method == "GET" and data is None:
+            # identical GETs in flight share a single request to Mambu
+            key = (
+                url,
+                json.dumps(self._request_params(params), sort_keys=True, default=str),
+                content_type,
+                self._headers["Authorization"],
+            )
+            content, _ = get_single_flight().do(
+                key,
+                lambda: self.__send(
+                    method, url, params=params, data=data, content_type=content_type
+                ).content,
+            )
+            return content
+        return self.__send(
+            method, url, params=params, data=data, content_type=content_type
+        ).content
+
+    def __limited_request(self, http, method, url, **kwargs):
+        """makes a request within the rate limit for Mambu.
+
+        Responses 429 (Too Many Requests) are retried, up to _RETRIES times,
+        as the rate limiter allows.
+
+        Args:
+          http (requests.Session): session to make the request with
+          method (str): HTTP method for the request
+          url (str): URL for the request
+          kwargs (dict): arguments for the request
+
+        Returns:
+          response object (from requests)
+
+        Raises:
+          `requests.exceptions.RetryError`: when Mambu still responds 429
+                                            after every retry
+        """
+        limiter = get_rate_limiter()
+        for _ in range(self._RETRIES + 1):
+            limiter.acquire()
+            init_t = time.monotonic()
+            resp = http.request(method, url, **kwargs)
+            limiter.on_response(
+                resp.status_code,
+                resp.headers.get("Retry-After") if resp.status_code == 429 else None,
+                time.monotonic() - init_t,
+            )
+            if resp.status_code != 429:
+                return resp
+            logger.warning("429 on %s request: url %s, retrying", method, url)
+        raise requests.exceptions.RetryError("too many 429 error responses")
+
+    def __send(self, method, url, params=None, data=None, content_type=None):
+        """sends a request to an url.
+
+        Same arguments than __request.
+
+        Returns:
+          response object (from requests)
+
+        Raises:
+          `MambuError`: in case of 400 or 500 response codes
+        """
+        headers = self._request_headers(method, content_type)
+        params = self._request_params(params)
+        data = self._request_data(data)
 
         resp = ""
         try:
@@ -192,12 +393,18 @@ url %s, params %s, data %s, headers %s",
                 data,
                 [(k, v) for k, v in headers.items() if k != "Authorization"],
             )
+            if self._session and self._pid != os.getpid():
+                # connector inherited from a parent process
+                self._session = SessionSingleton().get_session()
+                self._pid = os.getpid()
             if self._session:
-                resp = self._session.request(method, url, params=params, data=data, headers=headers)
+                http = self._session
             else:
                 http = requests.Session()
                 _configure_retry_strategy(http, self._RETRIES)
-                resp = http.request(method, url, params=params, data=data, headers=headers)
+            resp = self.__limited_request(
+                http, method, url, params=params, data=data, headers=headers
+            )
             resp.raise_for_status()
         except requests.exceptions.HTTPError as httperr:
             logger.warning(
@@ -210,35 +417,8 @@ url %s, params %s, data %s, headers %s",
             )
             if hasattr(resp, "content"):  # pragma: no cover
                 logger.warning("HTTPError, resp content: %s", resp.content)
-            try:
-                content = json.loads(resp.content.decode())
-            except ValueError:
-                # in case resp.content doesn't conforms to json
-                content = {
-                    "errors": [
-                        {
-                            "errorCode": "UNKNOWN",
-                            "errorReason": resp.content.decode(),
-                        },
-                    ]
-                }
-            try:
-                error = content["errors"][0]
-            except KeyError:
-                error = content
-            raise MambuError(
-                "{} ({}) - {}{}".format(
-                    error["errorCode"] if "errorCode" in error else error["returnCode"],
-                    resp.status_code,
-                    (
-                        error["errorReason"]
-                        if "errorReason" in error
-                        else error["returnStatus"]
-                    ),
-                    " (" + error["errorSource"] + ")" if "errorSource" in error else "",
-                )
-            )
-        except requests.exceptions.RetryError as rerr:  # pragma: no cover
+            raise _mambu_error(resp.status_code, resp.content)
+        except requests.exceptions.RetryError as rerr:
             logger.error(
                 "%s MambuCommError on %s request: url %s, params %s, data %s, headers %s",
                 str(rerr),
@@ -268,31 +448,39 @@ url %s, params %s, data %s, headers %s",
 
         logger.debug("response %s to %s:\n%s", resp, method, resp.content)
 
-        return resp.content
+        return resp
 
-    def __list_request_args(self, params):
-        if not params:
-            params = {}
-        if "limit" in params and params["limit"] is not None:
-            ini_limit = params["limit"]
-        else:
-            ini_limit = 0
-        if "offset" in params and params["offset"] is not None:
-            offset = params["offset"]
-        else:
-            offset = 0
-
-        return (params, ini_limit, offset)
+    def __list_request_pages(self, method, url, params=None, data=None, cursor=None):
+        """Request for a list, window by window, yielding each response.
 
-    def __list_request_cat_response(self, list_resp, resp):
-        if list_resp == b"":
-            list_resp = resp
-        elif len(json.loads(resp.decode())) > 0:
-            list_resp = list_resp[:-1] + b"," + resp[1:]
+        Requests the windows of a list one after the other, adjusting
+        limits and offsets, until covering the given limit (or until Mambu
+        responds with less elements than requested).
 
-        return list_resp
+        Args:
+          method (str): HTTP method for the request
+          url (str): URL for the request
+          params (dict): query parameters
+          data (serializable list of dicts or dict alone): request body
+          cursor (OffsetCursor): where to go on from, instead of params
 
-    def __list_request(self, method, url, params=None, data=None):
+        Yields:
+          tuple with the response content (json []) of each window, and
+          that same content decoded (list)
+        """
+        if cursor is None:
+            cursor = OffsetCursor(
+                params, window_size=OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE
+            )
+        window = cursor.next_window()
+        while window is not None:
+            resp = self.__request(method, url, params=window, data=copy.copy(data))
+            yield resp, cursor.feed(list(json.loads(resp.decode())))
+            window = cursor.next_window()
+
+    def __list_request(
+        self, method, url, params=None, data=None, workers=None, decode=False
+    ):
         """Request for a list, appending responses with limit and offset.
 
         Makes several requests adjusting limits and offsets, appending
@@ -309,38 +497,217 @@ url %s, params %s, data %s, headers %s",
           url (str): URL for the request
           params (dict): query parameters
           data (serializable list of dicts or dict alone): request body
+          workers (int): when more than 1, the windows after the first one
+                         are requested concurrently, using at most this
+                         number of threads (see __list_request_parallel)
+          decode (bool): return the decoded list instead of the response
+                         content. Each window is decoded only once anyway
+                         (to know if there are more windows to request), so
+                         this saves decoding the whole response again.
+
+        Returns:
+          response content (bytes json []), or a list if decode
         """
-        (params, ini_limit, offset) = self.__list_request_args(params)
+        if workers and workers > 1:
+            return self.__list_request_parallel(
+                method, url, params, data, workers, decode
+            )
 
-        window = True
-        list_resp = b""
-        while window:
-            if not ini_limit or ini_limit > OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE:
-                limit = OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE
-            else:
-                limit = ini_limit
+        pages = self.__list_request_pages(method, url, params=params, data=data)
+        if decode:
+            return [elem for _, page in pages for elem in page]
+        return cat_pages([resp for resp, _ in pages])
+
+    def __list_request_parallel(self, method, url, params, data, workers, decode):
+        """Request for a list, requesting its windows concurrently.
+
+        The first window is requested with paginationDetails ON, so Mambu
+        tells in the items-total header how many elements there are. Every
+        other window is then known beforehand, and they are requested on a
+        pool of (at most) workers threads. The responses are appended in
+        the order of their offsets.
 
-            params["offset"] = offset
-            params["limit"] = limit if limit != 0 else None
+        If Mambu does not respond the items-total header, the rest of the
+        windows are requested one after the other.
 
-            resp = self.__request(
-                method, url, params=copy.copy(params), data=copy.copy(data)
+        Args:
+          method (str): HTTP method for the request
+          url (str): URL for the request
+          params (dict): query parameters
+          data (serializable list of dicts or dict alone): request body
+          workers (int): maximum number of concurrent requests
+          decode (bool): return the decoded list instead of the response
+                         content
+        """
+        cursor = OffsetCursor(params, window_size=OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE)
+        first_params = cursor.next_window()
+        first_params["paginationDetails"] = "ON"
+        resp = self.__send(method, url, params=first_params, data=copy.copy(data))
+        first_page = cursor.feed(json.loads(resp.content.decode()))
+        if cursor.done:
+            return first_page if decode else resp.content
+
+        total = items_total(resp.headers)
+        if total is None:
+            logger.warning(
+                "no items-total header on %s %s, requesting windows serially",
+                method,
+                url,
+            )
+            pages = list(
+                self.__list_request_pages(method, url, data=data, cursor=cursor)
             )
+            if decode:
+                return first_page + [elem for _, page in pages for elem in page]
+            return cat_pages([resp.content] + [page for page, _ in pages])
 
-            jsonresp = list(json.loads(resp.decode()))
-            if len(jsonresp) < limit:
-                window = False
+        windows = cursor.windows(total)
 
-            list_resp = self.__list_request_cat_response(list_resp, resp)
+        def request_window(window):
+            return self.__request(method, url, params=window, data=copy.copy(data))
 
-            # next window, moving offset...
-            offset = offset + limit
-            if ini_limit:
-                ini_limit -= limit
-                if ini_limit <= 0:
-                    window = False
+        pages = []
+        if windows:
+            with ThreadPoolExecutor(
+                max_workers=min(workers, len(windows))
+            ) as executor:
+                pages.extend(executor.map(request_window, windows))
 
-        return list_resp
+        if decode:
+            return first_page + [
+                elem for page in pages for elem in json.loads(page.decode())
+            ]
+        return cat_pages([resp.content] + pages)
+
+    def __keyset_request_pages(self, url, params=None, data=None):
+        """Search, window by window with keyset pagination, yielding each one.
+
+        Args:
+          url (str): URL for the search
+          params (dict): query parameters, limit is the total number of
+                         elements to retrieve
+          data (dict): body of the search
+
+        Yields:
+          tuple with the response content (json []) of each window, and
+          that same content decoded (list), without the elements already
+          seen on previous windows
+        """
+        params = copy.copy(params or {})
+        params.pop("offset", None)
+        cursor = KeysetCursor(
+            data,
+            limit=params.get("limit"),
+            window_size=OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE,
+        )
+        window = cursor.next_window()
+        while window is not None:
+            params["limit"] = window[1]
+            resp = self.__request("POST", url, params=copy.copy(params), data=window[0])
+            yield cursor.feed_content(resp)
+            window = cursor.next_window()
+
+    def _request(self, method, url, params=None, data=None, content_type=None):
+        """Transport used by every mambu_* method for a single request.
+
+        Subclasses may override it to change how requests are made (see
+        `MambuPy.api.connector.rest_async.MambuConnectorRESTAsync`).
+        """
+        return self.__request(
+            method, url, params=params, data=data, content_type=content_type
+        )
+
+    def _list_request(
+        self, method, url, params=None, data=None, workers=None, decode=False
+    ):
+        """Transport used by every mambu_* method requesting a list.
+
+        Subclasses may override it to change how requests are made (see
+        `MambuPy.api.connector.rest_async.MambuConnectorRESTAsync`).
+        """
+        return self.__list_request(
+            method, url, params=params, data=data, workers=workers, decode=decode
+        )
+
+    def _keyset_request(self, url, params=None, data=None, decode=False):
+        """Transport used by mambu_search with keyset pagination.
+
+        Subclasses may override it to change how requests are made (see
+        `MambuPy.api.connector.rest_async.MambuConnectorRESTAsync`).
+        """
+        pages = self.__keyset_request_pages(url, params=params, data=data)
+        if decode:
+            return [elem for _, page in pages for elem in page]
+        return cat_pages([resp for resp, _ in pages])
+
+    def _credentials_key(self):
+        """Identifies the tenant and the user of the connector.
+
+        What is kept from the responses of Mambu for longer than a request
+        (see `MambuPy.api.mambucustomfield`) is kept apart by this key, so
+        tenants or users never share it.
+        """
+        return (self._tenant, self._headers["Authorization"])
+
+    def _cache_key(self, method, url, **kwargs):
+        """Identifies a read for the cache of responses.
+
+        Reads of different tenants or different users never share a key.
+        """
+        kwargs.pop("workers", None)
+        return (
+            method,
+            url,
+            self._headers["Authorization"],
+            json.dumps(kwargs, sort_keys=True, default=str),
+        )
+
+    def _cached_request(self, prefix, func, method, url, **kwargs):
+        """Makes a read through the cache of responses.
+
+        Only the reads of prefixes with a TTL on the cache are cached (see
+        `MambuPy.api.connector.cache`).
+
+        Args:
+          prefix (str): entity's URL prefix
+          func (function): transport for the read (_request, _list_request)
+          method (str): HTTP method for the request
+          url (str): URL for the request
+          kwargs (dict): arguments for func
+
+        Returns:
+          what func returns, maybe from the cache
+        """
+        cache = get_response_cache()
+        if not cache.ttl(prefix):
+            return func(method, url, **kwargs)
+        key = self._cache_key(method, url, **kwargs)
+        resp = cache.get(key)
+        if resp is None:
+            resp = func(method, url, **kwargs)
+            cache.set(prefix, key, resp)
+        return resp
+
+    def _invalidating_request(self, prefix, func, method, url, **kwargs):
+        """Makes a write, forgetting the responses cached for its prefix.
+
+        The cache is invalidated even if the write fails, since Mambu may
+        have applied it anyway.
+
+        Args:
+          prefix (str): entity's URL prefix
+          func (function): transport for the write (_request)
+          method (str): HTTP method for the request
+          url (str): URL for the request
+          kwargs (dict): arguments for func
+
+        Returns:
+          what func returns
+        """
+        try:
+            return func(method, url, **kwargs)
+        finally:
+            get_response_cache().invalidate(prefix)
 
     def __validate_query_params(self, **kwargs):
         """Validate query params
@@ -451,9 +818,9 @@ url %s, params %s, data %s, headers %s",
 
         url = "https://{}/api/{}/{}".format(self._tenant, prefix, entid)
 
-        return self.__request("GET", url, params=params)
+        return self._cached_request(prefix, self._request, "GET", url, params=params)
 
-    def mambu_get_all(
+    def _get_all_args(
         self,
         prefix,
         filters=None,
@@ -464,22 +831,12 @@ url %s, params %s, data %s, headers %s",
         sortBy=None,
         **kwargs
     ):
-        """get_all, several entities, filtering allowed
+        """Validates the arguments of get_all, builds its url and params.
 
-        Args:
-          prefix (str): entity's URL prefix
-          filters (dict): key-value filters (depends on each entity)
-          offset (int): pagination, index to start searching
-          limit (int): pagination, number of elements to retrieve
-          paginationDetails (str ON/OFF): ask for details on pagination
-          detailsLevel (str BASIC/FULL): ask for extra details or not
-          sortBy (str): ``field1:ASC,field2:DESC``, sorting criteria for
-                        results
-          kwargs (dict): extra parameters that a specific entity may receive in
-                         its get_all method
+        Same arguments than mambu_get_all.
 
         Returns:
-          response content (str json [])
+          tuple with the url and the query params for the request
         """
         params = self.__validate_query_params(
             offset=offset,
@@ -506,7 +863,105 @@ url %s, params %s, data %s, headers %s",
 
         url = "https://{}/api/{}".format(self._tenant, prefix)
 
-        return self.__list_request("GET", url, params=params)
+        return url, params
+
+    def mambu_get_all(
+        self,
+        prefix,
+        filters=None,
+        offset=None,
+        limit=None,
+        paginationDetails="OFF",
+        detailsLevel="BASIC",
+        sortBy=None,
+        workers=None,
+        decode=False,
+        **kwargs
+    ):
+        """get_all, several entities, filtering allowed
+
+        Args:
+          prefix (str): entity's URL prefix
+          filters (dict): key-value filters (depends on each entity)
+          offset (int): pagination, index to start searching
+          limit (int): pagination, number of elements to retrieve
+          paginationDetails (str ON/OFF): ask for details on pagination
+          detailsLevel (str BASIC/FULL): ask for extra details or not
+          sortBy (str): ``field1:ASC,field2:DESC``, sorting criteria for
+                        results
+          workers (int): request the pagination windows concurrently, using
+                         up to this number of threads (default: one after
+                         the other)
+          decode (bool): return the decoded list of entities instead of
+                         the response content
+          kwargs (dict): extra parameters that a specific entity may receive in
+                         its get_all method
+
+        Returns:
+          response content (str json []), or a list if decode
+        """
+        url, params = self._get_all_args(
+            prefix,
+            filters=filters,
+            offset=offset,
+            limit=limit,
+            paginationDetails=paginationDetails,
+            detailsLevel=detailsLevel,
+            sortBy=sortBy,
+            **kwargs
+        )
+
+        return self._cached_request(
+            prefix,
+            self._list_request,
+            "GET",
+            url,
+            params=params,
+            workers=workers,
+            decode=decode,
+        )
+
+    def _search_args(
+        self,
+        prefix,
+        filterCriteria=None,
+        sortingCriteria=None,
+        offset=None,
+        limit=None,
+        paginationDetails="OFF",
+        detailsLevel="BASIC",
+        pagination="offset",
+    ):
+        """Validates the arguments of search, builds its url, params and body.
+
+        Same arguments than mambu_search.
+
+        Returns:
+          tuple with the url, the query params and the body for the request
+        """
+        if pagination not in ["offset", "keyset"]:
+            raise MambuPyError("pagination must be in {}".format(["offset", "keyset"]))
+        if pagination == "keyset" and offset:
+            raise MambuPyError("offset is not allowed on keyset pagination")
+
+        params = self.__validate_query_params(
+            offset=offset,
+            limit=limit,
+            paginationDetails=paginationDetails,
+            detailsLevel=detailsLevel,
+        )
+
+        data = {}
+
+        if filterCriteria is not None:
+            data["filterCriteria"] = self.__validate_filter_criteria(filterCriteria)
+
+        if sortingCriteria is not None:
+            data["sortingCriteria"] = self.__validate_sorting_criteria(sortingCriteria)
+
+        url = "https://{}/api/{}:search".format(self._tenant, prefix)
+
+        return url, params, data
 
     def mambu_search(
         self,
@@ -517,6 +972,9 @@ url %s, params %s, data %s, headers %s",
         limit=None,
         paginationDetails="OFF",
         detailsLevel="BASIC",
+        workers=None,
+        decode=False,
+        pagination="offset",
     ):
         """search, several entities, filtering criteria allowed
 
@@ -530,28 +988,99 @@ url %s, params %s, data %s, headers %s",
           limit (int): pagination, number of elements to retrieve
           paginationDetails (str ON/OFF): ask for details on pagination
           detailsLevel (str BASIC/FULL): ask for extra details or not
+          workers (int): request the pagination windows concurrently, using
+                         up to this number of threads (default: one after
+                         the other)
+          decode (bool): return the decoded list of entities instead of
+                         the response content
+          pagination (str offset/keyset): how to request the pagination
+                         windows. With keyset, each window is searched
+                         after the last element of the previous one, on the
+                         field of the sortingCriteria (encodedKey by
+                         default), instead of with an offset (see
+                         `MambuPy.api.connector.keyset`). Windows are
+                         requested one after the other, workers is ignored
 
         Returns:
-          response content (str json [])
+          response content (str json []), or a list if decode
         """
-        params = self.__validate_query_params(
+        url, params, data = self._search_args(
+            prefix,
+            filterCriteria=filterCriteria,
+            sortingCriteria=sortingCriteria,
             offset=offset,
             limit=limit,
             paginationDetails=paginationDetails,
             detailsLevel=detailsLevel,
+            pagination=pagination,
         )
 
-        data = {}
+        if pagination == "keyset":
+            return self._keyset_request(url, params=params, data=data, decode=decode)
+        return self._list_request(
+            "POST", url, params=params, data=data, workers=workers, decode=decode
+        )
 
-        if filterCriteria is not None:
-            data["filterCriteria"] = self.__validate_filter_criteria(filterCriteria)
+    def mambu_iter_pages(self, prefix, search=False, **kwargs):
+        """Iterates over the windows of a get_all (or a search).
 
-        if sortingCriteria is not None:
-            data["sortingCriteria"] = self.__validate_sorting_criteria(sortingCriteria)
+        Instead of appending every window in a single response, each one is
+        yielded (decoded) as soon as it arrives. So only one window at a
+        time needs to be kept in memory, and it may be processed before the
+        next ones are requested.
 
-        url = "https://{}/api/{}:search".format(self._tenant, prefix)
+        The arguments are validated right away, the requests are made
+        while iterating.
+
+        Args:
+          prefix (str): entity's URL prefix
+          search (bool): iterate over mambu_search instead of mambu_get_all
+          kwargs (dict): arguments of mambu_get_all (or mambu_search)
+
+        Returns:
+          iterator of lists (the decoded windows), empty windows excluded
+        """
+        kwargs.pop("workers", None)
+        kwargs.pop("decode", None)
+        pagination = kwargs.pop("pagination", "offset")
+        if search:
+            url, params, data = self._search_args(
+                prefix, pagination=pagination, **kwargs
+            )
+            method = "POST"
+        elif pagination != "offset":
+            raise MambuPyError("keyset pagination is only allowed on searches")
+        else:
+            url, params = self._get_all_args(prefix, **kwargs)
+            method, data = "GET", None
+
+        if pagination == "keyset":
+            return (
+                page
+                for _, page in self.__keyset_request_pages(
+                    url, params=params, data=data
+                )
+                if page
+            )
+        return (
+            page
+            for _, page in self.__list_request_pages(
+                method, url, params=params, data=data
+            )
+            if page
+        )
+
+    def mambu_iter_items(self, prefix, search=False, **kwargs):
+        """Iterates over the elements of a get_all (or a search).
 
-        return self.__list_request("POST", url, params=params, data=data)
+        Same arguments than mambu_iter_pages.
+
+        Returns:
+          iterator of dicts (each element of each window)
+        """
+        return itertools.chain.from_iterable(
+            self.mambu_iter_pages(prefix, search=search, **kwargs)
+        )
 
     def mambu_update(self, entid, prefix, attrs, **kwargs):
         """updates a mambu entity
@@ -572,7 +1101,9 @@ url %s, params %s, data %s, headers %s",
             self.__set_authorization_header(kwargs["user"], kwargs["pwd"])
         url = "https://{}/api/{}/{}".format(self._tenant, prefix, entid)
 
-        return self.__request("PUT", url, data=attrs)
+        return self._invalidating_request(
+            prefix, self._request, "PUT", url, data=attrs
+        )
 
     def mambu_create(self, prefix, attrs, **kwargs):
         """creates a mambu entity
@@ -592,7 +1123,9 @@ url %s, params %s, data %s, headers %s",
             self.__set_authorization_header(kwargs["user"], kwargs["pwd"])
         url = "https://{}/api/{}".format(self._tenant, prefix)
 
-        return self.__request("POST", url, data=attrs)
+        return self._invalidating_request(
+            prefix, self._request, "POST", url, data=attrs
+        )
 
     def mambu_patch(self, entid, prefix, fields_ops=None, **kwargs):
         """patches certain parts of a mambu entity
@@ -629,7 +1162,9 @@ url %s, params %s, data %s, headers %s",
             patch_data.append(patch_item)
 
         if patch_data:
-            return self.__request("PATCH", url, data=patch_data)
+            return self._invalidating_request(
+                prefix, self._request, "PATCH", url, data=patch_data
+            )
 
     def mambu_delete(self, entid, prefix, **kwargs):
         """deletes a mambu entity
@@ -643,7 +1178,7 @@ url %s, params %s, data %s, headers %s",
             self.__set_authorization_header(kwargs["user"], kwargs["pwd"])
         url = "https://{}/api/{}/{}".format(self._tenant, prefix, entid)
 
-        return self.__request("DELETE", url)
+        return self._invalidating_request(prefix, self._request, "DELETE", url)
 
     def mambu_upload_document(self, owner_type, entid, filename, name, notes):
         """uploads an attachment to this entity
@@ -687,7 +1222,7 @@ url %s, params %s, data %s, headers %s",
 
         url = "https://{}/api/documents".format(self._tenant)
 
-        return self.__request(
+        return self._request(
             "POST", url, data=encoder, content_type=encoder.content_type
         )
 
@@ -719,7 +1254,7 @@ url %s, params %s, data %s, headers %s",
 
         url = "https://{}/api/documents/documentsMetadata".format(self._tenant)
 
-        return self.__request("GET", url, params=params)
+        return self._request("GET", url, params=params)
 
     def mambu_delete_document(self, documentId):
         """deletes an attachment by its documentId
@@ -729,7 +1264,7 @@ url %s, params %s, data %s, headers %s",
         """
         url = "https://{}/api/documents/{}".format(self._tenant, documentId)
 
-        self.__request("DELETE", url)
+        return self._request("DELETE", url)
 
     def mambu_loanaccount_getSchedule(self, loanid):
         """Retrieves the installments schedule of a loan account
@@ -739,7 +1274,7 @@ url %s, params %s, data %s, headers %s",
         """
         url = "https://{}/api/{}/{}/schedule".format(self._tenant, "loans", loanid)
 
-        return self.__request("GET", url)
+        return self._cached_request("loans", self._request, "GET", url)
 
     def mambu_loanaccount_writeoff(self, loanid, notes):
         """Writesoff a loan account
@@ -750,7 +1285,9 @@ url %s, params %s, data %s, headers %s",
         """
         url = "https://{}/api/{}/{}:writeOff".format(self._tenant, "loans", loanid)
         data = {"notes": notes}
-        return self.__request("POST", url, data=data)
+        return self._invalidating_request(
+            "loans", self._request, "POST", url, data=data
+        )
 
     def mambu_change_state(self, entid, prefix, action, notes):
         """change state of mambu entity
@@ -763,7 +1300,7 @@ url %s, params %s, data %s, headers %s",
         """
         url = "https://{}/api/{}/{}:changeState".format(self._tenant, prefix, entid)
         data = {"action": action, "notes": notes}
-        return self.__request("POST", url, data=data)
+        return self._invalidating_request(prefix, self._request, "POST", url, data=data)
 
     def mambu_get_customfield(self, customfieldid):
         """Retrieves a Custom Field.
@@ -772,7 +1309,7 @@ url %s, params %s, data %s, headers %s",
           customfieldid (str): the id or encoded key of the custom field
         """
         url = "https://{}/api/customfields/{}".format(self._tenant, customfieldid)
-        return self.__request("GET", url)
+        return self._cached_request("customfields", self._request, "GET", url)
 
     def mambu_get_comments(
         self, owner_id, owner_type, offset=None, limit=None, paginationDetails="OFF"
@@ -809,7 +1346,7 @@ url %s, params %s, data %s, headers %s",
 
         url = "https://{}/api/comments".format(self._tenant)
 
-        return self.__request("GET", url, params=params)
+        return self._request("GET", url, params=params)
 
     def mambu_comment(self, owner_id, owner_type, text):
         """Comments an entity with owner_id.
@@ -838,7 +1375,7 @@ url %s, params %s, data %s, headers %s",
 
         url = "https://{}/api/comments".format(self._tenant)
 
-        return self.__request("POST", url, data=data)
+        return self._request("POST", url, data=data)
 
     def mambu_make_disbursement(
         self, loan_id, notes, firstRepaymentDate, valueDate, allowed_fields, **kwargs
@@ -866,7 +1403,9 @@ url %s, params %s, data %s, headers %s",
             self._tenant, loan_id
         )
 
-        return self.__request("POST", url, data=data)
+        return self._invalidating_request(
+            "loans", self._request, "POST", url, data=data
+        )
 
     def mambu_make_repayment(
         self, loan_id, amount, notes, valueDate,
@@ -906,7 +1445,9 @@ url %s, params %s, data %s, headers %s",
             self._tenant, loan_id
         )
 
-        return self.__request("POST", url, data=data)
+        return self._invalidating_request(
+            "loans", self._request, "POST", url, data=data
+        )
 
     def mambu_make_fee(
         self, loan_id, amount, installmentNumber, notes, valueDate, allowed_fields, **kwargs
@@ -934,7 +1475,9 @@ url %s, params %s, data %s, headers %s",
 
         url = "https://{}/api/loans/{}/fee-transactions".format(self._tenant, loan_id)
 
-        return self.__request("POST", url, data=data)
+        return self._invalidating_request(
+            "loans", self._request, "POST", url, data=data
+        )
 
     def mambu_loantransaction_adjust(self, transactionid, notes):
         """Adjust a loan transaction
@@ -949,4 +1492,6 @@ url %s, params %s, data %s, headers %s",
 
         url = "https://{}/api/loans/transactions/{}:adjust".format(self._tenant, transactionid)
 
-        return self.__request("POST", url, data=data)
+        return self._invalidating_request(
+            "loans", self._request, "POST", url, data=data
+        )
@@ -0,0 +1,626 @@
+"""Asyncio connector to Mambu.
+
+Same operations than `MambuPy.api.connector.rest.MambuConnectorREST`, but
+every mambu_* method is a coroutine, running over a pooled non-blocking HTTP
+client (`aiohttp <https://docs.aiohttp.org/>`_).
+
+aiohttp is an optional dependency of MambuPy (``pip install MambuPy[async]``).
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+"""
+
+import asyncio
+import copy
+import json
+import time
+import weakref
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+
+from .cache import get_response_cache
+from .keyset import KeysetCursor
+from .pagination import OffsetCursor, cat_pages, items_total
+from .ratelimit import get_rate_limiter
+from .rest import MambuConnectorREST, _mambu_error
+from MambuPy.mambuutil import (
+    OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE,
+    MambuCommError,
+    MambuPyError,
+    apipwd,
+    apiurl,
+    apiuser,
+    setup_logging,
+)
+
+
+logger = setup_logging(__name__)
+
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+"""Bytes of a document upload read at a time"""
+
+
+async def _stream(reader):
+    """Reads a file-like object, chunk by chunk, as an async iterator."""
+    chunk = reader.read(_UPLOAD_CHUNK_SIZE)
+    while chunk:
+        yield chunk
+        chunk = reader.read(_UPLOAD_CHUNK_SIZE)
+
+
+def _rewound(encoder):
+    """A multipart encoder to send the same fields again.
+
+    Same boundary (so the same Content-Type), and the files of the fields
+    read again from their beginning.
+    """
+    fields = encoder.fields
+    values = fields.values() if hasattr(fields, "values") else [v for _, v in fields]
+    for value in values:
+        if isinstance(value, tuple) and hasattr(value[1], "seek"):
+            value[1].seek(0)
+    return MultipartEncoder(fields=fields, boundary=encoder.boundary_value)
+
+
+class AsyncSessionSingleton:
+    """Manages the aiohttp.ClientSession objects used by MambuPy.
+
+    An aiohttp session is bound to the event loop where it was created, so
+    one session is kept for each running loop, and it is shared by every
+    async connector running on it. This way the TCP (and TLS) connections
+    are reused among all the requests made from the same loop.
+    """
+
+    _LIMIT = 100
+    """Maximum number of simultaneous connections of each session"""
+
+    _sessions = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_session(cls):
+        """Get the aiohttp.ClientSession for the running event loop.
+
+        Returns:
+            aiohttp.ClientSession: The session object to use for HTTP requests.
+        """
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=cls._LIMIT)
+            )
+            cls._sessions[loop] = session
+        return session
+
+    @classmethod
+    async def close(cls):
+        """Closes the session of the running event loop, if any."""
+        session = cls._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+class MambuConnectorRESTAsync(MambuConnectorREST):
+    """An asyncio connector for Mambu REST API.
+
+    Every mambu_* method of `MambuPy.api.connector.rest.MambuConnectorREST`
+    is here a coroutine returning the same response content.
+
+    Failed requests are retried just like the synchronous connector does:
+    up to _RETRIES times, on 429 and 5XX responses. Requests keep under the
+    rate limiter shared with every other connector of the process, which
+    paces the retries of 429s; 5XX are retried with an exponential backoff
+    (honoring Retry-After when Mambu sends it).
+    """
+
+    _RETRY_STATUSES = [500, 502, 503, 504]
+    _BACKOFF_FACTOR = 1
+
+    def __init__(self, user=apiuser, pwd=apipwd, url=apiurl, **kwargs):
+        if aiohttp is None:
+            raise MambuPyError(
+                "aiohttp is required for MambuConnectorRESTAsync: "
+                "pip install MambuPy[async]"
+            )
+        super().__init__(user=user, pwd=pwd, url=url, **kwargs)
+
+    def _http_session(self):
+        """No requests.Session: the aiohttp session of the running loop is
+        taken on each request (see AsyncSessionSingleton)."""
+        return None
+
+    def sync_connector(self):
+        """A synchronous connector with the same tenant and credentials.
+
+        Useful to give entities retrieved asynchronously a connector they
+        may use with their (synchronous) refresh, update, patch, etc.
+        methods.
+
+        Returns:
+            MambuConnectorREST: a synchronous connector.
+        """
+        connector = MambuConnectorREST(url=self._tenant)
+        connector._headers = copy.copy(self._headers)
+        return connector
+
+    def __backoff(self, resp, retry):
+        try:
+            return float(resp.headers["Retry-After"])
+        except (KeyError, TypeError, ValueError):
+            return self._BACKOFF_FACTOR * (2 ** (retry - 1))
+
+    async def __request(self, method, url, params=None, data=None, content_type=None):
+        """requests an url.
+
+        Args:
+          method (str): HTTP method for the request
+          url (str): URL for the request
+          params (dict): query parameters
+          data (serializable list of dicts or dict alone): request body
+          content_type (str): an alternative Content-Type to send in headers
+
+        Returns:
+          response content (json)
+
+        Raises:
+          `MambuError`: in case of 400 or 500 response codes
+          `MambuCommError`: when cannot communicate with Mambu
+        """
+        content, _ = await self.__send(
+            method, url, params=params, data=data, content_type=content_type
+        )
+        return content
+
+    async def __send(self, method, url, params=None, data=None, content_type=None):
+        """sends a request to an url.
+
+        Same arguments than __request.
+
+        Returns:
+          tuple with the response content (json) and the response headers
+
+        Raises:
+          `MambuError`: in case of 400 or 500 response codes
+          `MambuCommError`: when cannot communicate with Mambu
+        """
+        headers = self._request_headers(method, content_type)
+        params = self._request_params(params)
+        data = self._request_data(data)
+        encoder = None
+        if hasattr(data, "read"):
+            # multipart encoders for documents uploads, streamed
+            encoder = data
+            headers["Content-Length"] = str(encoder.len)
+        params = {k: v for k, v in params.items() if v is not None}
+
+        logger.debug(
+            "about to make async %s request: url %s, params %s, data %s, headers %s",
+            method,
+            url,
+            [(k, v) for k, v in params.items() if k not in ["pwd"]],
+            data,
+            [(k, v) for k, v in headers.items() if k != "Authorization"],
+        )
+        session = self._session or AsyncSessionSingleton.get_session()
+        limiter = get_rate_limiter()
+        retry = 0
+        while True:
+            await limiter.acquire_async()
+            if encoder is not None:
+                data = _stream(encoder if not retry else _rewound(encoder))
+            init_t = time.monotonic()
+            try:
+                async with session.request(
+                    method, url, params=params, data=data, headers=headers
+                ) as resp:
+                    content = await resp.read()
+                    status = resp.status
+                    headers_resp = resp.headers
+                    backoff = self.__backoff(resp, retry + 1)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                logger.exception(
+                    "%s Exception on async %s request: url %s, params %s",
+                    str(ex),
+                    method,
+                    url,
+                    params,
+                )
+                raise MambuCommError("Unknown comm error with Mambu: {}".format(ex))
+            limiter.on_response(
+                status,
+                headers_resp.get("Retry-After") if status == 429 else None,
+                time.monotonic() - init_t,
+            )
+
+            if status == 429 or status in self._RETRY_STATUSES:
+                retry += 1
+                if retry > self._RETRIES:
+                    logger.error(
+                        "MambuCommError on async %s request: url %s, params %s",
+                        method,
+                        url,
+                        params,
+                    )
+                    raise MambuCommError(
+                        "COMM Error: I cannot communicate with Mambu: "
+                        "too many {} error responses".format(status)
+                    )
+                if status != 429:
+                    await asyncio.sleep(backoff)
+                continue
+            break
+
+        if status >= 400:
+            logger.warning(
+                "%s on async %s request: params %s, data %s",
+                status,
+                method,
+                params,
+                data,
+            )
+            raise _mambu_error(status, content)
+
+        logger.debug("response %s to async %s:\n%s", status, method, content)
+
+        return content, headers_resp
+
+    async def __list_request(
+        self, method, url, params=None, data=None, workers=None, decode=False
+    ):
+        """Request for a list, appending responses with limit and offset.
+
+        Asynchronous version of the paginated requests made by
+        `MambuPy.api.connector.rest.MambuConnectorREST`.
+
+        Args:
+          method (str): HTTP method for the request
+          url (str): URL for the request
+          params (dict): query parameters
+          data (serializable list of dicts or dict alone): request body
+          workers (int): when more than 1, the windows after the first one
+                         are requested concurrently, at most this number at
+                         the same time
+          decode (bool): return the decoded list instead of the response
+                         content
+        """
+        if workers and workers > 1:
+            return await self.__list_request_parallel(
+                method, url, params, data, workers, decode
+            )
+
+        pages = [
+            page
+            async for page in self.__list_request_pages(
+                method, url, params=params, data=data
+            )
+        ]
+        if decode:
+            return [elem for _, page in pages for elem in page]
+        return cat_pages([resp for resp, _ in pages])
+
+    async def __list_request_pages(
+        self, method, url, params=None, data=None, cursor=None
+    ):
+        """Request for a list, window by window, yielding each response.
+
+        Asynchronous version of the windows iteration made by
+        `MambuPy.api.connector.rest.MambuConnectorREST`.
+
+        Yields:
+          tuple with the response content (json []) of each window, and
+          that same content decoded (list)
+        """
+        if cursor is None:
+            cursor = OffsetCursor(
+                params, window_size=OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE
+            )
+        window = cursor.next_window()
+        while window is not None:
+            resp = await self.__request(
+                method, url, params=window, data=copy.copy(data)
+            )
+            yield resp, cursor.feed(json.loads(resp.decode()))
+            window = cursor.next_window()
+
+    async def __keyset_request(self, url, params, data, decode):
+        pages = [
+            page
+            async for page in self.__keyset_request_pages(
+                url, params=params, data=data
+            )
+        ]
+        if decode:
+            return [elem for _, page in pages for elem in page]
+        return cat_pages([resp for resp, _ in pages])
+
+    async def __keyset_request_pages(self, url, params=None, data=None):
+        """Search, window by window with keyset pagination, yielding each one.
+
+        Asynchronous version of the keyset pagination made by
+        `MambuPy.api.connector.rest.MambuConnectorREST`.
+
+        Yields:
+          tuple with the response content (json []) of each window, and
+          that same content decoded (list), without the elements already
+          seen on previous windows
+        """
+        params = dict(params) if params else {}
+        params.pop("offset", None)
+        cursor = KeysetCursor(
+            data,
+            limit=params.get("limit"),
+            window_size=OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE,
+        )
+        window = cursor.next_window()
+        while window is not None:
+            params["limit"] = window[1]
+            resp = await self.__request(
+                "POST", url, params=copy.copy(params), data=window[0]
+            )
+            yield cursor.feed_content(resp)
+            window = cursor.next_window()
+
+    async def __list_request_parallel(self, method, url, params, data, workers, decode):
+        """Request for a list, requesting its windows concurrently.
+
+        Asynchronous version of the parallel pagination made by
+        `MambuPy.api.connector.rest.MambuConnectorREST`: the first window
+        tells (items-total header) how many elements there are, then the
+        other windows are requested at the same time (no more than workers
+        at once) and appended in the order of their offsets.
+        """
+        cursor = OffsetCursor(params, window_size=OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE)
+        first_params = dict(cursor.next_window(), paginationDetails="ON")
+        content, headers = await self.__send(
+            method, url, params=first_params, data=copy.copy(data)
+        )
+        first_page = cursor.feed(json.loads(content.decode()))
+        if cursor.done:
+            return first_page if decode else content
+
+        total = items_total(headers)
+        if total is None:
+            logger.warning(
+                "no items-total header on async %s %s, requesting windows serially",
+                method,
+                url,
+            )
+            pages = [
+                page
+                async for page in self.__list_request_pages(
+                    method, url, data=data, cursor=cursor
+                )
+            ]
+            if decode:
+                return first_page + [elem for _, page in pages for elem in page]
+            return cat_pages([content] + [resp for resp, _ in pages])
+
+        semaphore = asyncio.Semaphore(workers)
+
+        async def request_window(window):
+            async with semaphore:
+                return await self.__request(
+                    method, url, params=window, data=copy.copy(data)
+                )
+
+        pages = await asyncio.gather(
+            *[request_window(window) for window in cursor.windows(total)]
+        )
+
+        if decode:
+            return first_page + [
+                elem for page in pages for elem in json.loads(page.decode())
+            ]
+        return cat_pages([content] + list(pages))
+
+    def _request(self, method, url, params=None, data=None, content_type=None):
+        return self.__request(
+            method, url, params=params, data=data, content_type=content_type
+        )
+
+    def _list_request(
+        self, method, url, params=None, data=None, workers=None, decode=False
+    ):
+        return self.__list_request(
+            method, url, params=params, data=data, workers=workers, decode=decode
+        )
+
+    def _keyset_request(self, url, params=None, data=None, decode=False):
+        return self.__keyset_request(url, params, data, decode)
+
+    def _cached_request(self, prefix, func, method, url, **kwargs):
+        cache = get_response_cache()
+        if not cache.ttl(prefix):
+            return func(method, url, **kwargs)
+        key = self._cache_key(method, url, **kwargs)
+
+        async def cached_request():
+            resp = cache.get(key)
+            if resp is None:
+                resp = await func(method, url, **kwargs)
+                cache.set(prefix, key, resp)
+            return resp
+
+        return cached_request()
+
+    def _invalidating_request(self, prefix, func, method, url, **kwargs):
+        async def invalidating_request():
+            try:
+                return await func(method, url, **kwargs)
+            finally:
+                get_response_cache().invalidate(prefix)
+
+        return invalidating_request()
+
+    async def __await(self, resp):
+        if resp is None:
+            return None
+        return await resp
+
+    async def mambu_get(self, entid, prefix, detailsLevel="BASIC"):
+        """get, a single entity, identified by its entid.
+
+        Args:
+          entid (str): ID for the entity
+          prefix (str): entity's URL prefix
+          detailsLevel (str BASIC/FULL): ask for extra details or not
+
+        Returns:
+          response content (str json {})
+        """
+        return await super().mambu_get(entid, prefix, detailsLevel)
+
+    async def mambu_get_all(self, prefix, *args, **kwargs):
+        """get_all, several entities, filtering allowed
+
+        Same arguments than
+        `MambuPy.api.connector.rest.MambuConnectorREST.mambu_get_all`
+
+        Returns:
+          response content (str json [])
+        """
+        return await super().mambu_get_all(prefix, *args, **kwargs)
+
+    async def mambu_search(self, prefix, *args, **kwargs):
+        """search, several entities, filtering criteria allowed
+
+        Same arguments than
+        `MambuPy.api.connector.rest.MambuConnectorREST.mambu_search`
+
+        Returns:
+          response content (str json [])
+        """
+        return await super().mambu_search(prefix, *args, **kwargs)
+
+    def mambu_iter_pages(self, prefix, search=False, **kwargs):
+        """Iterates, asynchronously, over the windows of a get_all (or a search).
+
+        Same arguments than
+        `MambuPy.api.connector.rest.MambuConnectorREST.mambu_iter_pages`
+
+        Returns:
+          asynchronous iterator of lists (the decoded windows)
+        """
+        kwargs.pop("workers", None)
+        kwargs.pop("decode", None)
+        pagination = kwargs.pop("pagination", "offset")
+        if search:
+            url, params, data = self._search_args(
+                prefix, pagination=pagination, **kwargs
+            )
+            method = "POST"
+        elif pagination != "offset":
+            raise MambuPyError("keyset pagination is only allowed on searches")
+        else:
+            url, params = self._get_all_args(prefix, **kwargs)
+            method, data = "GET", None
+
+        if pagination == "keyset":
+            return self.__iter_pages(
+                self.__keyset_request_pages(url, params=params, data=data)
+            )
+        return self.__iter_pages(
+            self.__list_request_pages(method, url, params=params, data=data)
+        )
+
+    async def __iter_pages(self, pages):
+        async for _, page in pages:
+            if page:
+                yield page
+
+    def mambu_iter_items(self, prefix, search=False, **kwargs):
+        """Iterates, asynchronously, over the elements of a get_all (or a search).
+
+        Same arguments than
+        `MambuPy.api.connector.rest.MambuConnectorREST.mambu_iter_pages`
+
+        Returns:
+          asynchronous iterator of dicts (each element of each window)
+        """
+        return self.__iter_items(
+            self.mambu_iter_pages(prefix, search=search, **kwargs)
+        )
+
+    async def __iter_items(self, pages):
+        async for page in pages:
+            for item in page:
+                yield item
+
+    async def mambu_update(self, entid, prefix, attrs, **kwargs):
+        """updates a mambu entity"""
+        return await super().mambu_update(entid, prefix, attrs, **kwargs)
+
+    async def mambu_create(self, prefix, attrs, **kwargs):
+        """creates a mambu entity"""
+        return await super().mambu_create(prefix, attrs, **kwargs)
+
+    async def mambu_patch(self, entid, prefix, fields_ops=None, **kwargs):
+        """patches certain parts of a mambu entity"""
+        return await self.__await(
+            super().mambu_patch(entid, prefix, fields_ops, **kwargs)
+        )
+
+    async def mambu_delete(self, entid, prefix, **kwargs):
+        """deletes a mambu entity"""
+        return await super().mambu_delete(entid, prefix, **kwargs)
+
+    async def mambu_upload_document(self, owner_type, entid, filename, name, notes):
+        """uploads an attachment to this entity"""
+        return await super().mambu_upload_document(
+            owner_type, entid, filename, name, notes
+        )
+
+    async def mambu_get_documents_metadata(self, entid, owner_type, *args, **kwargs):
+        """Gets metadata for all the documents attached to an entity"""
+        return await super().mambu_get_documents_metadata(
+            entid, owner_type, *args, **kwargs
+        )
+
+    async def mambu_delete_document(self, documentId):
+        """deletes an attachment by its documentId"""
+        return await super().mambu_delete_document(documentId)
+
+    async def mambu_loanaccount_getSchedule(self, loanid):
+        """Retrieves the installments schedule of a loan account"""
+        return await super().mambu_loanaccount_getSchedule(loanid)
+
+    async def mambu_loanaccount_writeoff(self, loanid, notes):
+        """Writesoff a loan account"""
+        return await super().mambu_loanaccount_writeoff(loanid, notes)
+
+    async def mambu_change_state(self, entid, prefix, action, notes):
+        """change state of mambu entity"""
+        return await super().mambu_change_state(entid, prefix, action, notes)
+
+    async def mambu_get_customfield(self, customfieldid):
+        """Retrieves a Custom Field."""
+        return await super().mambu_get_customfield(customfieldid)
+
+    async def mambu_get_comments(self, owner_id, owner_type, *args, **kwargs):
+        """Retrieves the comments of entity with owner_id."""
+        return await super().mambu_get_comments(owner_id, owner_type, *args, **kwargs)
+
+    async def mambu_comment(self, owner_id, owner_type, text):
+        """Comments an entity with owner_id."""
+        return await super().mambu_comment(owner_id, owner_type, text)
+
+    async def mambu_make_disbursement(self, loan_id, *args, **kwargs):
+        """Make a disbursement transacton on a loan account."""
+        return await super().mambu_make_disbursement(loan_id, *args, **kwargs)
+
+    async def mambu_make_repayment(self, loan_id, *args, **kwargs):
+        """Make a repayment transaction on a loan account."""
+        return await super().mambu_make_repayment(loan_id, *args, **kwargs)
+
+    async def mambu_make_fee(self, loan_id, *args, **kwargs):
+        """Make a fee transaction on a loan account."""
+        return await super().mambu_make_fee(loan_id, *args, **kwargs)
+
+    async def mambu_loantransaction_adjust(self, transactionid, notes):
+        """Adjust a loan transaction"""
+        return await super().mambu_loantransaction_adjust(transactionid, notes)
@@ -0,0 +1,118 @@
+"""Coalescing of identical requests in flight to Mambu.
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+
+Every connector of the process shares a single group of flights (see
+`get_single_flight`), so that when several threads make the same GET at
+the same time, only one of them goes to Mambu and the rest wait for its
+response.
+"""
+
+import os
+import threading
+
+
+class _Flight:
+    """A call in flight, and its outcome once finished."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Group of calls where only one call per key is in flight at once.
+
+    A call made while another one with the same key is in flight doesn't
+    run: it waits for the one in flight and gets its result (or its
+    exception). Once a call finishes, the next call with its key runs
+    again, nothing is cached.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forgets the calls in flight and the metrics."""
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        """calls that ran"""
+        self.collapsed = 0
+        """calls served by another call in flight"""
+
+    def do(self, key, func, *args, **kwargs):
+        """Calls func, unless a call with the same key is in flight.
+
+        Args:
+          key (hashable): identifies identical calls
+          func (function): the call
+          args (list): positional arguments for func
+          kwargs (dict): keyword arguments for func
+
+        Returns:
+          tuple with the result of func and whether it was shared by another
+          call in flight
+
+        Raises:
+          whatever func raises, to every call sharing its flight
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                flight.waiters += 1
+                self.collapsed += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = func(*args, **kwargs)
+        except BaseException as ex:
+            flight.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, bool(flight.waiters)
+
+    def stats(self):
+        """Metrics of the calls made through this group.
+
+        Returns:
+          dict with the calls that ran, the calls collapsed into another
+          one and the calls in flight right now
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._flights),
+            }
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight():
+    """The group of flights shared by every connector of the process.
+
+    Returns:
+      SingleFlight
+    """
+    return _single_flight
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_single_flight.reset)
@@ -5,8 +5,13 @@
    :toctree: _autosummary
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import copy
+import functools
 from importlib import import_module
+import itertools
 import json
 import time
 
@@ -19,7 +24,9 @@ from .interfaces import (
     MambuOwnable,
 )
 from .connector.rest import MambuConnectorREST
-from .mambustruct import MambuStruct
+from .connector.rest_async import MambuConnectorRESTAsync
+from .mambustruct import MambuStruct, _copy_json, _entity_class
+from .session import _in_session, _session
 from .vos import MambuDocument, MambuComment, MambuValueObject
 from MambuPy.mambuutil import MambuError, MambuPyError, setup_logging
 
@@ -27,6 +34,288 @@ from MambuPy.mambuutil import MambuError, MambuPyError, setup_logging
 logger = setup_logging(__name__)
 
 
+_async_mode = contextvars.ContextVar("_async_mode", default=False)
+"""When set, entities requests are made with an asyncio connector"""
+
+_iter_mode = contextvars.ContextVar("_iter_mode", default=False)
+"""When set, several entities are built lazily, window by window"""
+
+BULK_CHUNK_SIZE = 100
+"""keys searched per request when retrieving entities in bulk"""
+
+BULK_WORKERS = 4
+"""default maximum concurrent requests when retrieving entities in bulk"""
+
+PARTITION_SOURCES = {
+    "branchId": ("mambubranch.MambuBranch", "id"),
+    "centreId": ("mambucentre.MambuCentre", "id"),
+    "creditOfficerUsername": ("mambuuser.MambuUser", "username"),
+}
+"""entity (and its field) enumerating the values of a filter key, to
+partition a get_all by that key"""
+
+
+def _new_connector(**kwargs):
+    """A connector to Mambu to make the requests of an entity.
+
+    Asyncio connector when _async_mode is set, REST connector otherwise.
+    """
+    if _async_mode.get():
+        return MambuConnectorRESTAsync(**kwargs)
+    return MambuConnectorREST(**kwargs)
+
+
+def _run_in_mode(mode, func, *args, **kwargs):
+    """Calls func with some mode (_async_mode, _iter_mode) set.
+
+    Returns:
+      whatever func returns on that mode
+    """
+    token = mode.set(True)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        mode.reset(token)
+
+
+async def _build_async(build_func, awaitable, **kwargs):
+    """Awaits a response from Mambu and builds entities with it.
+
+    Building entities with get_entities may make further (synchronous)
+    requests to Mambu, so in that case the building is made in the default
+    executor of the loop, to avoid blocking it.
+    """
+    resp = await awaitable
+    if kwargs.get("get_entities"):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(_in_session, _session.get(), build_func, resp, **kwargs),
+        )
+    return build_func(resp, **kwargs)
+
+
+async def _as_awaitable(value):
+    """Awaitable of an already known value."""
+    return value
+
+
+def _get_entity(ent_class, enc_key, detailsLevel, get_entities, debug):
+    """Retrieves a single entity from Mambu by its encodedKey.
+
+    If the entity doesn't supports detailsLevel (MambuProduct), omit it.
+    """
+    try:
+        return ent_class.get(
+            enc_key,
+            detailsLevel=detailsLevel,
+            get_entities=get_entities,
+            debug=debug,
+        )
+    except TypeError:
+        return ent_class.get(enc_key, get_entities=get_entities, debug=debug)
+
+
+def _fetch_entities(
+    ent_class, keys, detailsLevel, get_entities, debug,
+    fields=("encodedKey",), strict=True,
+):
+    """Retrieves several entities of the same class from Mambu.
+
+    Searchable entities are retrieved searching with IN on the keys, on
+    each field of fields in turn for the keys not found yet. If the search
+    is not supported, and for every non searchable entity, they are
+    retrieved one by one.
+
+    Inside a session, the entities already in its identity map are not
+    searched again.
+
+    Args:
+      ent_class (obj): class of the entities
+      keys (list): keys of the entities
+      detailsLevel (str): "BASIC" or "FULL"
+      get_entities (bool): should MambuPy automatically instantiate other
+                           MambuPy entities found inside the retrieved
+                           entities?
+      debug (bool): print debugging info
+      fields (tuple): fields of the entities holding the keys
+      strict (bool): if True, entities not found searching are retrieved
+                     one by one, and errors retrieving them are raised.
+                     If False, they are left out
+
+    Returns:
+      dict of instances of the entity, by key
+    """
+    fetched = {}
+    searched = False
+    if getattr(ent_class, "search", None):
+        session = _session.get()
+        if session is not None:
+            for key in keys:
+                ent = session.get(ent_class, detailsLevel, key, get_entities)
+                if ent is not None:
+                    fetched[key] = ent
+        try:
+            for field in fields:
+                to_search = [key for key in keys if key not in fetched]
+                if not to_search:
+                    break
+                for ent in ent_class.search(
+                    filterCriteria=[
+                        {"field": field, "operator": "IN", "values": to_search}
+                    ],
+                    limit=len(to_search),
+                    detailsLevel=detailsLevel,
+                    get_entities=get_entities,
+                    debug=debug,
+                ):
+                    fetched[ent[field]] = ent
+            searched = True
+        except MambuError as merr:
+            logger.debug(
+                "search of %s by %s failed: %s", ent_class.__name__, field, merr
+            )
+
+    for key in keys:
+        if key in fetched or (searched and not strict):
+            continue
+        try:
+            fetched[key] = _get_entity(
+                ent_class, key, detailsLevel, get_entities, debug
+            )
+        except MambuError:
+            if strict:
+                raise
+
+    return fetched
+
+
+def _fetch_chunks(tasks, workers, detailsLevel, get_entities, debug, **kwargs):
+    """Retrieves chunks of entities from Mambu, concurrently.
+
+    The requests are always made on threads of their own, so that they
+    are made outside of the modes (async, iter) of the calling context,
+    but inside its session.
+
+    Args:
+      tasks (list): 2-tuples (class of the entities, keys of a chunk), see
+                    `_chunks`
+      workers (int): maximum number of concurrent requests
+      detailsLevel (str): "BASIC" or "FULL"
+      get_entities (bool): should MambuPy automatically instantiate other
+                           MambuPy entities found inside the retrieved
+                           entities?
+      debug (bool): print debugging info
+      kwargs (dict): extra arguments for `_fetch_entities`
+
+    Returns:
+      list with the dict of entities retrieved of each task
+    """
+    if not tasks:
+        return []
+    session = _session.get()
+    with ThreadPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        return list(
+            executor.map(
+                lambda task: _in_session(
+                    session,
+                    _fetch_entities,
+                    task[0],
+                    task[1],
+                    detailsLevel,
+                    get_entities,
+                    debug,
+                    **kwargs
+                ),
+                tasks,
+            )
+        )
+
+
+def _chunks(ent_class, keys):
+    """Splits keys of entities of some class to retrieve them in bulk.
+
+    Searchable entities are searched BULK_CHUNK_SIZE keys at a time, the
+    rest are retrieved one by one.
+
+    Returns:
+      list of 2-tuples (class of the entities, keys of a chunk)
+    """
+    size = BULK_CHUNK_SIZE if getattr(ent_class, "search", None) else 1
+    return [
+        (ent_class, keys[ind : ind + size]) for ind in range(0, len(keys), size)
+    ]
+
+
+def _resolve_entities(instances, detailsLevel="BASIC", get_entities=True, debug=False):
+    """Instantiates the MambuPy entities found inside several instances.
+
+    Instead of retrieving each entity of each instance on its own (see
+    :py:meth:`MambuPy.api.mambustruct.MambuStruct._assignEntObjs`), the
+    distinct encodedKeys of every instance are collected by class of the
+    entity, and retrieved in bulk, concurrently (using up to BULK_WORKERS
+    threads). The same retrieved entity is then shared by every instance
+    referencing it.
+
+    Args:
+      instances (list): MambuStruct instances whose entities are resolved
+      detailsLevel (str): "BASIC" or "FULL"
+      get_entities (bool): should MambuPy automatically instantiate other
+                           MambuPy entities found inside the retrieved
+                           entities?
+      debug (bool): print debugging info
+    """
+    entities = [list(instance._entities) for instance in instances]
+
+    keys = {}
+    for instance, ents in zip(instances, entities):
+        for ent_path, enc_key in instance._entObjsKeys(ents):
+            keys.setdefault(ent_path, {})[enc_key] = None
+
+    paths = []
+    tasks = []
+    for ent_path, enc_keys in keys.items():
+        ent_class = _entity_class(ent_path)
+        if ent_class is None:
+            continue
+        chunks = _chunks(ent_class, list(enc_keys))
+        paths.extend([ent_path] * len(chunks))
+        tasks.extend(chunks)
+
+    prefetched = {}
+    for ent_path, fetched in zip(
+        paths,
+        _fetch_chunks(tasks, BULK_WORKERS, detailsLevel, get_entities, debug),
+    ):
+        prefetched.setdefault(ent_path, {}).update(fetched)
+
+    for instance, ents in zip(instances, entities):
+        instance._assignEntObjs(
+            ents, detailsLevel, get_entities, debug=debug, prefetched=prefetched
+        )
+
+
+def _partition_values(partition_by, **kwargs):
+    """Every value of a filter key, to partition a get_all by it.
+
+    Args:
+      partition_by (str): filter key, one of PARTITION_SOURCES
+      kwargs (dict): May include a user, pwd and url to connect to Mambu
+
+    Returns:
+      list of values of the filter key
+    """
+    try:
+        ent_path, field = PARTITION_SOURCES[partition_by]
+    except KeyError:
+        raise MambuPyError(
+            "values of {} can't be enumerated, give them as partitions".format(
+                partition_by
+            )
+        )
+    return [ent[field] for ent in _entity_class(ent_path).get_all(**kwargs)]
+
+
 class MambuEntity(MambuStruct):
     """A Mambu object that you may work with directly on Mambu web too."""
 
@@ -42,6 +331,14 @@ class MambuEntity(MambuStruct):
     _sortBy_fields = []
     """allowed fields for get_all sorting"""
 
+    _resp_content = None
+    _resp_source = None
+
+    _lazy = False
+    """Default for the lazy argument of get, get_all and search: when True,
+    fields of the retrieved entities are converted when accessed (see
+    :py:meth:`MambuPy.api.mambustruct.MambuStruct._setLazyAttrs`)"""
+
     def __init__(self, **kwargs):
         super().__init__(cf_class=MambuEntityCF, **kwargs)
         if "connector" not in kwargs:
@@ -49,11 +346,28 @@ class MambuEntity(MambuStruct):
         else:
             self._connector = kwargs["connector"]
 
+    @property
+    def _resp(self):
+        """Raw json (bytes) responded by Mambu for this entity.
+
+        Entities built from a list response keep just the decoded element
+        they came from, so it is serialized only if someone asks for it.
+        """
+        if self._resp_content is None and self._resp_source is not None:
+            self._resp_content = json.dumps(self._resp_source).encode()
+        return self._resp_content
+
+    @_resp.setter
+    def _resp(self, value):
+        self._resp_content = value
+        self._resp_source = None
+
     def __search_field_in_cfsets(self, field):
         """Search for a field in custom field sets for the entity.
 
-        Retrieves all the customfieldsets for this entity and looks if the
-        field lives there.
+        Looks if the field lives in the customfieldsets for this entity,
+        cached by tenant, user and owner type (see
+        :py:meth:`MambuPy.api.mambucustomfield.MambuCustomFieldSet.get_field_paths`).
 
         If field is found, returns the path going through the set.
 
@@ -63,15 +377,11 @@ class MambuEntity(MambuStruct):
         Returns:
           (str): the path for the field when found or None if not found.
         """
-        if not hasattr(self, "_mcfs"):
-            from .mambucustomfield import MambuCustomFieldSet
+        from .mambucustomfield import MambuCustomFieldSet
 
-            owner_type = getattr(self, "_ownerType", "")
-            self._mcfs = MambuCustomFieldSet.get_all(availableFor=owner_type)
-        for cfs in self._mcfs:
-            for cf in cfs.customFields:
-                if field == cf["id"]:
-                    return "/" + cfs.id + "/" + field
+        owner_type = getattr(self, "_ownerType", "")
+        return MambuCustomFieldSet.get_field_paths(
+            owner_type, connector=self._connector).get(field)
 
     def _extract_field_path(self, field, attrs_dict={}, original_keys=[], cf_class=None):
         """Extracts the path for a given field.
@@ -138,34 +448,78 @@ class MambuEntity(MambuStruct):
         get_entities=False,
         detailsLevel="BASIC",
         debug=False,
+        instance=None,
+        lazy=False,
     ):
         """Builds an instance of an Entity object
 
         Args:
           cls (obj): the object to build
           connector(obj): connector object to Mambu
-          resp (bytes): the raw json that originates the object
+          resp (bytes or dict): the raw json that originates the object, or
+                                the decoded json (serialized only if needed,
+                                it must be left untouched)
           attrs (dict): the dict with the values to build the object
           tzattrs (dict): the dict with TZ data for datetimes in attrs
           get_entities (bool): should MambuPy automatically instantiate other
-                               MambuPy entities found inside the built entity?
+                               MambuPy entities found inside the value
+                               objects of the built entity? (the entities of
+                               the built entity itself are resolved later,
+                               see `_resolve_entities`)
           detailsLevel (str): "BASIC" or "FULL"
           debug (bool): print debugging info
+          instance (obj): an already initialized empty instance to use,
+                          instead of initializing a new one
+          lazy (bool): leave the fields to be converted when accessed (tzattrs
+                       is ignored then). Not compatible with get_entities
         """
-        instance = cls.__call__(connector=connector)
-        instance._resp = resp
-        instance._attrs = attrs
-        instance._tzattrs = tzattrs
-        instance._convertDict2Attrs()
-        instance._extractCustomFields()
-        instance._extractVOs(get_entities=get_entities, debug=debug)
-        entities = copy.deepcopy(instance._entities)
-        if get_entities:
-            instance._assignEntObjs(entities, detailsLevel, get_entities, debug=debug)
+        if instance is None:
+            instance = cls.__call__(connector=connector)
+        if isinstance(resp, dict):
+            instance._resp_source = resp
+        else:
+            instance._resp = resp
+        if lazy:
+            instance._setLazyAttrs(attrs)
+        else:
+            instance._attrs = attrs
+            instance._tzattrs = tzattrs
+            instance._convertDict2Attrs()
+            instance._extractCustomFields()
+            instance._extractVOs(get_entities=get_entities, debug=debug)
         instance._detailsLevel = detailsLevel
 
+        session = _session.get()
+        if session is not None:
+            session.add(instance, detailsLevel, get_entities)
+
         return instance
 
+    @classmethod
+    def __instances_factory(cls, connector):
+        """Returns a function that makes new empty instances of the entity.
+
+        Initializes a single instance, and the new instances are copies of
+        its state, which is way cheaper than running the initialization of
+        every class in the hierarchy for each element of a list response.
+
+        Args:
+          connector (obj): connector object to Mambu, for every instance
+
+        Returns:
+          function with no arguments returning new empty instances
+        """
+        state = cls.__call__(connector=connector).__dict__
+
+        def new_instance():
+            instance = cls.__new__(cls)
+            instance.__dict__.update(
+                {key: _copy_json(val) for key, val in state.items()}
+            )
+            return instance
+
+        return new_instance
+
     @classmethod
     def __get_several_args(cls, args, get_entities=False, debug=False):
         """Processes `MambuPy.api.entities.get_several` arguments.
@@ -185,11 +539,15 @@ class MambuEntity(MambuStruct):
         if "debug" in args and args["debug"] is not None:
             debug = args.pop("debug")
 
+        lazy = args.pop("lazy", None)
+        if lazy is None:
+            lazy = cls._lazy
+
         params = copy.copy(args)
         if "detailsLevel" not in params:
             params["detailsLevel"] = "BASIC"
 
-        return prefix, get_entities, debug, params
+        return prefix, get_entities, debug, lazy and not get_entities, params
 
     @classmethod
     def _get_several(cls, get_func, connector, **kwargs):
@@ -207,7 +565,8 @@ class MambuEntity(MambuStruct):
 
         Args:
           get_func (function): mambu request function that returns several
-                               entities (json [])
+                               entities (json []). It is called with
+                               decode=True, asking for the decoded list.
           connector (obj): connector object to Mambu
           kwargs (dict): keyword arguments to pass on to get_func as arguments
 
@@ -227,6 +586,7 @@ class MambuEntity(MambuStruct):
                                    other MambuPy entities found inside the
                                    retrieved entities?
             - debug (bool): print debugging info
+            - lazy (bool): convert the fields of the entities when accessed
 
         Returns:
           list of instances of an entity with data from Mambu, assembled from
@@ -234,26 +594,112 @@ class MambuEntity(MambuStruct):
         """
         init_t = time.time()
 
-        (prefix, get_entities, debug, params) = cls.__get_several_args(kwargs)
+        (prefix, get_entities, debug, lazy, params) = cls.__get_several_args(kwargs)
 
         logger.debug("request several entities %s", cls.__name__)
-        list_resp = get_func(prefix, **params)
-        jsonresp = list(json.loads(list_resp.decode()))
+        if _iter_mode.get():
+            params.pop("workers", None)
+            pages = connector.mambu_iter_pages(
+                prefix, search=(get_func == connector.mambu_search), **params
+            )
+            return cls.__iter_several(
+                pages,
+                connector=connector,
+                get_entities=get_entities,
+                detailsLevel=params["detailsLevel"],
+                debug=debug,
+                lazy=lazy,
+            )
+
+        list_resp = get_func(prefix, decode=True, **params)
+        if _async_mode.get():
+            return _build_async(
+                cls.__build_several,
+                list_resp,
+                connector=connector.sync_connector(),
+                get_entities=get_entities,
+                detailsLevel=params["detailsLevel"],
+                debug=debug,
+                init_t=init_t,
+                lazy=lazy,
+            )
+
+        return cls.__build_several(
+            list_resp,
+            connector=connector,
+            get_entities=get_entities,
+            detailsLevel=params["detailsLevel"],
+            debug=debug,
+            init_t=init_t,
+            lazy=lazy,
+        )
+
+    @classmethod
+    def _build_from_json(cls, list_resp, detailsLevel="BASIC", **kwargs):
+        """builds entities from already decoded elements, with no request.
+
+        Args:
+          list_resp (list): decoded elements, as Mambu responds them
+          detailsLevel (str): "BASIC" or "FULL", the one of the elements
+          kwargs (dict): May include a user, pwd and url to connect to Mambu,
+                         or the connector for the entities
+
+        Returns:
+          list of instances of an entity with the data of the elements
+        """
+        connector = kwargs.pop("connector", None)
+        if connector is None:
+            connector = MambuConnectorREST(**kwargs)
+        return cls.__build_several(
+            list_resp,
+            connector=connector,
+            get_entities=False,
+            detailsLevel=detailsLevel,
+            debug=False,
+            init_t=time.time(),
+        )
+
+    @classmethod
+    def __build_several(
+        cls, list_resp, connector, get_entities, detailsLevel, debug, init_t,
+        lazy=False,
+    ):
+        """builds the entities of a list response from Mambu.
+
+        Args:
+          list_resp (list or bytes): decoded response from Mambu (or its
+                                     content, json [])
+          connector (obj): connector object to Mambu
+          get_entities (bool): instantiate other MambuPy entities or not
+          detailsLevel (str): "BASIC" or "FULL"
+          debug (bool): print debugging info
+          init_t (float): timestamp when the request started
+          lazy (bool): convert the fields of the entities when accessed
+
+        Returns:
+          list of instances of an entity with data from Mambu
+        """
+        if isinstance(list_resp, list):
+            jsonresp = list_resp
+        else:
+            jsonresp = list(json.loads(list_resp.decode()))
         logger.debug("%s, %s retrieved", cls.__name__, len(jsonresp))
 
+        new_instance = cls.__instances_factory(connector)
         elements = []
         for attr in jsonresp:
-            # builds the Entity object
-            elem = cls.__build_object(
+            elem = cls.__build_element(
+                attr,
                 connector=connector,
-                resp=json.dumps(attr).encode(),
-                attrs=attr,
-                tzattrs=copy.deepcopy(attr),
                 get_entities=get_entities,
-                detailsLevel=params["detailsLevel"],
+                detailsLevel=detailsLevel,
                 debug=debug,
+                instance=new_instance(),
+                lazy=lazy,
             )
             elements.append(elem)
+        if get_entities:
+            _resolve_entities(elements, detailsLevel, get_entities, debug=debug)
 
         fin_t = time.time()
         interval = fin_t - init_t
@@ -277,6 +723,66 @@ class MambuEntity(MambuStruct):
 
         return elements
 
+    @classmethod
+    def __iter_several(
+        cls, pages, connector, get_entities, detailsLevel, debug, lazy=False
+    ):
+        """builds the entities of several windows from Mambu, lazily.
+
+        Args:
+          pages (iterator of lists): decoded windows from Mambu
+          connector (obj): connector object to Mambu
+          get_entities (bool): instantiate other MambuPy entities or not
+          detailsLevel (str): "BASIC" or "FULL"
+          debug (bool): print debugging info
+          lazy (bool): convert the fields of the entities when accessed
+
+        Yields:
+          instances of an entity with data from Mambu
+        """
+        new_instance = cls.__instances_factory(connector)
+        for page in pages:
+            logger.debug("%s, %s retrieved", cls.__name__, len(page))
+            elements = [
+                cls.__build_element(
+                    attr,
+                    connector=connector,
+                    get_entities=get_entities,
+                    detailsLevel=detailsLevel,
+                    debug=debug,
+                    instance=new_instance(),
+                    lazy=lazy,
+                )
+                for attr in page
+            ]
+            if get_entities:
+                _resolve_entities(elements, detailsLevel, get_entities, debug=debug)
+            yield from elements
+
+    @classmethod
+    def __build_element(
+        cls, attr, connector, get_entities, detailsLevel, debug, instance=None,
+        lazy=False,
+    ):
+        """builds an entity from an element of a list response from Mambu.
+
+        The element is also the source of _resp, serialized only if needed:
+        _convertDict2Attrs builds new structures for _attrs, leaving the
+        element untouched.
+        """
+        # builds the Entity object
+        return cls.__build_object(
+            connector=connector,
+            resp=attr,
+            attrs=attr,
+            tzattrs=None if lazy else _copy_json(attr),
+            get_entities=get_entities,
+            detailsLevel=detailsLevel,
+            debug=debug,
+            instance=instance,
+            lazy=lazy,
+        )
+
     @classmethod
     def get(cls, entid, detailsLevel="BASIC", get_entities=False, **kwargs):
         """get, a single entity, identified by its entid.
@@ -291,6 +797,10 @@ class MambuEntity(MambuStruct):
                          May include a user, pwd and url to connect to Mambu.
 
             - debug (bool): print debugging info
+            - lazy (bool): convert the fields of the entity when accessed
+
+        Inside a session (see :py:func:`MambuPy.api.session.mambupy_session`)
+        an entity already retrieved is not requested again to Mambu.
 
         Returns:
           instance of an entity with data from Mambu
@@ -302,20 +812,77 @@ class MambuEntity(MambuStruct):
         else:
             debug = False
 
-        connector = MambuConnectorREST(**kwargs)
+        lazy = kwargs.pop("lazy", None)
+        if lazy is None:
+            lazy = cls._lazy
+        lazy = lazy and not get_entities
+
+        session = _session.get()
+        if session is not None:
+            instance = session.get(cls, detailsLevel, entid, get_entities)
+            if instance is not None:
+                logger.debug("entity %s %s from session", cls.__name__, entid)
+                if _async_mode.get():
+                    return _as_awaitable(instance)
+                return instance
+
+        connector = _new_connector(**kwargs)
         logger.debug("request entity %s %s", cls.__name__, entid)
         resp = connector.mambu_get(entid, prefix=cls._prefix, detailsLevel=detailsLevel)
+        if _async_mode.get():
+            return _build_async(
+                cls.__build_one,
+                resp,
+                connector=connector.sync_connector(),
+                get_entities=get_entities,
+                detailsLevel=detailsLevel,
+                debug=debug,
+                init_t=init_t,
+                lazy=lazy,
+            )
 
+        return cls.__build_one(
+            resp,
+            connector=connector,
+            get_entities=get_entities,
+            detailsLevel=detailsLevel,
+            debug=debug,
+            init_t=init_t,
+            lazy=lazy,
+        )
+
+    @classmethod
+    def __build_one(
+        cls, resp, connector, get_entities, detailsLevel, debug, init_t, lazy=False
+    ):
+        """builds the entity of a single response from Mambu.
+
+        Args:
+          resp (bytes): response content (json {}) from Mambu
+          connector (obj): connector object to Mambu
+          get_entities (bool): instantiate other MambuPy entities or not
+          detailsLevel (str): "BASIC" or "FULL"
+          debug (bool): print debugging info
+          init_t (float): timestamp when the request started
+          lazy (bool): convert the fields of the entity when accessed
+
+        Returns:
+          instance of an entity with data from Mambu
+        """
         # builds the Entity object
+        attrs = dict(json.loads(resp.decode()))
         instance = cls.__build_object(
             connector=connector,
             resp=resp,
-            attrs=dict(json.loads(resp.decode())),
-            tzattrs=dict(json.loads(resp.decode())),
+            attrs=attrs,
+            tzattrs=None if lazy else _copy_json(attrs),
             get_entities=get_entities,
             detailsLevel=detailsLevel,
             debug=debug,
+            lazy=lazy,
         )
+        if get_entities:
+            _resolve_entities([instance], detailsLevel, get_entities, debug=debug)
 
         fin_t = time.time()
         interval = fin_t - init_t
@@ -335,6 +902,68 @@ class MambuEntity(MambuStruct):
 
         return instance
 
+    @classmethod
+    async def get_async(cls, entid, *args, **kwargs):
+        """get, asynchronously, a single entity, identified by its entid.
+
+        Same arguments than `get`. Requires aiohttp.
+
+        Returns:
+          instance of an entity with data from Mambu
+        """
+        return await _run_in_mode(_async_mode, cls.get, entid, *args, **kwargs)
+
+    @classmethod
+    def get_many(
+        cls,
+        entids,
+        detailsLevel="BASIC",
+        workers=BULK_WORKERS,
+        get_entities=False,
+        debug=False,
+    ):
+        """get, several entities, identified by their ids or encodedKeys.
+
+        Searchable entities are searched with IN filters on their id (and
+        then on their encodedKey for the ones not found), BULK_CHUNK_SIZE
+        at a time. The rest are retrieved one by one. In both cases the
+        requests are made concurrently.
+
+        Args:
+          entids (list of str): IDs (or encodedKeys) of the entities
+          detailsLevel (str BASIC/FULL): ask for extra details or not
+          workers (int): maximum number of concurrent requests
+          get_entities (bool): should MambuPy automatically instantiate other
+                               MambuPy entities found inside the retrieved
+                               entities?
+          debug (bool): print debugging info
+
+        Returns:
+          list of instances of an entity with data from Mambu, in the same
+          order than entids. The entities not found are None (and logged)
+          instead of raising an error
+        """
+        keys = list(dict.fromkeys(entids))
+        fetched = {}
+        for chunk in _fetch_chunks(
+            _chunks(cls, keys),
+            workers,
+            detailsLevel,
+            get_entities,
+            debug,
+            fields=("id", "encodedKey"),
+            strict=False,
+        ):
+            fetched.update(chunk)
+
+        misses = [entid for entid in keys if entid not in fetched]
+        if misses:
+            logger.warning(
+                "%s, %s not found: %s", cls.__name__, len(misses), misses
+            )
+
+        return [fetched.get(entid) for entid in entids]
+
     def refresh(self, detailsLevel="", **kwargs):
         """get again this single entity, identified by its entid.
 
@@ -386,6 +1015,18 @@ class MambuEntity(MambuStruct):
                          its get_all method. May include a user, pwd and url to
                          connect to Mambu.
 
+            - workers (int): request the pagination windows concurrently,
+                             using up to this number of threads
+            - lazy (bool): convert the fields of the entities when accessed
+            - partition_by (str): a filter key (branchId, centreId,
+                             creditOfficerUsername...). Instead of paginating
+                             over every entity, make a get_all filtered by
+                             each value of the key, workers of them
+                             concurrently, appending their results (see
+                             `__get_all_partitioned`)
+            - partitions (list): values of partition_by. By default every
+                             value in Mambu (see PARTITION_SOURCES)
+
         Returns:
           list of instances of an entity with data from Mambu
         """
@@ -421,9 +1062,116 @@ class MambuEntity(MambuStruct):
         if kwargs:
             params.update(kwargs)
 
-        connector = MambuConnectorREST(**kwargs)
+        partition_by = params.pop("partition_by", None)
+        partitions = params.pop("partitions", None)
+        if partition_by is not None:
+            return cls.__get_all_partitioned(partition_by, partitions, params)
+
+        connector = _new_connector(**kwargs)
         return cls._get_several(connector.mambu_get_all, connector, **params)
 
+    @classmethod
+    def __get_all_partitioned(cls, partition_by, partitions, params):
+        """get_all, one request (paginated) for each value of a filter key.
+
+        Each partition is a get_all with an extra filter on partition_by,
+        so its pagination never goes as deep as the one over every
+        entity. Up to workers partitions are requested concurrently (each
+        one window after the other), and their entities are appended in the
+        order of the partitions. With iter_all they're requested one after
+        the other, lazily.
+
+        Entities without a value on partition_by are not retrieved.
+
+        Args:
+          partition_by (str): filter key, one of _filter_keys
+          partitions (list): values of partition_by, every value in Mambu if
+                             None (see `_partition_values`)
+          params (dict): arguments for each get_all. limit caps the total
+                         number of entities, offset is not allowed
+
+        Returns:
+          list (or iterator) of instances of an entity with data from Mambu
+        """
+        if partition_by not in cls._filter_keys:
+            raise MambuPyError(
+                "key {} not in allowed _filterkeys: {}".format(
+                    partition_by, cls._filter_keys
+                )
+            )
+        if params["filters"] and partition_by in params["filters"]:
+            raise MambuPyError(
+                "{} is both a filter and partition_by".format(partition_by)
+            )
+        if params["offset"]:
+            raise MambuPyError("offset is not allowed with partition_by")
+        if _async_mode.get():
+            raise MambuPyError("partition_by is not allowed asynchronously")
+
+        credentials = {k: params[k] for k in ["user", "pwd", "url"] if k in params}
+        if partitions is None:
+            partitions = _partition_values(partition_by, **credentials)
+        workers = params.pop("workers", None) or 1
+        limit = params["limit"]
+        logger.debug(
+            "request %s by %s, %s partitions",
+            cls.__name__,
+            partition_by,
+            len(partitions),
+        )
+
+        def get_partition(value):
+            part_params = copy.copy(params)
+            part_params["filters"] = dict(params["filters"] or {})
+            part_params["filters"][partition_by] = value
+            connector = _new_connector(**credentials)
+            return cls._get_several(connector.mambu_get_all, connector, **part_params)
+
+        if _iter_mode.get():
+            context = contextvars.copy_context()
+            entities = itertools.chain.from_iterable(
+                context.run(get_partition, value) for value in partitions
+            )
+            return itertools.islice(entities, limit) if limit else entities
+
+        if not partitions:
+            return []
+        session = _session.get()
+        with ThreadPoolExecutor(max_workers=min(workers, len(partitions))) as executor:
+            entities = [
+                entity
+                for partition in executor.map(
+                    lambda value: _in_session(session, get_partition, value),
+                    partitions,
+                )
+                for entity in partition
+            ]
+        return entities[:limit] if limit else entities
+
+    @classmethod
+    def iter_all(cls, *args, **kwargs):
+        """get_all, several entities, built lazily window by window
+
+        Same arguments than `get_all`. Each window from Mambu is requested
+        when the previous one has been consumed, so just one window of
+        elements is kept in memory at a time.
+
+        Returns:
+          iterator of instances of an entity with data from Mambu
+        """
+        return _run_in_mode(_iter_mode, cls.get_all, *args, **kwargs)
+
+    @classmethod
+    async def get_all_async(cls, *args, **kwargs):
+        """get_all, asynchronously, several entities, filtering allowed
+
+        Same arguments than `get_all`. Requires aiohttp.
+
+        Returns:
+          list of instances of an entity with data from Mambu
+        """
+        return await _run_in_mode(_async_mode, cls.get_all, *args, **kwargs)
+
 
 class MambuEntityWritable(MambuStruct, MambuWritable):
     """A Mambu object with writing capabilities."""
@@ -621,6 +1369,8 @@ class MambuEntityWritable(MambuStruct, MambuWritable):
             raise
 
         # cleaning...
+        if self._lazy_keys:
+            self._convertLazyAttrs()
         for key in ["id", "encodedKey"]:
             try:
                 del self._attrs[key]
@@ -654,6 +1404,18 @@ class MambuEntitySearchable(MambuStruct, MambuSearchable):
           limit (int): pagination, number of elements to retrieve
           paginationDetails (str ON/OFF): ask for details on pagination
           detailsLevel (str BASIC/FULL): ask for extra details or not
+          kwargs (dict): keyword arguments for this method.
+
+            - workers (int): request the pagination windows concurrently,
+                             using up to this number of threads
+            - lazy (bool): convert the fields of the entities when accessed
+            - pagination (str offset/keyset): with keyset, each window is
+                             searched after the last element of the previous
+                             one instead of with an offset, so deep windows
+                             are as fast as the first one and elements are
+                             not skipped nor repeated when they change
+                             between windows (see
+                             `MambuPy.api.connector.keyset`)
 
         Returns:
           list of instances of an entity with data from Mambu
@@ -669,9 +1431,33 @@ class MambuEntitySearchable(MambuStruct, MambuSearchable):
         if kwargs:
             params.update(kwargs)
 
-        connector = MambuConnectorREST(**kwargs)
+        connector = _new_connector(**kwargs)
         return cls._get_several(connector.mambu_search, connector, **params)
 
+    @classmethod
+    def iter_search(cls, *args, **kwargs):
+        """search, several entities, built lazily window by window
+
+        Same arguments than `search`. Each window from Mambu is requested
+        when the previous one has been consumed, so just one window of
+        elements is kept in memory at a time.
+
+        Returns:
+          iterator of instances of an entity with data from Mambu
+        """
+        return _run_in_mode(_iter_mode, cls.search, *args, **kwargs)
+
+    @classmethod
+    async def search_async(cls, *args, **kwargs):
+        """search, asynchronously, several entities, filtering criteria allowed
+
+        Same arguments than `search`. Requires aiohttp.
+
+        Returns:
+          list of instances of an entity with data from Mambu
+        """
+        return await _run_in_mode(_async_mode, cls.search, *args, **kwargs)
+
 
 class MambuEntityAttachable(MambuStruct, MambuAttachable):
     """A Mambu object with attaching capabilities."""
@@ -870,13 +1656,21 @@ class MambuEntityCF(MambuValueObject):
         self._attrs = {"value": value, "path": path, "type": typecf, "mcf": mcf}
         self._cf_class = GenericClass
 
-    def get_mcf(self):
+    def get_mcf(self, connector=None):
         """Instance the MambuCustomField (MCF) of this entityCF.
 
         The MCF is set in the mcf property of this object.
 
         If this entityCF is a list, the mcf is set to a dictionary of
         field-MCFields.
+
+        MCFs are read from the registry of
+        :py:class:`MambuPy.api.mambucustomfield.MambuCustomField`, so each
+        one is requested to Mambu just once per tenant and user.
+
+        Args:
+          connector (obj): connector to Mambu of the entity owning this
+                           entityCF, the default one when None
         """
         mcf_mod = import_module("MambuPy.api.mambucustomfield")
         if self.mcf:
@@ -889,11 +1683,13 @@ class MambuEntityCF(MambuValueObject):
                     k for k in item.keys() if k not in self.mcf and k != "_index"
                 ]:
                     try:
-                        self.mcf[key] = mcf_mod.MambuCustomField.get(key)
+                        self.mcf[key] = mcf_mod.MambuCustomField.get_registered(
+                            key, connector=connector)
                     except MambuError:
                         self.mcf[key] = None
             return
-        self.mcf = mcf_mod.MambuCustomField.get(self.path.split("/")[-1])
+        self.mcf = mcf_mod.MambuCustomField.get_registered(
+            self.path.split("/")[-1], connector=connector)
 
 
 class MambuInstallment(MambuStruct):
@@ -925,16 +1721,13 @@ class MambuEntityOwnable(MambuStruct, MambuOwnable):
     entity to instantiate the MambuEntity who owns it.
     """
 
-    def _assignEntObjs(
-        self, entities=None, detailsLevel="BASIC", get_entities=False, debug=False
-    ):
-        """Overwrites `MambuPy.api.mambustruct._assignEntObjs` for MambuLoan
+    def __account_holder_entities(self, entities):
+        """Determines the type of account holder on the entities list.
 
-        Determines the type of account holder and instantiates accordingly
+        Args:
+          entities (list): list of tuples with information of the entity and
+                           property to instantiate, modified in place
         """
-        if entities is None:
-            entities = self._entities
-
         try:
             accountholder_index = entities.index(
                 ("accountHolderKey", "", "accountHolder")
@@ -956,6 +1749,37 @@ class MambuEntityOwnable(MambuStruct, MambuOwnable):
                     "accountHolder",
                 )
 
+    def _entObjsKeys(self, entities=None):
+        """Overwrites `MambuPy.api.mambustruct._entObjsKeys` for MambuLoan
+
+        Determines the type of account holder and keys it accordingly
+        """
+        if entities is None:
+            entities = self._entities
+        self.__account_holder_entities(entities)
+
+        return super()._entObjsKeys(entities)
+
+    def _assignEntObjs(
+        self,
+        entities=None,
+        detailsLevel="BASIC",
+        get_entities=False,
+        debug=False,
+        prefetched=None,
+    ):
+        """Overwrites `MambuPy.api.mambustruct._assignEntObjs` for MambuLoan
+
+        Determines the type of account holder and instantiates accordingly
+        """
+        if entities is None:
+            entities = self._entities
+        self.__account_holder_entities(entities)
+
         return super()._assignEntObjs(
-            entities, detailsLevel=detailsLevel, get_entities=get_entities, debug=debug
+            entities,
+            detailsLevel=detailsLevel,
+            get_entities=get_entities,
+            debug=debug,
+            prefetched=prefetched,
         )
@@ -5,16 +5,160 @@
    :toctree: _autosummary
 """
 
+import json
+import threading
+import time
+
+from .connector.rest import MambuConnectorREST
 from .entities import MambuEntity
 from MambuPy.mambuutil import MambuPyError
 
 
 class MambuCustomField(MambuEntity):
-    """MambuCustomField entity"""
+    """MambuCustomField entity
+
+    Definitions of custom fields are kept in a process-wide registry once
+    retrieved (see `get_registered`), apart for each tenant and user, which
+    may be preloaded all at once from Mambu (`preload_registry`) or from a
+    snapshot on disk (`load_registry`).
+    """
 
     _prefix = "customfields"
     """prefix constant for connections to Mambu"""
 
+    _registry_ttl = 3600
+    """seconds a definition of a custom field is kept in the registry"""
+
+    _registry = {}
+    """definitions of custom fields already retrieved, by tenant and user (see
+    `MambuPy.api.connector.rest.MambuConnectorREST._credentials_key`) and by
+    id: (expiration time, json of the definition)"""
+
+    _registry_lock = threading.Lock()
+
+    @classmethod
+    def get_registered(cls, cfid, connector=None, **kwargs):
+        """definition of a custom field, from the registry.
+
+        If the custom field is not registered yet (or its registration
+        expired), it is retrieved from Mambu and registered.
+
+        Args:
+          cfid (str): id of the custom field
+          connector (obj): connector to Mambu, one with the user, pwd and url
+                           on kwargs when None
+          kwargs (dict): May include a user, pwd and url to connect to Mambu.
+
+        Returns:
+          instance of a customfield with data from Mambu, a new one for each
+          call, so callers may modify it
+        """
+        scope = (connector or MambuConnectorREST(**kwargs))._credentials_key()
+        now = time.monotonic()
+        with cls._registry_lock:
+            registered = cls._registry.get(scope, {}).get(cfid)
+        if registered is not None and registered[0] > now:
+            return cls._build_from_json(
+                [json.loads(registered[1])], connector=connector, **kwargs
+            )[0]
+
+        if connector is None:
+            mcf = cls.get(cfid, **kwargs)
+        else:
+            resp = connector.mambu_get(cfid, prefix=cls._prefix)
+            mcf = cls._build_from_json([json.loads(resp)], connector=connector)[0]
+        cls.register([mcf])
+        return mcf
+
+    @classmethod
+    def register(cls, mcfs):
+        """Keeps some definitions of custom fields in the registry.
+
+        Each one is registered for the tenant and user of its connector, for
+        _registry_ttl seconds.
+
+        Args:
+          mcfs (list): instances of customfields
+        """
+        expiration = time.monotonic() + cls._registry_ttl
+        with cls._registry_lock:
+            for mcf in mcfs:
+                scope = mcf._connector._credentials_key()
+                cls._registry.setdefault(scope, {})[mcf["id"]] = (
+                    expiration, mcf._resp)
+
+    @classmethod
+    def clear_registry(cls, cfid=None):
+        """Forgets definitions of custom fields in the registry.
+
+        Args:
+          cfid (str): id of the custom field to forget (for every tenant and
+                      user), every one by default
+        """
+        with cls._registry_lock:
+            if cfid is None:
+                cls._registry.clear()
+            else:
+                for registered in cls._registry.values():
+                    registered.pop(cfid, None)
+
+    @classmethod
+    def preload_registry(cls, **kwargs):
+        """Registers the definitions of every custom field in Mambu.
+
+        Args:
+          kwargs (dict): extra parameters for get_all. May include a user,
+                         pwd and url to connect to Mambu.
+
+        Returns:
+          number of definitions registered
+        """
+        mcfs = cls.get_all(**kwargs)
+        cls.register(mcfs)
+        return len(mcfs)
+
+    @classmethod
+    def save_registry(cls, path, connector=None, **kwargs):
+        """Writes a snapshot of the registry of a tenant and user on disk, as
+        json.
+
+        Args:
+          path (str): file to write
+          connector (obj): connector to Mambu of the tenant and user, one
+                           with the user, pwd and url on kwargs when None
+          kwargs (dict): May include a user, pwd and url to connect to Mambu.
+        """
+        scope = (connector or MambuConnectorREST(**kwargs))._credentials_key()
+        now = time.monotonic()
+        with cls._registry_lock:
+            definitions = [
+                json.loads(resp)
+                for expiration, resp in cls._registry.get(scope, {}).values()
+                if expiration > now
+            ]
+        with open(path, "w") as snapshot:
+            json.dump(definitions, snapshot)
+
+    @classmethod
+    def load_registry(cls, path, **kwargs):
+        """Registers the definitions of custom fields of a snapshot on disk.
+
+        The definitions are registered for the tenant and user given, for
+        _registry_ttl seconds from now.
+
+        Args:
+          path (str): file written by `save_registry`
+          kwargs (dict): May include a user, pwd and url to connect to Mambu,
+                         or the connector, for the registered customfields.
+
+        Returns:
+          number of definitions registered
+        """
+        with open(path) as snapshot:
+            mcfs = cls._build_from_json(json.load(snapshot), **kwargs)
+        cls.register(mcfs)
+        return len(mcfs)
+
 
 class MambuCustomFieldSet(MambuEntity):
     """MambuCustomFieldSet entity"""
@@ -39,6 +183,17 @@ class MambuCustomFieldSet(MambuEntity):
     ]
     """for which entites does a Set may be available for"""
 
+    _cache_ttl = 300
+    """seconds the field paths of an owner type are kept in cache (see
+    `get_field_paths`)"""
+
+    _cache = {}
+    """cached field paths, by tenant and user (see
+    `MambuPy.api.connector.rest.MambuConnectorREST._credentials_key`) and
+    owner type: (expiration time, {id: path})"""
+
+    _cache_lock = threading.Lock()
+
     @classmethod
     def get_all(cls, *args, **kwargs):
         """get_all, customfieldsets, filtering allowed
@@ -70,3 +225,62 @@ class MambuCustomFieldSet(MambuEntity):
             )
 
         return super().get_all(*args, **kwargs)
+
+    @classmethod
+    def get_field_paths(cls, availableFor="", connector=None, **kwargs):
+        """paths of the custom fields in the sets available for an entity.
+
+        The sets are retrieved from Mambu once per tenant, user and owner
+        type, and the paths are cached process-wide for _cache_ttl seconds
+        (see `invalidate_cache`).
+
+        Args:
+          availableFor (str): owner type of the sets, every set by default
+          connector (obj): connector to Mambu, one with the user, pwd and url
+                           on kwargs when None
+          kwargs (dict): May include a user, pwd and url to connect to Mambu.
+
+        Returns:
+          dict with the path (/set id/field id) of each custom field, by its
+          id. Shared by every caller of the same tenant and user, must not be
+          modified
+        """
+        key = (
+            (connector or MambuConnectorREST(**kwargs))._credentials_key(),
+            availableFor,
+        )
+        now = time.monotonic()
+        with cls._cache_lock:
+            cached = cls._cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        if connector is None:
+            cfsets = cls.get_all(availableFor=availableFor, **kwargs)
+        else:
+            cfsets = cls._get_several(
+                connector.mambu_get_all, connector, availableFor=availableFor
+            )
+        paths = {}
+        for cfs in cfsets:
+            for cf in cfs.customFields:
+                paths.setdefault(cf["id"], "/" + cfs.id + "/" + cf["id"])
+
+        with cls._cache_lock:
+            cls._cache[key] = (now + cls._cache_ttl, paths)
+        return paths
+
+    @classmethod
+    def invalidate_cache(cls, availableFor=None):
+        """Forgets the cached field paths.
+
+        Args:
+          availableFor (str): owner type to forget (for every tenant and
+                              user), every one by default
+        """
+        with cls._cache_lock:
+            if availableFor is None:
+                cls._cache.clear()
+            else:
+                for key in [key for key in cls._cache if key[1] == availableFor]:
+                    del cls._cache[key]
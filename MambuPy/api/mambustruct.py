@@ -6,6 +6,8 @@
 """
 
 import copy
+import math
+import re
 from datetime import datetime
 from importlib import import_module
 
@@ -13,6 +15,312 @@ from .classes import MambuMapObj
 from ..mambuutil import MambuPyError, date_format
 
 
+_CONSTANT_FIELDS = [
+    "id",
+    "groupName",
+    "name",
+    "homePhone",
+    "mobilePhone",
+    "mobilePhone2",
+    "postcode",
+    "emailAddress",
+    "description",
+]
+"""Fields left as they come (strings) by _convertDict2Attrs, besides any
+field whose name ends with "Key"."""
+
+_NO_MATCH = object()
+"""Returned by the conversion rules when they don't apply to a value"""
+
+_BOOL_STRINGS = frozenset(["TRUE", "true", "FALSE", "false"])
+_INT_STRING = re.compile(r"0|-?[1-9][0-9]*")
+_FLOAT_STRING = re.compile(r"-?[0-9]+\.[0-9]+")
+_DATE_STRING = re.compile(r"[0-9]{4}-")
+_DIGIT = re.compile(r"\d")
+_FLOAT_WORD = re.compile(r"\s*[+-]?(nan|inf)", re.IGNORECASE)
+
+
+def _entity_module(ent_module):
+    """Module holding MambuPy entities.
+
+    Args:
+      ent_module (str): name of the module, relative to mambupy.api (or
+                        absolute)
+
+    Returns:
+      the module
+    """
+    try:
+        return import_module("." + ent_module, "mambupy.api")
+    except ModuleNotFoundError:
+        return import_module(ent_module)
+
+
+def _entity_class(ent_path):
+    """Class of MambuPy entities.
+
+    Args:
+      ent_path (str): module and class of the entities, like
+                      mambuclient.MambuClient
+
+    Returns:
+      the class, None if the path is empty or can't be resolved
+    """
+    if not ent_path:
+        return None
+    ent_module, _, ent_class = ent_path.rpartition(".")
+    try:
+        return getattr(_entity_module(ent_module), ent_class)
+    except (ImportError, ValueError, AttributeError):
+        return None
+
+
+def _copy_json(data):
+    """Copies a decoded json structure (nested dicts and lists).
+
+    Way faster than copy.deepcopy for this kind of structures, since
+    there is no need to track memo of already copied objects.
+    """
+    if type(data) is dict:
+        return {
+            key: _copy_json(val) if type(val) in (dict, list) else val
+            for key, val in data.items()
+        }
+    if type(data) is list:
+        return [_copy_json(val) if type(val) in (dict, list) else val for val in data]
+    return data
+
+
+def _convert_by_trial(data, as_utc):
+    """Converts data to a basic type trying int, float and datetime in turn.
+
+    This is the reference conversion, the rules below give the very same
+    results for the values they apply to.
+    """
+    try:
+        if data in ["TRUE", "true", "FALSE", "false"]:
+            return data.lower() == "true"
+    except TypeError:
+        # some data types override __eq__ and may not be compared to str
+        # in such cases continue evaluating down under
+        pass
+    try:
+        i_data = int(data)
+        if (
+            str(i_data) != data
+        ):  # if string has trailing 0's, leave it as string, to not lose them
+            return data
+        return i_data
+    except (TypeError, ValueError):
+        try:
+            f_data = float(data)
+            return f_data
+        except (TypeError, ValueError):
+            try:
+                return date_format(data, as_utc=as_utc)
+            except (TypeError, ValueError):
+                return data
+
+    return data
+
+
+def _bool_rule(data, as_utc):
+    if data in _BOOL_STRINGS:
+        return data.lower() == "true"
+    return _NO_MATCH
+
+
+def _int_rule(data, as_utc):
+    if _INT_STRING.fullmatch(data):
+        return int(data)
+    return _NO_MATCH
+
+
+def _float_rule(data, as_utc):
+    # has a dot, so int() would fail on it
+    if _FLOAT_STRING.fullmatch(data):
+        return float(data)
+    return _NO_MATCH
+
+
+def _date_rule(data, as_utc):
+    # starts with 4 digits and a dash, so int() and float() would fail on it
+    if _DATE_STRING.match(data):
+        try:
+            return date_format(data, as_utc=as_utc)
+        except ValueError:
+            return data
+    return _NO_MATCH
+
+
+def _text_rule(data, as_utc):
+    # no digits and no nan/inf: int(), float() and datetimes would fail on it
+    if (
+        data not in _BOOL_STRINGS
+        and not _DIGIT.search(data)
+        and not _FLOAT_WORD.match(data)
+    ):
+        return data
+    return _NO_MATCH
+
+
+_RULES = (_text_rule, _date_rule, _float_rule, _int_rule, _bool_rule)
+
+
+class _PlanNode:
+    """Conversion plan for one field path of a MambuStruct class.
+
+    Holds the rule that converted the last value seen at the path, tried
+    first on the next value, and the plans for the nested fields. The
+    elements of a list share one plan, under the None key.
+    """
+
+    __slots__ = ("rule", "children")
+
+    def __init__(self):
+        self.rule = None
+        self.children = {}
+
+    def child(self, key):
+        try:
+            return self.children[key]
+        except KeyError:
+            node = self.children[key] = _PlanNode()
+            return node
+
+
+_conversion_plans = {}
+"""Conversion plan of each MambuStruct class, learned as its data is
+converted."""
+
+
+class _TypeConverter:
+    """Converts the fields of a MambuStruct to basic python types.
+
+    Each string value is converted using the rule its field used last time,
+    when it applies, so usually only one conversion is made per value. Every
+    rule only applies to values for which it gives the same result than
+    :py:func:`_convert_by_trial`, which is the fallback for anything else.
+    """
+
+    def __init__(self, as_utc, plan):
+        self.as_utc = as_utc
+        self.plan = plan
+
+    def __convert_from_dict_to_basic_types_non_constant_fields(
+        self, k, data_dict, data, tzdata, constantFields, node
+    ):
+        try:
+            data_dict[k] = self.convert(data[k], tzdata[k], constantFields, node)
+            if type(data_dict[k]) not in [dict, list, datetime]:
+                del tzdata[k]
+            elif isinstance(data_dict[k], datetime):
+                tzdata[k] = datetime.fromisoformat(tzdata[k]).tzname()
+        except (KeyError, ValueError, TypeError):
+            data_dict[k] = self.convert(data[k], node=node)
+
+    def __convert_from_dict_to_basic_types(
+        self, it_dict, data, tzdata, constantFields, node
+    ):
+        data_dict = {}
+        for k in it_dict:
+            if k in constantFields or (len(k) > 2 and k[-3:] == "Key"):
+                data_dict[k] = data[k]
+                if tzdata and k in tzdata:
+                    del tzdata[k]
+            else:
+                self.__convert_from_dict_to_basic_types_non_constant_fields(
+                    k, data_dict, data, tzdata, constantFields, node.child(k)
+                )
+        return data_dict
+
+    def __convert_from_list_to_basic_types(
+        self, it_list, data, tzdata, constantFields, node
+    ):
+        data_list = []
+        node = node.child(None)
+        for num, (e, te) in enumerate(zip(it_list, tzdata)):
+            d = self.convert(e, te, constantFields, node)
+            if type(d) not in [dict, list, datetime]:
+                tzdata[num] = None
+            elif isinstance(d, datetime):
+                tzdata[num] = datetime.fromisoformat(tzdata[num]).tzname()
+            data_list.append(d)
+        return data_list
+
+    def __convert_to_basic_types_base_cases(self, data, node):
+        data_type = type(data)
+        if data_type is str:
+            rule = node.rule
+            if rule is not None:
+                value = rule(data, self.as_utc)
+                if value is not _NO_MATCH:
+                    return value
+            for rule in _RULES:
+                value = rule(data, self.as_utc)
+                if value is not _NO_MATCH:
+                    node.rule = rule
+                    return value
+        elif (
+            data_type in (dict, list, int, bool)
+            or data is None
+            or (data_type is float and math.isfinite(data))
+        ):
+            return data
+        return _convert_by_trial(data, self.as_utc)
+
+    def convert(self, data, tzdata=None, constantFields=None, node=None):
+        """Recursively convert the fields on the data given to a python
+        object.
+
+        If data is iterable, iterates its elements and try to convert them.
+
+        If data is a string, tries to convert its value to a basic data type:
+
+        Basic data types supported:
+          - int: an int number
+          - float: a floating point number
+          - datetime: if the string holds a valid datetime in a date_format
+                      specific format. Considers UTC if as_utc is True.
+
+        A list of fields that should stay as-they-come (strings) is supported.
+        All fields whose name ends with "Key" is also ignored.
+
+        Args:
+          data (obj): an object whose value should be converted to a basic
+                      type
+          tzdata (obj): mirror of data, holding only the TZ data for datetimes.
+          constantFields (list): fields that will be ignored for conversion
+          node (_PlanNode): conversion plan for data
+        """
+        if not constantFields:
+            constantFields = []
+        if node is None:
+            node = self.plan
+        # Iterators, lists and dictionaries
+        # Here comes the recursive calls!
+        try:
+            it = data
+            if isinstance(it, dict):
+                data = self.__convert_from_dict_to_basic_types(
+                    it, data, tzdata, constantFields, node
+                )
+            if isinstance(it, MambuMapObj):
+                it._convertDict2Attrs()
+            if isinstance(it, list):
+                data = self.__convert_from_list_to_basic_types(
+                    it, data, tzdata, constantFields, node
+                )
+        except TypeError:
+            pass
+        except Exception as ex:  # pragma: no cover
+            # unknown exception
+            raise ex
+
+        # Base case!
+        return self.__convert_to_basic_types_base_cases(data, node)
+
+
 class MambuStruct(MambuMapObj):
     """Basic Struct for Mambu Objects with basic connection functionality."""
 
@@ -113,152 +421,111 @@ class MambuStruct(MambuMapObj):
         except AttributeError as attr_err:
             if name[0:4] == "get_" and len(name) > 4:
                 ent = name[4:]
+                if self._lazy_keys:
+                    self._convertLazyAttrs(ent)
                 if ent in self._attrs.keys():
                     entity = self._attrs[ent]
                     if entity.__class__.__name__ == self._cf_class.__name__:
                         if not entity.mcf:
-                            entity.get_mcf()
+                            entity.get_mcf(connector=getattr(self, "_connector", None))
                         return self.__getattribute_for_cf(ent, entity)
                     return lambda **kwargs: entity
                 return lambda **kwargs: self.getEntities([ent], **kwargs)[0]
             else:
                 raise attr_err
 
-    def __convert_from_dict_to_basic_types_non_constant_fields(
-        self, k, data_dict, data, tzdata, constantFields
-    ):
-        try:
-            data_dict[k] = self.__convert_to_basic_types(data[k], tzdata[k], constantFields)
-            if type(data_dict[k]) not in [dict, list, datetime]:
-                del tzdata[k]
-            elif isinstance(data_dict[k], datetime):
-                tzdata[k] = datetime.fromisoformat(tzdata[k]).tzname()
-        except (KeyError, ValueError, TypeError):
-            data_dict[k] = self.__convert_to_basic_types(data[k])
-
-    def __convert_from_dict_to_basic_types(self, it_dict, data, tzdata, constantFields):
-        data_dict = {}
-        for k in it_dict:
-            if k in constantFields or (len(k) > 2 and k[-3:] == "Key"):
-                data_dict[k] = data[k]
-                if tzdata and k in tzdata:
-                    del tzdata[k]
-            else:
-                self.__convert_from_dict_to_basic_types_non_constant_fields(
-                    k, data_dict, data, tzdata, constantFields
-                )
-        return data_dict
-
-    def __convert_from_list_to_basic_types(self, it_list, data, tzdata, constantFields):
-        data_list = []
-        for num, (e, te) in enumerate(zip(it_list, tzdata)):
-            d = self.__convert_to_basic_types(e, te, constantFields)
-            if type(d) not in [dict, list, datetime]:
-                tzdata[num] = None
-            elif isinstance(d, datetime):
-                tzdata[num] = datetime.fromisoformat(tzdata[num]).tzname()
-            data_list.append(d)
-        return data_list
+    def _convertDict2Attrs(self, *args, **kwargs):
+        """Each element on the attrs attribute gets converted to a
+        proper python object, depending on type.
 
-    def __convert_to_basic_types_base_cases(self, data):
-        try:
-            if data in ["TRUE", "true", "FALSE", "false"]:
-                return data.lower() == "true"
-        except TypeError:
-            # some data types override __eq__ and may not be compared to str
-            # in such cases continue evaluating down under
-            pass
-        try:
-            i_data = int(data)
-            if (
-                str(i_data) != data
-            ):  # if string has trailing 0's, leave it as string, to not lose them
-                return data
-            return i_data
-        except (TypeError, ValueError):
-            try:
-                f_data = float(data)
-                return f_data
-            except (TypeError, ValueError):
-                try:
-                    return date_format(data, as_utc=self._as_utc)
-                except (TypeError, ValueError):
-                    return data
+        Some default constantFields are left as is (strings), because they are
+        better treated as strings. This includes any field whose name ends with
+        'Key'.
 
-        return data
+        Conversion follows the plan learned for the class of the struct, see
+        :py:class:`_TypeConverter`.
+        """
+        if self._lazy_keys:
+            self._convertLazyAttrs()
 
-    def __convert_to_basic_types(self, data, tzdata=None, constantFields=None):
-        """Recursively convert the fields on the data given to a python
-        object.
+        self._attrs = self.__type_converter().convert(
+            self._attrs, self._tzattrs, _CONSTANT_FIELDS
+        )
 
-        If data is iterable, iterates its elements and try to convert them.
+    def __type_converter(self):
+        try:
+            plan = _conversion_plans[type(self)]
+        except KeyError:
+            plan = _conversion_plans.setdefault(type(self), _PlanNode())
+        return _TypeConverter(self._as_utc, plan)
 
-        If data is a string, tries to convert its value to a basic data type:
+    def _setLazyAttrs(self, attrs):
+        """Sets the fields of the struct, leaving them to be converted when
+        accessed.
 
-        Basic data types supported:
-          - int: an int number
-          - float: a floating point number
-          - datetime: if the string holds a valid datetime in a date_format
-                      specific format. Considers UTC if _as_utc is True.
+        Conversion of each field (`_convertDict2Attrs`), and extraction of its
+        custom fields (`_extractCustomFields`) and Value Objects
+        (`_extractVOs`), is made the first time the field is accessed through
+        the dict-like or object-like behaviour of the struct. Any operation
+        over the whole struct (like serializing it) converts all of them.
 
-        A list of fields that should stay as-they-come (strings) is supported.
-        All fields whose name ends with "Key" is also ignored.
+        While not converted, a field holds in `_attrs` the very same value in
+        attrs, which must be left untouched.
 
         Args:
-          data (obj): an object whose value should be converted to a basic
-                      type
-          tzdata (obj): mirror of data, holding only the TZ data for datetimes.
-          constantFields (list): fields that will be ignored for conversion
+          attrs (dict): the fields, as they come from Mambu
         """
-        if not constantFields:
-            constantFields = []
-        # Iterators, lists and dictionaries
-        # Here comes the recursive calls!
-        try:
-            it = data
-            if isinstance(it, dict):
-                data = self.__convert_from_dict_to_basic_types(
-                    it, data, tzdata, constantFields
-                )
-            if isinstance(it, MambuMapObj):
-                it._convertDict2Attrs()
-            if isinstance(it, list):
-                data = self.__convert_from_list_to_basic_types(
-                    it, data, tzdata, constantFields
-                )
-        except TypeError:
-            pass
-        except Exception as ex:  # pragma: no cover
-            # unknown exception
-            raise ex
+        self._attrs = dict(attrs)
+        self._tzattrs = {}
+        self._lazy_keys = set(self._attrs)
 
-        # Base case!
-        return self.__convert_to_basic_types_base_cases(data)
+    def _convertLazyAttrs(self, key=None):
+        """Converts fields set by `_setLazyAttrs` which are still not
+        converted.
 
-    def _convertDict2Attrs(self, *args, **kwargs):
-        """Each element on the attrs attribute gets converted to a
-        proper python object, depending on type.
-
-        Some default constantFields are left as is (strings), because they are
-        better treated as strings. This includes any field whose name ends with
-        'Key'.
+        Args:
+          key (str): the field to convert. If it's not a field in _attrs, it
+                     may be a custom field, so every custom field set gets
+                     converted. If None, converts every field.
         """
-        constantFields = [
-            "id",
-            "groupName",
-            "name",
-            "homePhone",
-            "mobilePhone",
-            "mobilePhone2",
-            "postcode",
-            "emailAddress",
-            "description",
-        ]
-        # and any field whose name ends with "Key"
-
-        self._attrs = self.__convert_to_basic_types(
-            self._attrs, self._tzattrs, constantFields
-        )
+        lazy = self._lazy_keys
+        if not lazy:
+            return
+        _attrs = self._attrs
+        if key is None:
+            keys = [k for k in _attrs if k in lazy]
+            lazy.clear()
+        elif key in lazy and key[:1] != "_":
+            keys = [key]
+            lazy.discard(key)
+        elif key in _attrs and key not in lazy:
+            return
+        else:
+            # custom field sets are converted all at once, as any of them
+            # may hold the key
+            keys = [k for k in _attrs if k in lazy and k[:1] == "_"]
+            if not keys:
+                return
+            lazy.difference_update(keys)
+
+        tzattrs = self._tzattrs
+        raw = {}
+        for k in keys:
+            raw[k] = _attrs[k]
+            tzattrs[k] = _copy_json(raw[k])
+        attrs = self.__type_converter().convert(raw, tzattrs, _CONSTANT_FIELDS)
+
+        customfieldsets = {k: v for k, v in attrs.items() if k[:1] == "_"}
+        if customfieldsets:
+            self._extractCustomFields(customfieldsets)
+            attrs.update(customfieldsets)
+        _attrs.update(attrs)
+
+        vos = [(elem, voclass) for elem, voclass in self._vos if elem in attrs]
+        if vos:
+            vos_module = import_module(".vos", "mambupy.api")
+            for elem, voclass in vos:
+                self.__extract_vo(elem, voclass, vos_module)
 
     def __convert_from_dict_basic_types_to_str(self, it_dict, data, tzdata):
         d = {}
@@ -334,6 +601,8 @@ class MambuStruct(MambuMapObj):
           data (obj): an object whose value should be converted to string.
           tzdata (obj): mirror of data, holding only the TZ data for datetimes.
         """
+        if self._lazy_keys:
+            self._convertLazyAttrs()
         self._attrs = self.__convert_basic_types_to_str(self._attrs, self._tzattrs)
 
     def __extract_customfields_from_dict(self, val_dict, attr, attrs):
@@ -369,6 +638,8 @@ class MambuStruct(MambuMapObj):
                         extracted. If None, `self._attrs` will be used
         """
         if not attrs:
+            if self._lazy_keys:
+                self._convertLazyAttrs()
             attrs = self._attrs
 
         for attr, val in [atr for atr in attrs.items() if atr[0][0] == "_"]:
@@ -423,6 +694,8 @@ class MambuStruct(MambuMapObj):
         """Loops through every custom field set and update custom field values
         with the corresponding property at the root of the `_attrs` dict, then
         deletes the property at root"""
+        if self._lazy_keys:
+            self._convertLazyAttrs()
         cfs = []
         # updates customfieldsets
         for attr, val in [
@@ -499,31 +772,47 @@ class MambuStruct(MambuMapObj):
                                MambuPy entities found inside the Value Objects?
           debug (bool): print debugging info
         """
+        if self._lazy_keys:
+            self._convertLazyAttrs()
         vos_module = import_module(".vos", "mambupy.api")
         for elem, voclass in self._vos:
-            try:
-                vo_data = self._attrs[elem]
-            except KeyError:
-                continue
+            self.__extract_vo(elem, voclass, vos_module, get_entities, debug)
+
+    def __extract_vo(self, elem, voclass, vos_module, get_entities=False, debug=False):
+        """Instantiates the Value Object (or list of them) of an element of
+        _attrs.
 
-            if isinstance(vo_data, list):
-                vo_obj, already = self.__extract_vos_from_list(
-                    vo_data, vos_module, voclass, elem, get_entities, debug
+        Args:
+          elem (str): element at attrs holding the data of the VO
+          voclass (class): class of the VO to instantiate
+          vos_module (module): VOs module from MambuPy
+          get_entities (bool): should MambuPy automatically instantiate other
+                               MambuPy entities found inside the Value Object?
+          debug (bool): print debugging info
+        """
+        try:
+            vo_data = self._attrs[elem]
+        except KeyError:
+            return
+
+        if isinstance(vo_data, list):
+            vo_obj, already = self.__extract_vos_from_list(
+                vo_data, vos_module, voclass, elem, get_entities, debug
+            )
+            if already:
+                return
+        elif isinstance(vo_data, getattr(vos_module, voclass)):
+            return
+        else:
+            vo_obj = getattr(vos_module, voclass)(**vo_data)
+            vo_obj._tzattrs = self._tzattrs[elem]
+            vo_obj._extractVOs()
+            if get_entities:
+                vo_obj._assignEntObjs(
+                    vo_obj._entities, get_entities=get_entities, debug=debug
                 )
-                if already:
-                    continue
-            elif isinstance(vo_data, getattr(vos_module, voclass)):
-                continue
-            else:
-                vo_obj = getattr(vos_module, voclass)(**vo_data)
-                vo_obj._tzattrs = self._tzattrs[elem]
-                vo_obj._extractVOs()
-                if get_entities:
-                    vo_obj._assignEntObjs(
-                        vo_obj._entities, get_entities=get_entities, debug=debug
-                    )
 
-            self._attrs[elem] = vo_obj
+        self._attrs[elem] = vo_obj
 
     def __update_vos_from_list(self, vo_obj, vos_module, voclass):
         """Updates the VOs from a list.
@@ -558,6 +847,8 @@ class MambuStruct(MambuMapObj):
         its data updated, the Value Object will dissappear and the key name
         of the original element will return to be from 'vo_elem' to 'elem'
         """
+        if self._lazy_keys:
+            self._convertLazyAttrs()
         vos_module = import_module(".vos", "mambupy.api")
         for elem, voclass in self._vos:
             try:
@@ -603,6 +894,8 @@ class MambuStruct(MambuMapObj):
         Returns:
           MambuPyObject (obj): instantiation of the object from Mambu
         """
+        if self._lazy_keys:
+            self._convertLazyAttrs()
         if not config_entities:
             config_entities = self._entities
         ents = []  # do not be hasty, that is my motto
@@ -670,7 +963,9 @@ class MambuStruct(MambuMapObj):
 
         return enc_key
 
-    def __instance_entity_obj(self, encoded_key, ent_mod, ent_class, **kwargs):
+    def __instance_entity_obj(
+        self, encoded_key, ent_mod, ent_class, prefetched=None, **kwargs
+    ):
         """Instantiates a single MambuPy object calling its get method.
         If the object doesn't supports detailsLevel (MambuProduct),
            omit it.
@@ -679,10 +974,13 @@ class MambuStruct(MambuMapObj):
                                 from Mambu
              ent_mod (obj): module holding the class to instantiate
              ent_class (str): class to instantiate
+             prefetched (dict): already retrieved objects, by encodedKey
              kwargs (dict): extra parameters for the get method
         Returns:
              MambuPyObject (obj): instantiation of the object from Mambu
         """
+        if prefetched and encoded_key in prefetched:
+            return prefetched[encoded_key]
         try:
             try:
                 return getattr(ent_mod, ent_class).get(encoded_key, **kwargs)
@@ -721,8 +1019,41 @@ class MambuStruct(MambuMapObj):
             except ValueError:
                 self[new_property] = ent_item
 
+    def _entObjsKeys(self, entities=None):
+        """Keys of the MambuPy entities which `_assignEntObjs` instantiates.
+
+        Args:
+          entities (list): list of tuples with information of the entity and
+                           property to instantiate. Look at
+                           :py:obj:`MambuPy.api.mambustruct.MambuStruct._entities`
+
+        Returns:
+          list of 2-tuples (class path of the entity, encodedKey)
+        """
+        if entities is None:
+            entities = self._entities
+
+        keys = []
+        for encodedKey, ent_path, new_property in entities:
+            if not ent_path:
+                continue
+            enc_key = self.__get_enc_key(encodedKey)
+            if not enc_key:
+                continue
+            if isinstance(enc_key, list):
+                keys.extend([(ent_path, item) for item in enc_key])
+            else:
+                keys.append((ent_path, enc_key))
+
+        return keys
+
     def _assignEntObjs(
-        self, entities=None, detailsLevel="BASIC", get_entities=False, debug=False
+        self,
+        entities=None,
+        detailsLevel="BASIC",
+        get_entities=False,
+        debug=False,
+        prefetched=None,
     ):
         """Loops entities list of tuples to instantiate MambuPy entities from Mambu.
 
@@ -738,18 +1069,21 @@ class MambuStruct(MambuMapObj):
                                other MambuPy entities found inside the
                                retrieved entities?
           debug (bool): print debugging info
+          prefetched (dict): already retrieved entities, to use instead of
+                             requesting them again, by class path of the
+                             entity and then by encodedKey. See
+                             `_entObjsKeys`
         """
         if entities is None:
             entities = self._entities
+        if prefetched is None:
+            prefetched = {}
 
         instances = []
         for encodedKey, ent_path, new_property in entities:
             ent_module = ".".join(ent_path.split(".")[:-1])
             ent_class = ent_path.split(".")[-1]
-            try:
-                ent_mod = import_module("." + ent_module, "mambupy.api")
-            except ModuleNotFoundError:
-                ent_mod = import_module(ent_module)
+            ent_mod = _entity_module(ent_module)
 
             enc_key = self.__get_enc_key(encodedKey)
             if not enc_key:
@@ -763,6 +1097,7 @@ class MambuStruct(MambuMapObj):
                             item,
                             ent_mod,
                             ent_class,
+                            prefetched.get(ent_path),
                             detailsLevel=detailsLevel,
                             get_entities=get_entities,
                             debug=debug,
@@ -773,6 +1108,7 @@ class MambuStruct(MambuMapObj):
                     enc_key,
                     ent_mod,
                     ent_class,
+                    prefetched.get(ent_path),
                     detailsLevel=detailsLevel,
                     get_entities=get_entities,
                     debug=debug,
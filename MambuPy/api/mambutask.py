@@ -49,16 +49,8 @@ class MambuTask(MambuEntity, MambuEntityWritable):
         self._entities = copy.deepcopy(MambuTask._entities)
         super().__init__(**kwargs)
 
-    def _assignEntObjs(
-        self, entities=None, detailsLevel="BASIC", get_entities=False, debug=False
-    ):
-        """Overwrites `MambuPy.api.mambustruct._assignEntObjs` for MambuTask
-
-        Determines the type of task link and instantiates accordingly
-        """
-        if entities is None:
-            entities = self._entities
-
+    def __task_link_entities(self, entities):
+        """Sets the class of the task link on entities, by its type."""
         try:
             tasklink_index = entities.index(("taskLinkKey", "", "taskLink"))
         except ValueError:
@@ -78,8 +70,39 @@ class MambuTask(MambuEntity, MambuEntityWritable):
                     "taskLink",
                 )
 
+    def _entObjsKeys(self, entities=None):
+        """Overwrites `MambuPy.api.mambustruct._entObjsKeys` for MambuTask
+
+        Determines the type of task link and keys it accordingly
+        """
+        if entities is None:
+            entities = self._entities
+        self.__task_link_entities(entities)
+
+        return super()._entObjsKeys(entities)
+
+    def _assignEntObjs(
+        self,
+        entities=None,
+        detailsLevel="BASIC",
+        get_entities=False,
+        debug=False,
+        prefetched=None,
+    ):
+        """Overwrites `MambuPy.api.mambustruct._assignEntObjs` for MambuTask
+
+        Determines the type of task link and instantiates accordingly
+        """
+        if entities is None:
+            entities = self._entities
+        self.__task_link_entities(entities)
+
         return super()._assignEntObjs(
-            entities, detailsLevel=detailsLevel, get_entities=get_entities, debug=debug
+            entities,
+            detailsLevel=detailsLevel,
+            get_entities=get_entities,
+            debug=debug,
+            prefetched=prefetched,
         )
 
     @classmethod
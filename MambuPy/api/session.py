@@ -0,0 +1,140 @@
+"""Sessions of work with Mambu, holding an identity map of MambuPy entities.
+
+Inside a session, every entity retrieved from Mambu is kept, so any
+further lookup of it (by its id or by its encodedKey) returns the already
+built instance instead of requesting it again to Mambu::
+
+    with mambupy_session() as session:
+        loans = MambuLoan.get_all(get_entities=True)
+        branch = MambuBranch.get(loans[0].assignedBranchKey)  # no request
+    print(session.hits, session.misses)
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+"""
+
+import contextlib
+import contextvars
+import threading
+
+
+_session = contextvars.ContextVar("_session", default=None)
+"""Identity map of the current session, if any (see `mambupy_session`)"""
+
+
+class MambuIdentityMap:
+    """Already built MambuPy entities, by class, detailsLevel and key.
+
+    Each entity is kept by its id and by its encodedKey. An entity built
+    with get_entities serves any lookup of it, an entity built without it
+    serves only lookups without get_entities.
+
+    hits and misses count the lookups made on the map.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entities = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """number of distinct entities in the map"""
+        with self._lock:
+            return len(set(id(entry[0]) for entry in self._entities.values()))
+
+    @staticmethod
+    def __class_key(cls):
+        """Key of a class of entities in the map.
+
+        The classes imported from MambuPy.api and from mambupy.api are
+        different objects, but the same entity.
+        """
+        return (cls.__module__.split(".")[-1], cls.__name__)
+
+    def get(self, cls, detailsLevel, key, get_entities=False):
+        """Looks up an entity in the map.
+
+        Args:
+          cls (obj): class of the entity
+          detailsLevel (str): "BASIC" or "FULL"
+          key (str): id or encodedKey of the entity
+          get_entities (bool): must the entity have its other MambuPy
+                               entities instantiated?
+
+        Returns:
+          the instance of the entity, None if it is not in the map
+        """
+        with self._lock:
+            entry = self._entities.get((self.__class_key(cls), detailsLevel, key))
+            if entry is not None and (entry[1] or not get_entities):
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def add(self, instance, detailsLevel, get_entities=False):
+        """Keeps an entity in the map, by its id and by its encodedKey.
+
+        Args:
+          instance (obj): the entity
+          detailsLevel (str): "BASIC" or "FULL"
+          get_entities (bool): does the entity have its other MambuPy
+                               entities instantiated?
+        """
+        class_key = self.__class_key(instance.__class__)
+        attrs = instance._attrs
+        with self._lock:
+            for key in (attrs.get("id"), attrs.get("encodedKey")):
+                if key is None:
+                    continue
+                entry = self._entities.get((class_key, detailsLevel, key))
+                if entry is None or get_entities or not entry[1]:
+                    self._entities[(class_key, detailsLevel, key)] = (
+                        instance,
+                        get_entities,
+                    )
+
+    def clear(self):
+        """Forgets every entity in the map, and resets the counters."""
+        with self._lock:
+            self._entities = {}
+            self.hits = 0
+            self.misses = 0
+
+
+@contextlib.contextmanager
+def mambupy_session(identity_map=None):
+    """Context of work with Mambu, holding an identity map of entities.
+
+    Args:
+      identity_map (:py:obj:`MambuIdentityMap`): map to use, a new
+                                                 empty one by default
+
+    Yields:
+      the identity map of the session
+    """
+    if identity_map is None:
+        identity_map = MambuIdentityMap()
+    token = _session.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _session.reset(token)
+
+
+def _in_session(identity_map, func, *args, **kwargs):
+    """Calls func inside the session of some identity map.
+
+    Threads don't inherit the context of the thread which starts them, so
+    this carries the session of the caller to them.
+
+    Returns:
+      whatever func returns
+    """
+    token = _session.set(identity_map)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _session.reset(token)
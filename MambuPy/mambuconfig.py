@@ -25,6 +25,16 @@ RC files must have the following format:
     apipwd=API_password
     apipagination=API_pagination_limit
     activate_request_session_objects=API_persistent_session
+    apipoolconnections=API_pool_connections
+    apipoolmaxsize=API_pool_maxsize
+    apikeepalive=API_keep_alive
+    apipoolprewarm=API_pool_prewarm
+    apiratelimit=API_rate_limit
+    apicachesize=API_cache_size
+    apicachettl=API_cache_ttl
+    apicachefile=API_cache_file
+    apibackupcallbackport=API_backup_callback_port
+    apibackupcallbackhost=API_backup_callback_host
     [DB]
     dbname=Database_name
     dbuser=Database_user
@@ -32,6 +42,10 @@ RC files must have the following format:
     dbhost=Database_host
     dbport=Database_port
     dbeng=Database_engine
+    dbpoolclass=Database_pool_class
+    dbpoolsize=Database_pool_size
+    dbpoolpreping=Database_pool_pre_ping
+    dbpoolrecycle=Database_pool_recycle
     [MAMBUPY]
     loggingconf=Logging_conf_path
 
@@ -77,9 +91,48 @@ user on your Mambu instance
 The db* configs refer to Database configurations which hold a backup of
 your Mambu Database on some server.
 
+The dbpool* configs tune the pool of DB connections of the default engine
+(see :py:mod:`MambuPy.orm.schema_orm`): dbpoolclass is the name of a
+:py:mod:`sqlalchemy.pool` class (QueuePool by default, NullPool opens a
+new connection for every query), dbpoolsize the connections kept open
+(for QueuePool), dbpoolpreping whether connections are tested before
+using them, and dbpoolrecycle the seconds after which a connection is
+replaced (-1 never).
+
 The activate_request_session_objects config enables or disables HTTP persistent sessions
 for API requests. When enabled, it will reuse the same TCP connection for
-multiple requests, improving performance. Default is False.
+multiple requests, improving performance. Default is True.
+
+The apipool* and apikeepalive configs tune the pool of connections of the
+persistent session: apipoolconnections is the number of hosts whose pools
+are kept, apipoolmaxsize the maximum connections kept to each host (set it
+to at least the number of threads making requests concurrently),
+apikeepalive whether connections are kept open between requests, and
+apipoolprewarm how many connections to open to apiurl when the session is
+created.
+
+The apiratelimit config is the maximum number of requests per second made to
+Mambu by the process (shared by every thread). The actual rate adapts to the
+responses of Mambu, see :py:mod:`MambuPy.api.connector.ratelimit`. 0, the
+default, disables the limit: requests are only paused after a 429 response
+of Mambu (for its Retry-After, or an exponential backoff).
+
+The apicache* configs enable a cache of the responses of Mambu to reads,
+see :py:mod:`MambuPy.api.connector.cache`: apicachesize is the maximum
+number of responses kept (0, the default, disables the cache), apicachettl
+the seconds a response is kept for each URL prefix, as comma separated
+prefix:seconds pairs. Responses for prefixes not listed are never cached.
+apicachefile, if given, is a SQLite file where the cache is kept, shared by
+every process using it (by default it is kept in memory, for each process).
+
+The apibackupcallbackport config is the local port where
+:py:func:`MambuPy.mambuutil.backup_db` listens for the callback of Mambu when
+the backup is ready (0, the default, picks any free port, so backup_db then
+needs the public callback URL forwarding to it).
+apibackupcallbackhost is the interface where it listens, 127.0.0.1 by default
+(only reachable through a tunnel or reverse proxy to this host); 0.0.0.0
+listens on every interface. Only callbacks to a random path, given to Mambu
+on the callback URL, are accepted.
 """
 
 default_configs = {
@@ -88,7 +141,20 @@ default_configs = {
     "apiuser": "mambu_api_user",
     "apipwd": "mambu_api_password",
     "apipagination": "50",
-    "activate_request_session_objects": "False",
+    "activate_request_session_objects": "True",
+    "apipoolconnections": "10",
+    "apipoolmaxsize": "32",
+    "apikeepalive": "True",
+    "apipoolprewarm": "0",
+    "apiratelimit": "0",
+    "apicachesize": "0",
+    "apicachettl": (
+        "loanproducts:3600,branches:3600,centres:3600,userroles:3600,"
+        "customfieldsets:3600,customfields:3600"
+    ),
+    "apicachefile": "",
+    "apibackupcallbackport": "0",
+    "apibackupcallbackhost": "127.0.0.1",
     # Mambu DB configurations
     "dbname": "mambu_db",
     "dbuser": "mambu_db_user",
@@ -96,6 +162,10 @@ default_configs = {
     "dbhost": "localhost",
     "dbport": "3306",
     "dbeng": "mysql",
+    "dbpoolclass": "QueuePool",
+    "dbpoolsize": "5",
+    "dbpoolpreping": "True",
+    "dbpoolrecycle": "3600",
     # MambuPy configurations
     "loggingconf": "",  # empty string means default logging, path to a yaml for logging configuration
 }
@@ -120,12 +190,26 @@ argparser.add_argument("--mambupy_apiuser")
 argparser.add_argument("--mambupy_apipwd")
 argparser.add_argument("--mambupy_apipagination")
 argparser.add_argument("--mambupy_activate_request_session_objects")
+argparser.add_argument("--mambupy_apipoolconnections")
+argparser.add_argument("--mambupy_apipoolmaxsize")
+argparser.add_argument("--mambupy_apikeepalive")
+argparser.add_argument("--mambupy_apipoolprewarm")
+argparser.add_argument("--mambupy_apiratelimit")
+argparser.add_argument("--mambupy_apicachesize")
+argparser.add_argument("--mambupy_apicachettl")
+argparser.add_argument("--mambupy_apicachefile")
+argparser.add_argument("--mambupy_apibackupcallbackport")
+argparser.add_argument("--mambupy_apibackupcallbackhost")
 argparser.add_argument("--mambupy_dbname")
 argparser.add_argument("--mambupy_dbuser")
 argparser.add_argument("--mambupy_dbpwd")
 argparser.add_argument("--mambupy_dbhost")
 argparser.add_argument("--mambupy_dbport")
 argparser.add_argument("--mambupy_dbeng")
+argparser.add_argument("--mambupy_dbpoolclass")
+argparser.add_argument("--mambupy_dbpoolsize")
+argparser.add_argument("--mambupy_dbpoolpreping")
+argparser.add_argument("--mambupy_dbpoolrecycle")
 argparser.add_argument("--mambupy_loggingconf")
 args, unknown = argparser.parse_known_args()
 
@@ -183,6 +267,27 @@ apipagination = get_conf(config, "API", "apipagination")
 """Pagination default limit for requests to Mambu API"""
 activate_request_session_objects = get_conf(config, "API", "activate_request_session_objects")
 """Whether to use persistent HTTP sessions for API requests"""
+apipoolconnections = get_conf(config, "API", "apipoolconnections")
+"""Number of hosts whose connections are pooled by the persistent session"""
+apipoolmaxsize = get_conf(config, "API", "apipoolmaxsize")
+"""Maximum connections kept to each host by the persistent session"""
+apikeepalive = get_conf(config, "API", "apikeepalive")
+"""Whether to keep connections open between requests"""
+apipoolprewarm = get_conf(config, "API", "apipoolprewarm")
+"""Number of connections to open to apiurl when the persistent session is
+created"""
+apiratelimit = get_conf(config, "API", "apiratelimit")
+"""Maximum requests per second to Mambu API"""
+apicachesize = get_conf(config, "API", "apicachesize")
+"""Maximum number of responses of Mambu API kept in cache"""
+apicachettl = get_conf(config, "API", "apicachettl")
+"""Seconds to keep the responses of Mambu API in cache, by URL prefix"""
+apicachefile = get_conf(config, "API", "apicachefile")
+"""SQLite file to keep the cache of responses of Mambu API on"""
+apibackupcallbackport = get_conf(config, "API", "apibackupcallbackport")
+"""Local port to listen for the callback of Mambu when a backup is ready"""
+apibackupcallbackhost = get_conf(config, "API", "apibackupcallbackhost")
+"""Local interface to listen for the callback of Mambu when a backup is ready"""
 dbname = get_conf(config, "DB", "dbname")
 """Name of the DB with a backup of Mambu's DB"""
 dbuser = get_conf(config, "DB", "dbuser")
@@ -195,5 +300,13 @@ dbport = get_conf(config, "DB", "dbport")
 """Port to connect to the host of the Mambu's DB backup"""
 dbeng = get_conf(config, "DB", "dbeng")
 """DB engine for the Mambu's DB backup"""
+dbpoolclass = get_conf(config, "DB", "dbpoolclass")
+"""Pool class (on sqlalchemy.pool) for the connections to the Mambu's DB backup"""
+dbpoolsize = get_conf(config, "DB", "dbpoolsize")
+"""Connections kept open to the Mambu's DB backup"""
+dbpoolpreping = get_conf(config, "DB", "dbpoolpreping")
+"""Test the connections to the Mambu's DB backup before using them"""
+dbpoolrecycle = get_conf(config, "DB", "dbpoolrecycle")
+"""Seconds after which a connection to the Mambu's DB backup is replaced"""
 loggingconf = get_conf(config, "MAMBUPY", "loggingconf")
 """Directory where to store logs"""
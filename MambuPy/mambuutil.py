@@ -21,6 +21,7 @@ Exceptions, some API return codes, utility functions, a lot of urlfuncs
 
 .. todo:: status API V2: testing of EVERYTHING is required """
 
+from concurrent.futures import ProcessPoolExecutor
 import logging
 import logging.config as logging_config
 import os
@@ -28,7 +29,24 @@ from codecs import open as copen
 
 import yaml
 
-from .mambuconfig import apipagination, apipwd, apiurl, apiuser, loggingconf, activate_request_session_objects
+from .mambuconfig import (
+    apipagination,
+    apipwd,
+    apiurl,
+    apiuser,
+    loggingconf,
+    activate_request_session_objects,
+    apipoolconnections,
+    apipoolmaxsize,
+    apikeepalive,
+    apipoolprewarm,
+    apiratelimit,
+    apicachesize,
+    apicachettl,
+    apicachefile,
+    apibackupcallbackport,
+    apibackupcallbackhost,
+)
 from .mambugeturl import getmambuurl
 
 import json
@@ -177,11 +195,24 @@ def date_format(field, formato=None, as_utc=False):
     """
     from datetime import datetime
 
+    field_with_tz = datetime.fromisoformat(field)
+
     if not formato:
+        if as_utc and field_with_tz.tzinfo is not None:
+            field_with_tz = field_with_tz.astimezone(timezone.utc)
+        if field_with_tz.year >= 1000:
+            # same result as the strftime/strptime round trip below with the
+            # default format, without formatting and parsing it back
+            return datetime(
+                field_with_tz.year,
+                field_with_tz.month,
+                field_with_tz.day,
+                field_with_tz.hour,
+                field_with_tz.minute,
+                field_with_tz.second,
+            )
         formato = "%Y-%m-%dT%H:%M:%S"
 
-    field_with_tz = datetime.fromisoformat(field)
-
     if as_utc and field_with_tz.tzinfo is not None:
         # Convertir a UTC mientras aún tiene tzinfo
         field_as_dt = field_with_tz.astimezone(timezone.utc)
@@ -280,9 +311,134 @@ def encoded_dict(in_dict):
     return out_dict
 
 
+import hashlib
+import hmac
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import secrets
+import socket
+import threading
 from time import sleep
 
 import requests
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import RequestException
+from requests.exceptions import Timeout
+
+
+class _BackupCallbackHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        if not hmac.compare_digest(path, self.server.receiver.path):
+            self.send_response(404)
+            self.end_headers()
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            payload = json.loads(body.decode("utf-8")) if body else None
+        except ValueError:
+            payload = body.decode("utf-8", "replace")
+        self.send_response(200)
+        self.end_headers()
+        self.server.receiver.signal(payload)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        self.server.receiver.logger.debug(
+            "callback from %s: %s" % (self.address_string(), format % args)
+        )
+
+
+class BackupCallbackReceiver:
+    """Local HTTP listener for the callback of Mambu when a backup is ready.
+
+    A request (GET or POST) to its path, random for each receiver, signals
+    that the backup is ready; requests to any other path get a 404. The
+    body of the request, if any, is kept on payload.
+
+    Usage::
+
+        with BackupCallbackReceiver(port=8080) as receiver:
+            # ask Mambu for a backup with receiver.url as the callback
+            receiver.wait(timeout=3600)
+    """
+
+    def __init__(self, port=apibackupcallbackport, host=apibackupcallbackhost):
+        """Args:
+        port (int): port to listen on, 0 for any free port
+        host (str): interface to listen on, 0.0.0.0 (or "") for every one
+        """
+        self.logger = setup_logging("mambupy.backup_db")
+        self.ready = threading.Event()
+        self.payload = None
+        self.host = host
+        self.path = "/" + secrets.token_urlsafe(24)
+        self._server = ThreadingHTTPServer((host, int(port)), _BackupCallbackHandler)
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        self._thread = None
+
+    @property
+    def port(self):
+        """Port the receiver listens on."""
+        return self._server.server_address[1]
+
+    @property
+    def url(self):
+        """URL of the receiver, to use as the callback for Mambu."""
+        host = self.host
+        if host in ("", "0.0.0.0"):
+            host = socket.getfqdn()
+        return "http://%s:%d%s" % (host, self.port, self.path)
+
+    def start(self):
+        """Listens for the callback, on a background thread.
+
+        Returns:
+          the BackupCallbackReceiver itself
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="backup-callback", daemon=True
+        )
+        self._thread.start()
+        self.logger.info("listening for the backup callback on port %d" % self.port)
+        return self
+
+    def stop(self):
+        """Stops listening, closing the port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def signal(self, payload=None):
+        """Marks the backup as ready.
+
+        Args:
+          payload (obj): what Mambu sent on the callback
+        """
+        self.payload = payload
+        self.ready.set()
+
+    def wait(self, timeout=None):
+        """Waits until the backup is ready.
+
+        Args:
+          timeout (float): maximum seconds to wait, forever if None
+
+        Returns:
+          bool, True if the backup is ready
+        """
+        return self.ready.wait(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
 
 
 def _backup_db_previous_prep(callback, logger, kwargs):
@@ -355,33 +511,90 @@ def _backup_db_request(justbackup, data, user, pwd, logger=None):
 
 
 def _backup_db_timeout_mechanism(
-    justbackup, retries, bool_func, force_download_latest, logger=None
+    justbackup,
+    retries,
+    bool_func,
+    force_download_latest,
+    logger=None,
+    receiver=None,
+    poll_interval=1,
+    max_poll_interval=60,
+    probe=None,
 ):
+    def ready():
+        if receiver is not None and receiver.ready.is_set():
+            return True
+        if probe is not None and probe():
+            return True
+        return bool_func is not None and bool(bool_func())
+
     value_to_latest = True
-    while not justbackup and retries and not bool_func():
-        logger.debug("waiting...")
-        sleep(10)
+    while not justbackup and retries and not ready():
+        logger.debug("waiting %s seconds..." % poll_interval)
+        if receiver is not None:
+            receiver.wait(poll_interval)
+        else:
+            sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, max_poll_interval)
         retries -= 1
         if retries < 0:
             retries = -1
-    if not justbackup and not retries:
+    if not justbackup and not retries and not ready():
         mess = "Tired of waiting, giving up..."
         logger.warning(mess)
         if not force_download_latest:
             raise MambuError(mess)
         else:
             value_to_latest = False
-    sleep(30)
 
     return value_to_latest
 
 
-def _backup_db_request_download_backup(user, pwd, headers, logger=None):
+def _backup_db_probe_latest(user, pwd, headers, logger=None):
+    """Identifies the LATEST backup on Mambu, without downloading it.
+
+    Only its first byte is requested (HTTP Range).
+
+    Returns:
+      tuple with the Last-Modified, ETag and size of the backup, None if
+      there's no backup (or Mambu doesn't tell any of them)
+    """
+    geturl = iri_to_uri(getmambuurl() + "database/backup/LATEST")
+    try:
+        resp = requests.get(
+            geturl,
+            auth=(user, pwd),
+            headers=dict(headers, Range="bytes=0-0"),
+            stream=True,
+            timeout=60,
+        )
+    except RequestException as ex:
+        logger.warning("can't probe the latest backup: %s" % ex)
+        return None
+    try:
+        if resp.status_code not in (200, 206):
+            return None
+        latest = (
+            resp.headers.get("Last-Modified"),
+            resp.headers.get("ETag"),
+            _backup_db_total_size(resp, 0),
+        )
+    finally:
+        resp.close()
+    if latest == (None, None, None):
+        return None
+    return latest
+
+
+def _backup_db_request_download_backup(user, pwd, headers, logger=None, offset=0):
     geturl = iri_to_uri(getmambuurl() + "database/backup/LATEST")
     logger.info("open url: " + geturl)
-    resp = requests.get(geturl, auth=(user, pwd), headers=headers)
+    if offset:
+        headers = dict(headers, Range="bytes=%d-" % offset)
+        logger.info("resuming from byte %d" % offset)
+    resp = requests.get(geturl, auth=(user, pwd), headers=headers, stream=True)
 
-    if resp.status_code != 200:
+    if resp.status_code != 200 and not (offset and resp.status_code == 206):
         mess = "Error getting database backup: %s" % resp.content
         logger.error(mess)
         raise MambuCommError(mess)
@@ -389,10 +602,83 @@ def _backup_db_request_download_backup(user, pwd, headers, logger=None):
     return resp
 
 
-def _backup_db_post_processing(resp, output_fname, logger=None):
+def _backup_db_total_size(resp, offset):
+    """Size of the whole backup, from the headers of a response.
+
+    Args:
+      resp (requests.Response): response downloading the backup
+      offset (int): byte where the response begins
+
+    Returns:
+      int bytes, None if Mambu didn't tell
+    """
+    content_range = resp.headers.get("Content-Range", "")
+    if resp.status_code == 206 and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length", "")
+    return offset + int(length) if length.isdigit() else None
+
+
+def _backup_db_download(
+    user, pwd, headers, part_fname, algorithm, resumes, chunk_size, progress,
+    logger=None,
+):
+    """Streams the backup to a file, resuming it when the connection drops.
+
+    Returns:
+      tuple with the bytes downloaded and the hexdigest of the backup
+    """
+    resp = _backup_db_request_download_backup(user, pwd, headers, logger)
+    hasher = hashlib.new(algorithm)
+    done = 0
+    with open(part_fname, "wb") as fw:
+        while True:
+            if done and resp.status_code == 200:
+                logger.warning("Range not honored, downloading from the start")
+                fw.seek(0)
+                fw.truncate()
+                hasher = hashlib.new(algorithm)
+                done = 0
+            total = _backup_db_total_size(resp, done)
+            try:
+                for chunk in resp.iter_content(chunk_size=chunk_size):
+                    fw.write(chunk)
+                    hasher.update(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, total)
+                if total is None or done >= total:
+                    return done, hasher.hexdigest()
+                mess = "connection closed at byte %d of %d" % (done, total)
+            except (RequestsConnectionError, ChunkedEncodingError, Timeout) as ex:
+                mess = repr(ex)
+            finally:
+                resp.close()
+
+            if not resumes:
+                mess = "Error downloading database backup: %s" % mess
+                logger.error(mess)
+                raise MambuCommError(mess)
+            resumes -= 1
+            logger.warning("download interrupted (%s), resuming..." % mess)
+            sleep(10)
+            resp = _backup_db_request_download_backup(
+                user, pwd, headers, logger, offset=done
+            )
+
+
+def _backup_db_post_processing(part_fname, output_fname, digest, checksum, logger=None):
     logger.info("saving...")
-    with open(output_fname, "wb") as fw:
-        fw.write(resp.content)
+    if checksum and digest != checksum.lower():
+        os.remove(part_fname)
+        mess = "Checksum mismatch on database backup: expected %s, got %s" % (
+            checksum,
+            digest,
+        )
+        logger.error(mess)
+        raise MambuError(mess)
+    os.replace(part_fname, output_fname)
 
 
 def backup_db(callback, bool_func, output_fname, *args, **kwargs):
@@ -406,7 +692,8 @@ def backup_db(callback, bool_func, output_fname, *args, **kwargs):
 
     * callback is a string to a callback URL Mambu will internally call
       when the backup is ready to download. You should have a webservice
-      there to warn you when the backup is ready.
+      there to warn you when the backup is ready. If None (and bool_func is
+      None too) the URL of the local BackupCallbackReceiver is used.
 
     * bool_func is a function you use against your own code to test if the
       said backup is ready. This function backup_db manages both the logic
@@ -419,6 +706,18 @@ def backup_db(callback, bool_func, output_fname, *args, **kwargs):
       when to say True, telling backup_db to begin the download of the
       backup.
 
+      If bool_func is None, backup_db starts its own webservice instead: a
+      BackupCallbackReceiver listening on callback_host and callback_port
+      (the apibackupcallbackhost and apibackupcallbackport configs by
+      default), and downloads the backup as soon as Mambu calls it.
+      Mambu is a remote service, so callback must then be the public base
+      URL (a reverse proxy or tunnel) forwarding to that port, which gets
+      the random path of the receiver appended. callback may only be None
+      with a fixed callback_port, to use the URL of the receiver itself.
+      Meanwhile, the LATEST backup on Mambu is probed (its first byte only)
+      on each retry, so the backup is downloaded as soon as it changes even
+      if the callback never arrives.
+
     * output_fname the name of the file that will hold the downloaded
       backup. PLEASE MIND that Mambu sends a ZIP file here.
 
@@ -426,6 +725,12 @@ def backup_db(callback, bool_func, output_fname, *args, **kwargs):
       the getmambuurl internally called here.
 
     * retries number of retries for bool_func or -1 for keep waiting.
+      Retries wait poll_interval seconds (1 by default), doubling each
+      time up to max_poll_interval (60 by default): retries=N waits
+      1+2+4+...+60+60... seconds in total, no longer N times 10 seconds
+      (pass poll_interval=10, max_poll_interval=10 for the old waits).
+      With a BackupCallbackReceiver the wait ends the moment Mambu calls
+      it.
 
     * just_backup bool if True, skip asking for backup, just download LATEST
 
@@ -433,36 +738,105 @@ def backup_db(callback, bool_func, output_fname, *args, **kwargs):
       callback is called. False to throw error if callback isn't received
       after retries.
 
+    * resumes number of times a dropped download is resumed (with an HTTP
+      Range request) before giving up. 3 by default.
+
+    * chunk_size bytes read at a time from Mambu. The backup is streamed
+      to output_fname + ".part", and renamed to output_fname only when
+      complete, so it never sits whole in memory.
+
+    * checksum hexdigest the backup must have, checked before the rename.
+      checksum_algorithm is the hashlib algorithm of the digest, sha256 by
+      default.
+
+    * progress function called with the bytes downloaded so far and the
+      total bytes (None if Mambu doesn't tell) after each chunk.
+
     * returns a dictionary with info about the download
         -latest     boolean flag, if the db downloaded was the latest or not
+        -size       bytes downloaded
+        -checksum   hexdigest of the backup (with checksum_algorithm)
 
     .. todo:: status API V2: compatible
     """
     logger = setup_logging("mambupy.backup_db")
-    # previous preparation
-    (
-        retries,
-        justbackup,
-        force_download_latest,
-        headers,
-        user,
-        pwd,
-        data,
-    ) = _backup_db_previous_prep(callback, logger, kwargs)
-
-    # POST to request Mambu to prepare backup of its own DB
-    _backup_db_request(justbackup, data, user, pwd, logger)
-
-    # wait & timeout mechanism
-    data["latest"] = _backup_db_timeout_mechanism(
-        justbackup, retries, bool_func, force_download_latest, logger
-    )
+    resumes = kwargs.pop("resumes", 3)
+    chunk_size = kwargs.pop("chunk_size", 1024 * 1024)
+    checksum = kwargs.pop("checksum", None)
+    algorithm = kwargs.pop("checksum_algorithm", "sha256")
+    progress = kwargs.pop("progress", None)
+    callback_port = kwargs.pop("callback_port", apibackupcallbackport)
+    callback_host = kwargs.pop("callback_host", apibackupcallbackhost)
+    poll_interval = kwargs.pop("poll_interval", 1)
+    max_poll_interval = kwargs.pop("max_poll_interval", 60)
+
+    receiver = None
+    if bool_func is None and not kwargs.get("justbackup"):
+        if callback is None and not int(callback_port):
+            raise MambuPyError(
+                "backup_db needs a callback URL Mambu can reach, or a fixed "
+                "callback_port, to listen for the callback (or a bool_func)"
+            )
+        receiver = BackupCallbackReceiver(port=callback_port, host=callback_host).start()
+        if callback is None:
+            callback = receiver.url
+        else:
+            callback = callback.rstrip("/") + receiver.path
+    try:
+        # previous preparation
+        (
+            retries,
+            justbackup,
+            force_download_latest,
+            headers,
+            user,
+            pwd,
+            data,
+        ) = _backup_db_previous_prep(callback, logger, kwargs)
+
+        probe = None
+        if receiver is not None:
+            before = _backup_db_probe_latest(user, pwd, headers, logger)
+
+            def probe():
+                latest = _backup_db_probe_latest(user, pwd, headers, logger)
+                return latest is not None and latest != before
+
+        # POST to request Mambu to prepare backup of its own DB
+        _backup_db_request(justbackup, data, user, pwd, logger)
+
+        # wait & timeout mechanism
+        data["latest"] = _backup_db_timeout_mechanism(
+            justbackup,
+            retries,
+            bool_func,
+            force_download_latest,
+            logger,
+            receiver,
+            poll_interval,
+            max_poll_interval,
+            probe,
+        )
+    finally:
+        if receiver is not None:
+            receiver.stop()
 
     # GET request to download LATEST Mambu's DB backup
-    resp = _backup_db_request_download_backup(user, pwd, headers, logger)
+    part_fname = output_fname + ".part"
+    try:
+        data["size"], data["checksum"] = _backup_db_download(
+            user, pwd, headers, part_fname, algorithm, resumes, chunk_size,
+            progress, logger,
+        )
+    except Exception:
+        if os.path.exists(part_fname):
+            os.remove(part_fname)
+        raise
 
     # post-processing
-    _backup_db_post_processing(resp, output_fname, logger)
+    _backup_db_post_processing(
+        part_fname, output_fname, data["checksum"], checksum, logger
+    )
 
     # no refactor
     logger.info("DONE!")
@@ -470,6 +844,39 @@ def backup_db(callback, bool_func, output_fname, *args, **kwargs):
     return data
 
 
+def process_map(func, iterable, processes=None, chunksize=1, mp_context=None):
+    """Maps a function over some items, across several processes.
+
+    Useful to spread CPU bound work with MambuPy entities (building,
+    converting, processing them) across cores. MambuPy's HTTP sessions and
+    DB connections are fork-safe: each worker process opens its own ones
+    the first time it needs them.
+
+    func must be picklable (a function defined at module level), and so
+    must be the items and what func returns. Return plain data (ids,
+    dicts, numbers) instead of MambuPy entities::
+
+        def balance(loanid):
+            return MambuLoan.get(loanid).balances["principalBalance"]
+
+        balances = process_map(balance, loanids, processes=8)
+
+    Args:
+      func (function): function to call with each item
+      iterable (iterable): the items
+      processes (int): number of worker processes, by default the number of
+                       CPUs
+      chunksize (int): items sent to a worker process at a time
+      mp_context (obj): multiprocessing context to start the workers, by
+                        default the one of the platform
+
+    Returns:
+      list with what func returned for each item, in the same order
+    """
+    with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context) as executor:
+        return list(executor.map(func, iterable, chunksize=chunksize))
+
+
 def setup_logging(
         loggername,
         default_level=logging.INFO,
@@ -17,6 +17,8 @@ A `SQLAlchemy <http://www.sqlalchemy.org/>`_ ORM using a `DB backup retrieved fr
     MambuPy.orm.schema_activities
     MambuPy.orm.schema_customfields
     MambuPy.orm.schema_dummies
+    MambuPy.orm.backuploader
+    MambuPy.orm.queries
 
 
 Lives under the :py:mod:`MambuPy.orm` package
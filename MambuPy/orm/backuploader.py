@@ -0,0 +1,330 @@
+"""Loader of a Mambu DB backup into the ORM schema tables.
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+
+Reads the ZIP downloaded by :py:func:`MambuPy.mambuutil.backup_db` without
+extracting it: the SQL dump inside is parsed as it is decompressed, line
+by line, and its rows are bulk inserted (executemany, in batches) on the
+tables mapped on the schema_*.py modules, on any SQLAlchemy engine.
+
+Only the columns mapped on the schemas are loaded. The dump gives the
+order of the columns of each table on its CREATE TABLE statements.
+
+Usage::
+
+    from sqlalchemy import create_engine
+    from MambuPy.orm.backuploader import load_backup
+
+    engine = create_engine("sqlite:///mambu.db")
+    load_backup("/tmp/backup.zip", engine, tables=["LoanAccount", "Client"],
+                create=True)
+
+SQLite has no schemas, so by default the tables are loaded without the
+dbname schema there. Query them with the same translation::
+
+    engine = engine.execution_options(schema_translate_map={dbname: None})
+"""
+
+from datetime import datetime
+from decimal import Decimal
+import io
+import re
+import zipfile
+
+from .. import mambuutil
+from . import schema_mambu  # noqa: F401 maps every schema table
+from . import schema_orm as orm
+
+logger = mambuutil.setup_logging(__name__)
+
+_CREATE_TABLE = re.compile(
+    r"CREATE TABLE (?:IF NOT EXISTS )?(?:`[^`]+`\.)?`(?P<table>[^`]+)`"
+)
+_COLUMN = re.compile(r"\s*`(?P<column>[^`]+)`\s")
+_INSERT = re.compile(
+    r"INSERT (?:IGNORE )?INTO\s+(?:`[^`]+`\.)?`(?P<table>[^`]+)`\s*"
+    r"(?:\((?P<columns>[^)]*)\)\s*)?VALUES\s*"
+)
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<open>\() | (?P<close>\)) | (?P<comma>,) | (?P<end>;) |
+        (?:_binary\s*)?'(?P<string>(?:[^'\\]|\\.|'')*)' |
+        (?P<null>NULL) |
+        b'(?P<bits>[01]*)' |
+        0x(?P<hex>[0-9A-Fa-f]+) |
+        (?P<number>[-+]?[0-9.]+(?:[eE][-+]?[0-9]+)?)
+    )""",
+    re.X | re.S,
+)
+_ESCAPE = re.compile(r"\\(.)|''", re.S)
+_ESCAPES = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a"}
+
+
+def mapped_tables(tables=None):
+    """Tables mapped on the ORM schemas.
+
+    Args:
+      tables (list): mapped classes (or their names, like LoanAccount) and
+                     table names (like loanaccount). Every table mapped by
+                     default
+
+    Returns:
+      dict of sqlalchemy.Table, by table name
+
+    Raises:
+      `MambuPyError`: when a table is not mapped on the schemas
+    """
+    by_name = {table.name: table for table in orm.Base.metadata.tables.values()}
+    if tables is None:
+        return by_name
+
+    classes = {}
+    pending = list(orm.Base.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        classes[cls.__name__] = cls.__table__
+
+    selected = {}
+    for table in tables:
+        if hasattr(table, "__table__"):
+            table = table.__table__
+        elif table in classes:
+            table = classes[table]
+        elif table in by_name:
+            table = by_name[table]
+        else:
+            raise mambuutil.MambuPyError("{} is not mapped on the ORM".format(table))
+        selected[table.name] = table
+    return selected
+
+
+def load_backup(
+    backup,
+    engine=None,
+    tables=None,
+    batch_size=10000,
+    create=False,
+    truncate=True,
+    member=None,
+    schema_translate_map=None,
+):
+    """Loads a Mambu DB backup into the ORM schema tables.
+
+    Everything is loaded on a single transaction: on an error, the tables
+    are left as they were.
+
+    Args:
+      backup (str or file): ZIP file downloaded by backup_db
+      engine (sqlalchemy.engine.Engine): where to load the backup, the
+                                         default engine of schema_orm by default
+      tables (list): tables to load (see `mapped_tables`), every table
+                     mapped by default
+      batch_size (int): rows inserted on each executemany
+      create (bool): create the tables that don't exist yet
+      truncate (bool): delete the rows of the tables before loading them
+      member (str): name of the SQL dump inside the ZIP, the first .sql
+                    file by default
+      schema_translate_map (dict): schema translation for the tables. On
+                                   SQLite, the dbname schema is dropped by
+                                   default
+
+    Returns:
+      dict with the number of rows loaded, by table name
+
+    Raises:
+      `MambuPyError`: when the ZIP has no SQL dump, or the columns of a
+                      table loaded are unknown
+    """
+    if engine is None:
+        engine = orm.get_engine()
+    if schema_translate_map is None and engine.dialect.name == "sqlite":
+        schema_translate_map = {orm.dbname: None}
+    selected = mapped_tables(tables)
+
+    with zipfile.ZipFile(backup) as zipped:
+        if member is None:
+            names = [n for n in zipped.namelist() if n.lower().endswith(".sql")]
+            if not names:
+                raise mambuutil.MambuPyError("no SQL dump on the backup")
+            member = names[0]
+        logger.info("loading %s", member)
+        with zipped.open(member) as dump, engine.begin() as conn:
+            if schema_translate_map:
+                conn = conn.execution_options(schema_translate_map=schema_translate_map)
+            mysql = engine.dialect.name == "mysql"
+            if mysql:
+                # the setting is kept by the (pooled) connection: enable it
+                # back before it's returned to the pool
+                conn.execute("SET FOREIGN_KEY_CHECKS=0")
+            try:
+                if create:
+                    orm.Base.metadata.create_all(conn, tables=list(selected.values()))
+                if truncate:
+                    for table in selected.values():
+                        conn.execute(table.delete())
+                lines = io.TextIOWrapper(dump, encoding="utf-8", errors="replace")
+                return _load(conn, lines, selected, batch_size)
+            finally:
+                if mysql:
+                    conn.execute("SET FOREIGN_KEY_CHECKS=1")
+
+
+def _load(conn, lines, selected, batch_size):
+    """Inserts the rows of the SQL dump on the tables selected.
+
+    Returns:
+      dict with the number of rows loaded, by table name
+    """
+    columns = {}
+    loaded = {}
+    creating = None
+    statement = None
+    for line in lines:
+        if creating is not None:
+            if line.startswith(")"):
+                creating = None
+            else:
+                column = _COLUMN.match(line)
+                if column:
+                    columns[creating].append(column.group("column"))
+            continue
+
+        if statement is not None:
+            statement.append(line)
+            if line.rstrip().endswith(";"):
+                _insert(conn, "".join(statement), selected, columns, loaded, batch_size)
+                statement = None
+            continue
+
+        created = _CREATE_TABLE.match(line)
+        if created:
+            if created.group("table") in selected:
+                creating = created.group("table")
+                columns[creating] = []
+            continue
+
+        inserted = _INSERT.match(line)
+        if inserted and inserted.group("table") in selected:
+            if line.rstrip().endswith(";"):
+                _insert(conn, line, selected, columns, loaded, batch_size)
+            else:
+                statement = [line]
+
+    for table in selected:
+        loaded.setdefault(table, 0)
+    logger.info("rows loaded: %s", loaded)
+    return loaded
+
+
+def _insert(conn, statement, selected, columns, loaded, batch_size):
+    """Bulk inserts the rows of an INSERT statement of the dump."""
+    inserted = _INSERT.match(statement)
+    table = selected[inserted.group("table")]
+    if inserted.group("columns"):
+        names = [name.strip(" `") for name in inserted.group("columns").split(",")]
+    elif table.name in columns:
+        names = columns[table.name]
+    else:
+        raise mambuutil.MambuPyError(
+            "unknown columns for {} on the backup".format(table.name)
+        )
+
+    mapped = [
+        (pos, table.columns[name].key, _converter(table.columns[name]))
+        for pos, name in enumerate(names)
+        if name in table.columns
+    ]
+    batch = []
+    for row in _rows(statement, inserted.end()):
+        batch.append({key: convert(row[pos]) for pos, key, convert in mapped})
+        if len(batch) >= batch_size:
+            conn.execute(table.insert(), batch)
+            loaded[table.name] = loaded.get(table.name, 0) + len(batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+        loaded[table.name] = loaded.get(table.name, 0) + len(batch)
+
+
+def _rows(statement, pos=0):
+    """Parses the VALUES of an INSERT statement of a MySQL dump.
+
+    Args:
+      statement (str): the INSERT statement
+      pos (int): where its VALUES begin
+
+    Yields:
+      list of values for each row: str (numbers too), bytes, int (bits) or
+      None for NULL
+    """
+    row = None
+    while True:
+        token = _TOKEN.match(statement, pos)
+        if token is None:
+            if statement[pos:].strip():
+                raise mambuutil.MambuPyError(
+                    "can't parse the backup near: {}".format(statement[pos:pos + 50])
+                )
+            return
+        pos = token.end()
+        kind = token.lastgroup
+        if kind == "open":
+            row = []
+        elif kind == "close":
+            yield row
+            row = None
+        elif kind == "end":
+            return
+        elif kind == "string":
+            row.append(_ESCAPE.sub(_unescape, token.group("string")))
+        elif kind == "null":
+            row.append(None)
+        elif kind == "bits":
+            row.append(int(token.group("bits") or "0", 2))
+        elif kind == "hex":
+            row.append(bytes.fromhex(token.group("hex")))
+        elif kind == "number":
+            row.append(token.group("number"))
+
+
+def _unescape(match):
+    if match.group(1) is None:
+        return "'"
+    return _ESCAPES.get(match.group(1), match.group(1))
+
+
+def _converter(column):
+    """Function converting values of the dump to the type of a column."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:  # pragma: no cover
+        return lambda value: value
+
+    if python_type is datetime:
+        return _to_datetime
+    if python_type in (int, Decimal, float):
+        def convert(value):
+            if value is None or isinstance(value, python_type):
+                return value
+            if isinstance(value, bytes):
+                return python_type(int.from_bytes(value, "big"))
+            return python_type(value)
+        return convert
+    if python_type is str:
+        return _to_str
+    return lambda value: value  # pragma: no cover
+
+
+def _to_str(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return value
+
+
+def _to_datetime(value):
+    if not value or value.startswith("0000-00-00"):
+        return None
+    return datetime.fromisoformat(value)
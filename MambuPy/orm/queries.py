@@ -0,0 +1,97 @@
+"""Queries loading whole graphs of the ORM schemas at once.
+
+.. autosummary::
+   :nosignatures:
+   :toctree: _autosummary
+
+Relationships on the schemas are loaded lazily: walking the loans of a
+branch, with their products, holders and custom fields, runs a SELECT for
+each loan and each relationship visited (the N+1 problem).
+
+The loader options here load the common graphs eagerly instead, with a
+few SELECTs no matter how many rows: many-to-one relationships on the
+same SELECT (joinedload), collections on one more SELECT each
+(selectinload, an IN of the keys already loaded).
+
+Usage::
+
+    from MambuPy.orm.queries import LOAN_GRAPH, query_loans
+
+    for loan in query_loans().filter(LoanAccount.assignedBranchKey == key):
+        print(loan.product.productName, loan.holder_client, ...)
+
+    # or on any query
+    session.query(LoanAccount).options(*LOAN_GRAPH)
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from . import schema_orm as orm
+from .schema_mambu import (
+    Activity,
+    Client,
+    CustomFieldValue,
+    LoanAccount,
+)
+
+LOAN_GRAPH = (
+    joinedload(LoanAccount.product),
+    joinedload(LoanAccount.disbursementDetails),
+    joinedload(LoanAccount.holder_client),
+    joinedload(LoanAccount.holder_group),
+    selectinload(LoanAccount.customInformation).joinedload(
+        CustomFieldValue.customField
+    ),
+)
+"""Loans with their product, disbursement details, holder (client or
+group) and custom field values (with their custom fields)"""
+
+CLIENT_GRAPH = (
+    selectinload(Client.addresses),
+    selectinload(Client.identificationDocuments),
+)
+"""Clients with their addresses and identification documents"""
+
+ACTIVITY_GRAPH = (
+    selectinload(Activity.fieldChanges),
+)
+"""Activities with their field changes"""
+
+
+def query_loans(session=None):
+    """Query of loans, loading LOAN_GRAPH.
+
+    Args:
+      session (sqlalchemy.orm.Session): session to query on, the default
+                                        session by default
+
+    Returns:
+      sqlalchemy.orm.Query
+    """
+    return (session or orm.session).query(LoanAccount).options(*LOAN_GRAPH)
+
+
+def query_clients(session=None):
+    """Query of clients, loading CLIENT_GRAPH.
+
+    Args:
+      session (sqlalchemy.orm.Session): session to query on, the default
+                                        session by default
+
+    Returns:
+      sqlalchemy.orm.Query
+    """
+    return (session or orm.session).query(Client).options(*CLIENT_GRAPH)
+
+
+def query_activities(session=None):
+    """Query of activities, loading ACTIVITY_GRAPH.
+
+    Args:
+      session (sqlalchemy.orm.Session): session to query on, the default
+                                        session by default
+
+    Returns:
+      sqlalchemy.orm.Query
+    """
+    return (session or orm.session).query(Activity).options(*ACTIVITY_GRAPH)
@@ -9,7 +9,10 @@ Session maker and a connected engine) which is used on every ORM
 module on MambuPy.
 
 The default engine is connected to a database according to what you
-configured on mambuconfig module.
+configured on mambuconfig module, including the pool of its connections
+(see the dbpool* configs). It's created the first time it's needed (by
+get_engine, or by a query on the default session), so importing the
+schema modules doesn't touch the database driver.
 
 This module also holds the Base declarative_base used for every ORM on
 MambuPy.
@@ -22,14 +25,34 @@ every schema_*.py you need.
 
 This last requirement also applies for the Base, or for the engine and
 the sessionmaker for that matter.
+
+The default engine and session are fork-safe: a forked child process
+leaves alone the DB connections inherited from its parent, and opens
+its own ones when it needs them.
 """
+import os
+import threading
+
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session as _Session
 from sqlalchemy.orm import sessionmaker, scoped_session
 
 from sqlalchemy import create_engine
-from sqlalchemy.pool import NullPool
-
-from ..mambuconfig import dbeng, dbhost, dbname, dbport, dbpwd, dbuser
+from sqlalchemy import pool
+from sqlalchemy.exc import UnboundExecutionError
+
+from ..mambuconfig import (
+    dbeng,
+    dbhost,
+    dbname,
+    dbpoolclass,
+    dbpoolpreping,
+    dbpoolrecycle,
+    dbpoolsize,
+    dbport,
+    dbpwd,
+    dbuser,
+)
 
 
 # Connects to DB
@@ -42,26 +65,78 @@ def connect_db(
     database=dbname,
     params="?charset=utf8&use_unicode=1",
     echoopt=False,
+    poolclass=dbpoolclass,
+    pool_size=dbpoolsize,
+    pool_pre_ping=dbpoolpreping,
+    pool_recycle=dbpoolrecycle,
 ):
     """Connect to database utility function.
 
     Uses SQLAlchemy ORM library.
 
     Useful when using schema modules in MambuPy
+
+    poolclass may be a class or the name of a class on sqlalchemy.pool.
+    pool_size is only used by QueuePool (and its subclasses).
     """
+    if isinstance(poolclass, str):
+        poolclass = getattr(pool, poolclass)
+    kwargs = {
+        "poolclass": poolclass,
+        "pool_pre_ping": str(pool_pre_ping).lower() == "true",
+        "pool_recycle": int(pool_recycle),
+    }
+    if issubclass(poolclass, pool.QueuePool):
+        kwargs["pool_size"] = int(pool_size)
     return create_engine(
         "%s://%s:%s@%s:%s/%s%s" % (engine, user, password, host, port, database, params),
-        poolclass=NullPool,
         isolation_level="READ UNCOMMITTED",
         echo=echoopt,
+        **kwargs
     )
 
 
-engine = connect_db()
-"""Database engine, connecting with default parameters by default.
-"""
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Database engine, connecting with default parameters by default.
+
+    Created on the first call.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = connect_db()
+    return _engine
+
+
+def __getattr__(name):
+    """Creates the default engine the first time engine is accessed."""
+    if name == "engine":
+        return get_engine()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+class LazySession(_Session):
+    """Session bound to the default engine when first used, if unbound.
 
-session_factory = sessionmaker(bind=engine)
+    The session_factory is then configured with the default engine too,
+    for the sessions created after it.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        try:
+            return super().get_bind(mapper, clause, **kwargs)
+        except UnboundExecutionError:
+            self.bind = get_engine()
+            session_factory.configure(bind=self.bind)
+            return super().get_bind(mapper, clause, **kwargs)
+
+
+session_factory = sessionmaker(class_=LazySession)
 """Sessionmaker object, create factory sessions.
 """
 
@@ -76,3 +151,30 @@ session = Session()
 Base = declarative_base()
 """Declarative base for models.
 """
+
+_inherited = []
+"""Transactions and pools inherited from the parent process.
+
+Kept referenced on forked child processes, so their DB connections are
+never closed (nor garbage collected) by the child: closing them
+(invalidate, dispose) would end them for the parent too.
+"""
+
+
+def _after_fork_in_child():
+    """Forgets the DB connections inherited from the parent process.
+
+    The default session gets a new transaction, and the default engine (if
+    created already) a new pool, with no connections yet.
+    """
+    if session.transaction is not None:
+        _inherited.append(session.transaction)
+        session.transaction = None
+        session.begin()
+    if _engine is not None:
+        _inherited.append(_engine.pool)
+        _engine.pool = _engine.pool.recreate()
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,179 @@
+import logging
+import os
+import sys
+import tempfile
+import unittest
+
+import mock
+
+sys.path.insert(0, os.path.abspath("."))
+
+from MambuPy.api.connector import cache
+
+
+logging.disable(logging.CRITICAL)
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = cache.ResponseCache(
+            maxsize=3, ttls={"branches": 60, "centres": 10}, clock=lambda: self.now)
+
+    def test_ttl(self):
+        self.assertEqual(self.cache.ttl("branches"), 60)
+        self.assertEqual(self.cache.ttl("loans"), 0)
+        self.assertEqual(cache.ResponseCache(ttls={"branches": 60}).ttl("branches"), 0)
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("branches", "key", b"response")
+        self.assertEqual(self.cache.get("key"), b"response")
+
+        # not cached prefixes
+        self.cache.set("loans", "loan", b"response")
+        self.assertIsNone(self.cache.get("loan"))
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 2, "size": 1})
+
+        # expired
+        self.cache.set("centres", "centre", b"response")
+        self.now += 10
+        self.assertIsNone(self.cache.get("centre"))
+        self.assertEqual(self.cache.get("key"), b"response")
+        self.now += 50
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_set_lru(self):
+        for key in ["a", "b", "c"]:
+            self.cache.set("branches", key, key)
+        self.cache.get("a")
+        self.cache.set("branches", "d", "d")
+        self.assertIsNone(self.cache.get("b"))
+        for key in ["a", "c", "d"]:
+            self.assertEqual(self.cache.get(key), key)
+
+    def test_set_copies(self):
+        value = [{"id": "1"}]
+        self.cache.set("branches", "key", value)
+        value.append({"id": "2"})
+        got = self.cache.get("key")
+        self.assertEqual(got, [{"id": "1"}])
+        got[0]["id"] = "changed"
+        self.assertEqual(self.cache.get("key"), [{"id": "1"}])
+
+    def test_invalidate(self):
+        self.cache.set("branches", "a", "a")
+        self.cache.set("centres", "b", "b")
+        self.cache.invalidate("branches")
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), "b")
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get("b"))
+
+        self.cache.set("branches", "a", "a")
+        self.cache.reset()
+        self.assertEqual(self.cache.stats(), {"hits": 0, "misses": 0, "size": 0})
+
+    def test__parse_ttls(self):
+        self.assertEqual(
+            cache._parse_ttls("branches:3600, centres:60"),
+            {"branches": 3600, "centres": 60})
+        self.assertEqual(cache._parse_ttls(""), {})
+        self.assertEqual(cache._parse_ttls(None), {})
+
+    def test_get_response_cache(self):
+        self.assertIs(cache.get_response_cache(), cache.get_response_cache())
+        self.assertEqual(cache.get_response_cache().maxsize, 0)
+
+    def test_warm(self):
+        entity = mock.Mock(_prefix="branches")
+        entity.get_all.return_value = ["B1", "B2"]
+        with mock.patch.object(cache, "_response_cache", self.cache):
+            self.assertEqual(cache.warm([entity], limit=5), {"branches": 2})
+        entity.get_all.assert_called_once_with(limit=5)
+
+        with mock.patch("MambuPy.api.entities.MambuEntity.get_all") as mock_get_all:
+            mock_get_all.return_value = []
+            self.assertEqual(
+                cache.warm(),
+                {"branches": 0, "centres": 0, "loanproducts": 0, "userroles": 0,
+                 "customfields": 0, "customfieldsets": 0})
+            self.assertEqual(mock_get_all.call_count, 6)
+
+
+class SQLiteResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite")
+        self.cache = self.build()
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def build(self, tenant="tenant.mambu.com"):
+        return cache.SQLiteResponseCache(
+            self.path, tenant=tenant, maxsize=3,
+            ttls={"branches": 60, "centres": 10}, clock=lambda: self.now)
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get(("GET", "url", "auth")))
+        self.cache.set("branches", ("GET", "url", "auth"), b"response")
+        self.cache.set("branches", ("GET", "list", "auth"), [{"id": "B1"}])
+        self.cache.set("loans", ("GET", "loan", "auth"), b"response")
+        self.assertEqual(self.cache.get(("GET", "url", "auth")), b"response")
+        self.assertEqual(self.cache.get(("GET", "list", "auth")), [{"id": "B1"}])
+        self.assertIsNone(self.cache.get(("GET", "loan", "auth")))
+        self.assertEqual(self.cache.stats(), {"hits": 2, "misses": 2, "size": 2})
+
+        # keys are not stored as given
+        with open(self.path, "rb") as dbfile:
+            self.assertNotIn(b"auth", dbfile.read())
+
+        # shared with other processes (and later runs), by tenant
+        other = self.build()
+        self.assertEqual(other.get(("GET", "url", "auth")), b"response")
+        other.close()
+        other = self.build(tenant="other.mambu.com")
+        self.assertIsNone(other.get(("GET", "url", "auth")))
+        other.set("branches", ("GET", "url", "auth"), b"other response")
+        other.close()
+        self.assertEqual(self.cache.get(("GET", "url", "auth")), b"response")
+
+        # expired
+        self.cache.set("centres", "centre", b"response")
+        self.now += 10
+        self.assertIsNone(self.cache.get("centre"))
+        self.now += 50
+        self.assertIsNone(self.cache.get(("GET", "url", "auth")))
+
+    def test_set_lru(self):
+        for key in ["a", "b", "c"]:
+            self.cache.set("branches", key, key)
+            self.now += 1
+        self.cache.get("a")
+        self.now += 1
+        self.cache.set("branches", "d", "d")
+        self.assertIsNone(self.cache.get("b"))
+        for key in ["a", "c", "d"]:
+            self.assertEqual(self.cache.get(key), key)
+
+    def test_invalidate(self):
+        self.cache.set("branches", "a", "a")
+        self.cache.set("centres", "b", "b")
+        self.cache.invalidate("branches")
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), "b")
+        self.cache.reset()
+        self.assertEqual(self.cache.stats(), {"hits": 0, "misses": 0, "size": 0})
+
+    def test__after_fork_in_child(self):
+        self.cache.set("branches", "a", "a")
+        self.cache._after_fork_in_child()
+        self.assertEqual(self.cache.get("a"), "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("."))
+
+from MambuPy.api.connector import keyset
+from MambuPy.mambuutil import MambuPyError
+
+
+def search(elements, data, limit):
+    """Searches elements as Mambu would, for the filters made by the cursor"""
+    field = data["sortingCriteria"]["field"]
+    desc = data["sortingCriteria"]["order"] == "DESC"
+    found = sorted(elements, key=lambda elem: elem[field], reverse=desc)
+    for criteria in data.get("filterCriteria", []):
+        if criteria["operator"] in ["MORE_THAN", "AFTER"]:
+            found = [elem for elem in found if elem[field] > criteria["value"]]
+        elif criteria["operator"] in ["LESS_THAN", "BEFORE"]:
+            found = [elem for elem in found if elem[field] < criteria["value"]]
+    return found[:limit]
+
+
+def walk(cursor, elements):
+    result = []
+    window = cursor.next_window()
+    while window is not None:
+        result.extend(cursor.feed(search(elements, *window)))
+        window = cursor.next_window()
+    return result
+
+
+class KeysetCursorTests(unittest.TestCase):
+    def setUp(self):
+        self.elements = [
+            {"encodedKey": "k{:02}".format(i), "creationDate": "2024-01-0{}".format(i % 4)}
+            for i in range(10)
+        ]
+
+    def test_next_window(self):
+        cursor = keyset.KeysetCursor(
+            {"filterCriteria": [{"field": "a", "operator": "EQUALS", "value": "b"}]},
+            limit=5, window_size=3)
+        self.assertEqual(
+            cursor.next_window(),
+            ({"filterCriteria": [{"field": "a", "operator": "EQUALS", "value": "b"}],
+              "sortingCriteria": {"field": "encodedKey", "order": "ASC"}}, 3))
+        cursor.feed([{"encodedKey": "k1"}, {"encodedKey": "k2"}, {"encodedKey": "k3"}])
+        self.assertEqual(
+            cursor.next_window(),
+            ({"filterCriteria": [
+                {"field": "a", "operator": "EQUALS", "value": "b"},
+                {"field": "encodedKey", "operator": "MORE_THAN", "value": "k3"}],
+              "sortingCriteria": {"field": "encodedKey", "order": "ASC"}}, 2))
+        cursor.feed([{"encodedKey": "k4"}, {"encodedKey": "k5"}])
+        self.assertIsNone(cursor.next_window())
+
+    def test_operator(self):
+        for field, order, operator in [
+            ("encodedKey", "ASC", "MORE_THAN"),
+            ("encodedKey", "DESC", "LESS_THAN"),
+            ("creationDate", "ASC", "AFTER"),
+            ("creationDate", "DESC", "BEFORE"),
+        ]:
+            cursor = keyset.KeysetCursor(
+                {"sortingCriteria": {"field": field, "order": order}})
+            self.assertEqual(cursor.operator, operator)
+
+    def test_walk(self):
+        cursor = keyset.KeysetCursor({}, window_size=3)
+        self.assertEqual(walk(cursor, self.elements), self.elements)
+
+        cursor = keyset.KeysetCursor(
+            {"sortingCriteria": {"field": "encodedKey", "order": "DESC"}},
+            limit=4, window_size=3)
+        self.assertEqual(walk(cursor, self.elements), self.elements[::-1][:4])
+
+    def test_walk_ties(self):
+        for order in ["ASC", "DESC"]:
+            for limit in [None, 7]:
+                cursor = keyset.KeysetCursor(
+                    {"sortingCriteria": {"field": "creationDate", "order": order}},
+                    limit=limit, window_size=4)
+                result = walk(cursor, self.elements)
+                expected = sorted(
+                    self.elements, key=lambda elem: elem["creationDate"],
+                    reverse=order == "DESC")[:limit]
+                self.assertEqual(
+                    sorted(elem["encodedKey"] for elem in result),
+                    sorted(elem["encodedKey"] for elem in expected))
+                self.assertEqual(
+                    [elem["creationDate"] for elem in result],
+                    [elem["creationDate"] for elem in expected])
+
+    def test_feed_errors(self):
+        cursor = keyset.KeysetCursor(
+            {"sortingCriteria": {"field": "creationDate", "order": "ASC"}},
+            window_size=2)
+        with self.assertRaisesRegex(
+            MambuPyError, r"^more than 2 elements with creationDate 2024-01-01"
+        ):
+            cursor.feed([{"encodedKey": "k1", "creationDate": "2024-01-01"},
+                         {"encodedKey": "k2", "creationDate": "2024-01-01"}])
+
+        cursor.next_window()
+        with self.assertRaisesRegex(MambuPyError, r"needs creationDate"):
+            cursor.feed([{"encodedKey": "k1"}, {"encodedKey": "k2"}])
+
+        cursor.next_window()
+        with self.assertRaisesRegex(MambuPyError, r"needs encodedKey"):
+            cursor.feed([{"creationDate": "2024-01-01"}, {"creationDate": "2024-01-02"}])
+
+    def test_feed_content(self):
+        cursor = keyset.KeysetCursor(
+            {"sortingCriteria": {"field": "creationDate", "order": "ASC"}},
+            window_size=3)
+        cursor.next_window()
+        content = (b'[{"encodedKey": "k1", "creationDate": "2024-01-01"}, '
+                   b'{"encodedKey": "k2", "creationDate": "2024-01-02"}, '
+                   b'{"encodedKey": "k3", "creationDate": "2024-01-02"}]')
+        self.assertEqual(cursor.feed_content(content)[0], content)
+
+        # the elements seen already are dropped from the content too
+        cursor.next_window()
+        content, page = cursor.feed_content(
+            b'[{"encodedKey": "k2", "creationDate": "2024-01-02"}, '
+            b'{"encodedKey": "k3", "creationDate": "2024-01-02"}]')
+        self.assertEqual(page, [])
+        self.assertEqual(content, b"[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("."))
+
+from MambuPy.api.connector import pagination
+
+
+def walk(cursor, total):
+    """Requests every window of a list of total elements, as Mambu would"""
+    windows = []
+    window = cursor.next_window()
+    while window is not None:
+        windows.append((window["offset"], window["limit"]))
+        end = min(total, window["offset"] + window["limit"])
+        cursor.feed(list(range(window["offset"], end)))
+        window = cursor.next_window()
+    return windows
+
+
+class OffsetCursorTests(unittest.TestCase):
+    def test_next_window(self):
+        cursor = pagination.OffsetCursor({"detailsLevel": "FULL"}, window_size=3)
+        self.assertEqual(
+            cursor.next_window(), {"detailsLevel": "FULL", "offset": 0, "limit": 3})
+        cursor.feed([1, 2, 3])
+        self.assertEqual(
+            cursor.next_window(), {"detailsLevel": "FULL", "offset": 3, "limit": 3})
+        cursor.feed([4])
+        self.assertTrue(cursor.done)
+        self.assertIsNone(cursor.next_window())
+
+    def test_walk(self):
+        for params, total, windows in [
+            ({}, 7, [(0, 3), (3, 3), (6, 3)]),
+            ({}, 6, [(0, 3), (3, 3), (6, 3)]),
+            ({"limit": 5}, 10, [(0, 3), (3, 2)]),
+            ({"limit": 6}, 10, [(0, 3), (3, 3)]),
+            ({"limit": 2, "offset": 4}, 10, [(4, 2)]),
+            ({"limit": None, "offset": None}, 2, [(0, 3)]),
+        ]:
+            with self.subTest(params=params, total=total):
+                cursor = pagination.OffsetCursor(params, window_size=3)
+                self.assertEqual(walk(cursor, total), windows)
+
+    def test_windows(self):
+        cursor = pagination.OffsetCursor({"offset": 1}, window_size=3)
+        cursor.next_window()
+        cursor.feed([1, 2, 3])
+        self.assertEqual(
+            [(w["offset"], w["limit"]) for w in cursor.windows(9)],
+            [(4, 3), (7, 2)])
+        self.assertTrue(cursor.done)
+
+        cursor = pagination.OffsetCursor({"limit": 7}, window_size=3)
+        cursor.next_window()
+        cursor.feed([1, 2, 3])
+        self.assertEqual(
+            [(w["offset"], w["limit"]) for w in cursor.windows(100)],
+            [(3, 3), (6, 1)])
+
+        cursor = pagination.OffsetCursor({}, window_size=3)
+        cursor.next_window()
+        cursor.feed([1, 2, 3])
+        self.assertEqual(cursor.windows(3), [])
+
+    def test_items_total(self):
+        self.assertEqual(pagination.items_total({"items-total": "120"}), 120)
+        self.assertIsNone(pagination.items_total({}))
+        self.assertIsNone(pagination.items_total({"items-total": "many"}))
+
+    def test_cat_pages(self):
+        self.assertEqual(
+            pagination.cat_pages([b'[{"id": 1}]', b" [ ] ", b'[{"id": 2}, {"id": 3}]']),
+            b'[{"id": 1},{"id": 2}, {"id": 3}]')
+        self.assertEqual(pagination.cat_pages([]), b"[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
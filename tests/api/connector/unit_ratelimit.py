@@ -0,0 +1,194 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import os
+import sys
+import threading
+import unittest
+
+import mock
+
+sys.path.insert(0, os.path.abspath("."))
+
+from MambuPy.api.connector import ratelimit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class AdaptiveRateLimiterTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = ratelimit.AdaptiveRateLimiter(
+            max_rate=10.0, min_rate=1.0, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_acquire(self):
+        self.limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        for _ in range(5):
+            self.limiter.acquire()
+        self.assertEqual(len(self.clock.sleeps), 5)
+        self.assertAlmostEqual(self.clock.now, 1000.5)
+
+        # disabled
+        limiter = ratelimit.AdaptiveRateLimiter(
+            max_rate=0, clock=self.clock, sleep=self.clock.sleep)
+        self.assertFalse(limiter.enabled)
+        for _ in range(5):
+            limiter.acquire()
+        self.assertEqual(len(self.clock.sleeps), 5)
+
+    def test_on_response_429(self):
+        self.limiter.on_response(429)
+        self.assertEqual(self.limiter.rate, 5.0)
+
+        # several 429s at once decrease the rate only once
+        self.limiter.on_response(429)
+        self.assertEqual(self.limiter.rate, 5.0)
+        self.clock.now += 1
+        self.limiter.on_response(429)
+        self.assertEqual(self.limiter.rate, 2.5)
+        self.clock.now += 1
+        self.limiter.on_response(429)
+        self.clock.now += 1
+        self.limiter.on_response(429)
+        self.assertEqual(self.limiter.rate, 1.0)
+
+        # Retry-After pauses every request
+        self.limiter.reset()
+        self.limiter.on_response(429, "3")
+        self.clock.sleeps = []
+        self.limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [3.0])
+
+        # disabled limiters still honour Retry-After
+        limiter = ratelimit.AdaptiveRateLimiter(
+            max_rate=0, clock=self.clock, sleep=self.clock.sleep)
+        limiter.on_response(429, "2")
+        self.clock.sleeps = []
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [2.0])
+
+    def test_on_response_429_backoff(self):
+        # without Retry-After, requests are paused 1, 2, 4... seconds
+        self.limiter.acquire()
+        for pause in [1.0, 2.0, 4.0, 8.0]:
+            self.limiter.on_response(429)
+            self.clock.sleeps = []
+            self.limiter.acquire()
+            self.assertEqual(self.clock.sleeps, [pause])
+
+        # 429s of several threads at once pause only once
+        self.limiter.on_response(429)
+        self.limiter.on_response(429)
+        self.clock.sleeps = []
+        self.limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [16.0])
+
+        # up to max_backoff
+        for _ in range(3):
+            self.limiter.on_response(429)
+            self.limiter.acquire()
+        self.clock.sleeps = []
+        self.limiter.on_response(429)
+        self.limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [60.0])
+
+        # a successful response starts over
+        self.limiter.on_response(200)
+        self.limiter.on_response(429)
+        self.clock.sleeps = []
+        self.limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [1.0])
+
+        # disabled limiters back off too
+        limiter = ratelimit.AdaptiveRateLimiter(
+            max_rate=0, clock=self.clock, sleep=self.clock.sleep)
+        limiter.on_response(429)
+        limiter.on_response(429)
+        self.clock.sleeps = []
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [1.0])
+
+    def test_acquire_async(self):
+        async def sleep(seconds):
+            self.clock.sleep(seconds)
+
+        async def acquire():
+            for _ in range(6):
+                await self.limiter.acquire_async()
+
+        with mock.patch.object(ratelimit.asyncio, "sleep", sleep):
+            asyncio.run(acquire())
+        self.assertEqual(len(self.clock.sleeps), 5)
+        self.assertAlmostEqual(self.clock.now, 1000.5)
+
+        # pauses too
+        self.limiter.on_response(429, "3")
+        self.clock.sleeps = []
+        with mock.patch.object(ratelimit.asyncio, "sleep", sleep):
+            asyncio.run(self.limiter.acquire_async())
+        self.assertEqual(self.clock.sleeps, [3.0])
+
+    def test_on_response_increase(self):
+        self.limiter.rate = 2.0
+        self.limiter.on_response(200, latency=0.1)
+        self.assertEqual(self.limiter.rate, 2.5)
+        for _ in range(100):
+            self.limiter.on_response(200, latency=0.1)
+        self.assertEqual(self.limiter.rate, 10.0)
+
+        # no increase while latency is too high
+        self.limiter.rate = 2.0
+        self.limiter.on_response(200, latency=1.0)
+        self.assertEqual(self.limiter.rate, 2.0)
+        self.limiter.on_response(200)
+        self.assertEqual(self.limiter.rate, 2.5)
+
+    def test_threads(self):
+        limiter = ratelimit.AdaptiveRateLimiter(max_rate=1000.0)
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(limiter.rate, 1000.0)
+
+    def test_reset(self):
+        self.limiter.on_response(429, "10")
+        self.limiter.reset()
+        self.assertEqual(self.limiter.rate, 10.0)
+        self.limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class RetryAfterTests(unittest.TestCase):
+    def test__retry_after_seconds(self):
+        self.assertEqual(ratelimit._retry_after_seconds(None), 0.0)
+        self.assertEqual(ratelimit._retry_after_seconds(""), 0.0)
+        self.assertEqual(ratelimit._retry_after_seconds("5"), 5.0)
+        self.assertEqual(ratelimit._retry_after_seconds("-5"), 0.0)
+        self.assertEqual(ratelimit._retry_after_seconds("not a date"), 0.0)
+        date = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(
+            ratelimit._retry_after_seconds(format_datetime(date, usegmt=True)),
+            30, delta=2)
+
+    def test_get_rate_limiter(self):
+        self.assertIs(ratelimit.get_rate_limiter(), ratelimit.get_rate_limiter())
+        self.assertIsInstance(
+            ratelimit.get_rate_limiter(), ratelimit.AdaptiveRateLimiter)
+
+
+if __name__ == "__main__":
+    unittest.main()
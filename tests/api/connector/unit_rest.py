@@ -1,5 +1,6 @@
 import base64
 import copy
+import json
 import logging
 import os
 import sys
@@ -74,12 +75,82 @@ class TestSessionSingleton(unittest.TestCase):
         self.assertIsInstance(retry, Retry)
         self.assertEqual(retry.total, 5)
         self.assertEqual(retry.backoff_factor, 1)
-        self.assertIn(429, retry.status_forcelist)
+        # 429 is retried by the connector, through the rate limiter
+        self.assertNotIn(429, retry.status_forcelist)
         self.assertIn(500, retry.status_forcelist)
         self.assertIn(502, retry.status_forcelist)
         self.assertIn(503, retry.status_forcelist)
         self.assertIn(504, retry.status_forcelist)
 
+    @mock.patch("MambuPy.api.connector.rest.apipoolprewarm", "0")
+    @mock.patch("MambuPy.api.connector.rest.apikeepalive", "True")
+    @mock.patch("MambuPy.api.connector.rest.apipoolmaxsize", "32")
+    @mock.patch("MambuPy.api.connector.rest.apipoolconnections", "4")
+    def test_session_pool(self):
+        """Test that the pool of the session is configured."""
+        http_session = rest.SessionSingleton().get_session()
+        adapter = http_session.get_adapter('https://')
+        self.assertEqual(adapter._pool_connections, 4)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertEqual(http_session.headers["Connection"], "keep-alive")
+
+    @mock.patch("MambuPy.api.connector.rest.apikeepalive", "False")
+    def test_session_no_keepalive(self):
+        """Test that connections are closed when keep alive is disabled."""
+        http_session = rest.SessionSingleton().get_session()
+        self.assertEqual(http_session.headers["Connection"], "close")
+
+    @mock.patch("MambuPy.api.connector.rest.apipoolprewarm", "3")
+    @mock.patch("requests.Session.head")
+    def test_session_prewarm(self, mock_head):
+        """Test that connections are opened when the session is created."""
+        mock_head.side_effect = [None, requests.exceptions.ConnectionError, None]
+        rest.SessionSingleton().get_session()
+        self.assertEqual(mock_head.call_count, 3)
+        mock_head.assert_called_with(
+            "https://{}/api/".format(apiurl), timeout=10)
+
+        rest.SessionSingleton().get_session()
+        self.assertEqual(mock_head.call_count, 3)
+
+    def test_session_threads(self):
+        """Test that threads share a single session."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            sessions = list(executor.map(
+                lambda _: rest.SessionSingleton().get_session(), range(64)))
+        self.assertEqual(len(set(id(session) for session in sessions)), 1)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_session_fork(self):
+        """Test that a forked child process doesn't use the parent's session."""
+        import multiprocessing
+
+        parent_session = rest.SessionSingleton().get_session()
+        connector = rest.MambuConnectorREST()
+        self.assertIs(connector._session, parent_session)
+
+        def child(conn):
+            child_session = rest.SessionSingleton().get_session()
+            with mock.patch.object(requests.Session, "request") as mock_request:
+                mock_request.return_value.content = b"{}"
+                connector._MambuConnectorREST__request("GET", "https://url")
+            conn.send((
+                child_session is parent_session,
+                connector._session is child_session,
+                rest.SessionSingleton().get_session() is child_session,
+            ))
+
+        parent_conn, child_conn = multiprocessing.Pipe()
+        proc = multiprocessing.get_context("fork").Process(
+            target=child, args=(child_conn,))
+        proc.start()
+        result = parent_conn.recv()
+        proc.join()
+        self.assertEqual(result, (False, True, True))
+        self.assertIs(rest.SessionSingleton().get_session(), parent_session)
+
 
 class MambuConnectorREST(unittest.TestCase):
     def setUp(self):
@@ -172,6 +243,70 @@ class MambuConnectorREST(unittest.TestCase):
         mock_request.assert_called_once()
         self.assertIsNone(connector._session)
 
+    @mock.patch("MambuPy.api.connector.rest.get_single_flight")
+    @mock.patch("MambuPy.api.connector.rest.MambuConnectorREST._MambuConnectorREST__send")
+    def test_connector_single_flight(self, mock_send, mock_get_single_flight):
+        """Test that GETs are coalesced by URL, params and credentials."""
+        group = mock_get_single_flight.return_value
+        group.do.side_effect = lambda key, func: (func(), False)
+        mock_send.return_value.content = b'{"data": "test"}'
+
+        connector = rest.MambuConnectorREST(user="u1", pwd="p1")
+        self.assertEqual(
+            connector._MambuConnectorREST__request(
+                "GET", "someURL", params={"b": 2, "a": 1}),
+            b'{"data": "test"}')
+        mock_send.assert_called_once_with(
+            "GET", "someURL", params={"b": 2, "a": 1}, data=None, content_type=None)
+        key = group.do.call_args[0][0]
+
+        connector._MambuConnectorREST__request(
+            "GET", "someURL", params={"a": 1, "b": 2})
+        self.assertEqual(group.do.call_args[0][0], key)
+        connector._MambuConnectorREST__request("GET", "someURL", params={"a": 2})
+        self.assertNotEqual(group.do.call_args[0][0], key)
+        rest.MambuConnectorREST(user="u2", pwd="p1")._MambuConnectorREST__request(
+            "GET", "someURL", params={"a": 1, "b": 2})
+        self.assertNotEqual(group.do.call_args[0][0], key)
+        self.assertEqual(group.do.call_count, 4)
+
+        # only GETs
+        connector._MambuConnectorREST__request("POST", "someURL", data={"a": 1})
+        self.assertEqual(group.do.call_count, 4)
+        self.assertEqual(mock_send.call_count, 5)
+
+    @mock.patch("MambuPy.api.connector.rest.get_rate_limiter")
+    @mock.patch("requests.Session.request")
+    def test_connector_rate_limited(self, mock_request, mock_get_rate_limiter):
+        """Test that requests go through the rate limiter, retrying 429s."""
+        limiter = mock_get_rate_limiter.return_value
+        too_many = mock.MagicMock(status_code=429, headers={"Retry-After": "2"})
+        ok = mock.MagicMock(status_code=200, headers={}, content=b'{"data": "test"}')
+        mock_request.side_effect = [too_many, too_many, ok]
+
+        connector = rest.MambuConnectorREST()
+        self.assertEqual(
+            connector._MambuConnectorREST__request("GET", "someURL"),
+            b'{"data": "test"}')
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(limiter.acquire.call_count, 3)
+        self.assertEqual(limiter.on_response.call_count, 3)
+        self.assertEqual(limiter.on_response.call_args_list[0][0][:2], (429, "2"))
+        self.assertEqual(limiter.on_response.call_args[0][:2], (200, None))
+
+        # too many 429s
+        mock_request.reset_mock()
+        mock_request.side_effect = None
+        mock_request.return_value = too_many
+        too_many.raise_for_status.side_effect = requests.exceptions.HTTPError("429")
+        too_many.content = b'{"errors": [{"errorCode": 0, "errorReason": "TOO_MANY_REQUESTS"}]}'
+        with self.assertRaisesRegex(
+            MambuCommError,
+            r"^COMM Error: I cannot communicate with Mambu: too many 429 error responses$",
+        ):
+            connector._MambuConnectorREST__request("GET", "someURL")
+        self.assertEqual(mock_request.call_count, connector._RETRIES + 1)
+
     @mock.patch("MambuPy.api.connector.rest.requests")
     def test_mambu___request_GET(self, mock_requests):
         mock_requests.Session().request().status_code = 200
@@ -576,6 +711,118 @@ class MambuConnectorREST(unittest.TestCase):
 
         rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 50
 
+    @mock.patch("MambuPy.api.connector.rest.json")
+    @mock.patch("MambuPy.api.connector.rest.requests")
+    def test_mambu___list_request_decode(self, mock_requests, mock_json):
+        resp1 = requests.models.Response()
+        resp1.status_code = 200
+        resp1._content = b'[{"id":"1"},{"id":"2"}]'
+        resp2 = requests.models.Response()
+        resp2.status_code = 200
+        resp2._content = b'[{"id":"3"}]'
+        mock_requests.Session().request.side_effect = [resp1, resp2]
+        mock_json.loads.side_effect = json.loads
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 2
+
+        mcrest = rest.MambuConnectorREST()
+        resp = mcrest.__list_request("GET", "someURL", decode=True)
+
+        self.assertEqual(resp, [{"id": "1"}, {"id": "2"}, {"id": "3"}])
+        # each window is decoded just once
+        self.assertEqual(
+            mock_json.loads.call_args_list,
+            [mock.call('[{"id":"1"},{"id":"2"}]'), mock.call('[{"id":"3"}]')])
+
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 50
+
+    @mock.patch("MambuPy.api.connector.rest.requests")
+    def test_mambu___list_request_parallel(self, mock_requests):
+        def response(method, url, params, data, headers):
+            resp = requests.models.Response()
+            resp.status_code = 200
+            resp._content = "[{}]".format(
+                ",".join(
+                    '{{"id":"{}"}}'.format(i)
+                    for i in range(params["offset"],
+                                   min(params["offset"] + params["limit"], 10))
+                )
+            ).encode()
+            if params.get("paginationDetails") == "ON":
+                resp.headers["items-total"] = "10"
+            return resp
+
+        mock_requests.Session().request.side_effect = response
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 3
+
+        mcrest = rest.MambuConnectorREST()
+        resp = mcrest.__list_request("GET", "someURL", workers=4)
+        self.assertEqual(
+            resp,
+            ("[" + ",".join('{{"id":"{}"}}'.format(i) for i in range(10)) + "]"
+             ).encode())
+        mock_requests.Session().request.assert_any_call(
+            "GET",
+            "someURL",
+            params={"limit": 3, "offset": 0, "paginationDetails": "ON"},
+            data=None,
+            headers=app_default_headers(),
+        )
+        for offset, limit in [(3, 3), (6, 3), (9, 1)]:
+            mock_requests.Session().request.assert_any_call(
+                "GET",
+                "someURL",
+                params={"limit": limit, "offset": offset},
+                data=None,
+                headers=app_default_headers(),
+            )
+        self.assertEqual(mock_requests.Session().request.call_count, 4)
+
+        # with limit and offset
+        mock_requests.Session().request.reset_mock()
+        resp = mcrest.__list_request(
+            "GET", "someURL", params={"limit": 5, "offset": 2}, workers=4)
+        self.assertEqual(
+            resp,
+            ("[" + ",".join('{{"id":"{}"}}'.format(i) for i in range(2, 7)) + "]"
+             ).encode())
+        mock_requests.Session().request.assert_called_with(
+            "GET",
+            "someURL",
+            params={"limit": 2, "offset": 5},
+            data=None,
+            headers=app_default_headers(),
+        )
+        self.assertEqual(mock_requests.Session().request.call_count, 2)
+
+        # decoded
+        mock_requests.Session().request.reset_mock()
+        resp = mcrest.__list_request("GET", "someURL", workers=4, decode=True)
+        self.assertEqual(resp, [{"id": str(i)} for i in range(10)])
+        self.assertEqual(mock_requests.Session().request.call_count, 4)
+
+        # a single window
+        mock_requests.Session().request.reset_mock()
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 50
+        resp = mcrest.__list_request("GET", "someURL", workers=4)
+        self.assertEqual(mock_requests.Session().request.call_count, 1)
+        self.assertEqual(len(json.loads(resp.decode())), 10)
+
+        # no items-total header: the rest of the windows serially
+        def response_no_header(method, url, params, data, headers):
+            resp = response(method, url, params, data, headers)
+            resp.headers.pop("items-total", None)
+            return resp
+
+        mock_requests.Session().request.reset_mock()
+        mock_requests.Session().request.side_effect = response_no_header
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 4
+        resp = mcrest.__list_request("GET", "someURL", workers=4)
+        self.assertEqual(
+            json.loads(resp.decode()), [{"id": str(i)} for i in range(10)])
+        self.assertEqual(mock_requests.Session().request.call_count, 3)
+
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 50
+
     def test___validate_query_params(self):
         mcrest = rest.MambuConnectorREST()
 
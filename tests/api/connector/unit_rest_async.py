@@ -0,0 +1,426 @@
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import unittest
+
+import mock
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+
+sys.path.insert(0, os.path.abspath("."))
+
+from MambuPy.api.connector import cache, ratelimit, rest, rest_async
+from MambuPy.mambuutil import MambuCommError, MambuError, apiurl
+
+
+logging.disable(logging.CRITICAL)
+
+
+class FakeResponse:
+    def __init__(self, status, content, headers=None):
+        self.status = status
+        self.content = content
+        self.headers = headers or {}
+
+    async def read(self):
+        return self.content
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """Records requests, answers with the given responses, in order"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+
+class TimeoutResponse(FakeResponse):
+    async def __aenter__(self):
+        raise asyncio.TimeoutError()
+
+
+class BodyResponse:
+    """Reads the (streamed) body of the request before responding"""
+
+    def __init__(self, resp, data, bodies):
+        self.resp = resp
+        self.data = data
+        self.bodies = bodies
+
+    async def __aenter__(self):
+        self.bodies.append(b"".join([chunk async for chunk in self.data]))
+        return self.resp
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class BodySession(FakeSession):
+    def __init__(self, responses):
+        super().__init__(responses)
+        self.bodies = []
+
+    def request(self, method, url, **kwargs):
+        return BodyResponse(super().request(method, url, **kwargs), kwargs["data"], self.bodies)
+
+
+@unittest.skipIf(rest_async.aiohttp is None, "aiohttp not installed")
+class MambuConnectorRESTAsync(unittest.TestCase):
+    def setUp(self):
+        # no rate limit, the order of the requests depends only on the tests
+        patcher = mock.patch.object(
+            rest_async,
+            "get_rate_limiter",
+            return_value=ratelimit.AdaptiveRateLimiter(max_rate=0),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_with(self, session, coro_func):
+        with mock.patch.object(
+            rest_async.AsyncSessionSingleton,
+            "get_session",
+            return_value=session,
+        ):
+            return asyncio.run(coro_func())
+
+    def test___init__(self):
+        with mock.patch.object(rest, "SessionSingleton") as mock_singleton:
+            mcrest = rest_async.MambuConnectorRESTAsync()
+        self.assertTrue(isinstance(mcrest, rest.MambuConnectorREST))
+        # no requests.Session (nor its prewarm) for the async connector
+        mock_singleton.assert_not_called()
+        self.assertIsNone(mcrest._session)
+
+        with mock.patch.object(rest_async, "aiohttp", None):
+            with self.assertRaisesRegex(
+                rest_async.MambuPyError, r"^aiohttp is required"
+            ):
+                rest_async.MambuConnectorRESTAsync()
+
+    def test_sync_connector(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        sync = mcrest.sync_connector()
+        self.assertEqual(type(sync), rest.MambuConnectorREST)
+        self.assertEqual(sync._headers, mcrest._headers)
+        self.assertEqual(sync._tenant, mcrest._tenant)
+
+    def test_mambu_get(self):
+        session = FakeSession([FakeResponse(200, b'{"id": "12345"}')])
+        mcrest = rest_async.MambuConnectorRESTAsync()
+
+        resp = self.run_with(
+            session, lambda: mcrest.mambu_get("12345", "someURL", "FULL")
+        )
+
+        self.assertEqual(resp, b'{"id": "12345"}')
+        self.assertEqual(
+            session.calls,
+            [
+                (
+                    "GET",
+                    "https://{}/api/someURL/12345".format(apiurl),
+                    {
+                        "params": {"detailsLevel": "FULL"},
+                        "data": None,
+                        "headers": mcrest._headers,
+                    },
+                )
+            ],
+        )
+
+    def test_mambu_get_errors(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+
+        session = FakeSession(
+            [FakeResponse(404, b'{"errors":[{"errorCode": 301, "errorReason": "INVALID"}]}')]
+        )
+        with self.assertRaisesRegex(MambuError, r"^301 \(404\) - INVALID"):
+            self.run_with(session, lambda: mcrest.mambu_get("12345", "someURL"))
+
+        # retries on 5XX, honoring Retry-After
+        session = FakeSession(
+            [
+                FakeResponse(503, b"", {"Retry-After": "0"}),
+                FakeResponse(200, b"{}"),
+            ]
+        )
+        resp = self.run_with(session, lambda: mcrest.mambu_get("12345", "someURL"))
+        self.assertEqual(resp, b"{}")
+        self.assertEqual(len(session.calls), 2)
+
+        mcrest._RETRIES = 1
+        session = FakeSession(
+            [
+                FakeResponse(429, b"", {"Retry-After": "0"}),
+                FakeResponse(429, b"", {"Retry-After": "0"}),
+            ]
+        )
+        with self.assertRaisesRegex(MambuCommError, r"too many 429"):
+            self.run_with(session, lambda: mcrest.mambu_get("12345", "someURL"))
+
+    def test_mambu_get_timeout(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        session = FakeSession([TimeoutResponse(200, b"{}")])
+        with self.assertRaisesRegex(MambuCommError, r"^Unknown comm error with Mambu"):
+            self.run_with(session, lambda: mcrest.mambu_get("12345", "someURL"))
+
+    def test_upload_streamed(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        fields = {
+            "name": "doc",
+            "file": ("doc.txt", io.BytesIO(b"x" * 200000), "text/plain"),
+        }
+        encoder = MultipartEncoder(fields=fields)
+        expected = MultipartEncoder(
+            fields=dict(fields, file=("doc.txt", io.BytesIO(b"x" * 200000), "text/plain")),
+            boundary=encoder.boundary_value,
+        ).to_string()
+        session = BodySession(
+            [FakeResponse(503, b"", {"Retry-After": "0"}), FakeResponse(200, b"{}")]
+        )
+
+        with mock.patch.object(rest_async, "_stream", wraps=rest_async._stream) as stream:
+            resp = self.run_with(
+                session,
+                lambda: mcrest._request(
+                    "POST", "someURL", data=encoder, content_type=encoder.content_type
+                ),
+            )
+
+        self.assertEqual(resp, b"{}")
+        # sent in chunks, not read whole into memory, again on the retry
+        self.assertEqual(stream.call_count, 2)
+        self.assertEqual(session.bodies, [expected, expected])
+        headers = session.calls[0][2]["headers"]
+        self.assertEqual(headers["Content-Type"], encoder.content_type)
+        self.assertEqual(headers["Content-Length"], str(len(expected)))
+
+    @mock.patch("MambuPy.api.connector.rest_async.get_rate_limiter")
+    def test_mambu_get_rate_limited(self, mock_get_rate_limiter):
+        limiter = mock_get_rate_limiter.return_value
+        limiter.acquire_async = mock.AsyncMock()
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        session = FakeSession(
+            [
+                FakeResponse(429, b"", {"Retry-After": "2"}),
+                FakeResponse(429, b""),
+                FakeResponse(200, b"{}"),
+            ]
+        )
+
+        with mock.patch.object(rest_async.asyncio, "sleep") as mock_sleep:
+            resp = self.run_with(
+                session, lambda: mcrest.mambu_get("12345", "someURL")
+            )
+
+        self.assertEqual(resp, b"{}")
+        # the shared limiter paces every attempt, the connector doesn't sleep
+        self.assertEqual(limiter.acquire_async.await_count, 3)
+        mock_sleep.assert_not_called()
+        self.assertEqual(
+            [c.args[:2] for c in limiter.on_response.call_args_list],
+            [(429, "2"), (429, None), (200, None)],
+        )
+
+    @mock.patch("MambuPy.api.connector.rest_async.get_response_cache")
+    def test_mambu_get_cached(self, mock_get_cache):
+        response_cache = cache.ResponseCache(maxsize=10, ttls={"branches": 60})
+        mock_get_cache.return_value = response_cache
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        session = FakeSession(
+            [
+                FakeResponse(200, b'{"id": "B1"}'),
+                FakeResponse(200, b"{}"),
+                FakeResponse(200, b'{"id": "B1"}'),
+                FakeResponse(200, b'{"id": "L1"}'),
+                FakeResponse(200, b'{"id": "L1"}'),
+            ]
+        )
+
+        async def requests():
+            resps = []
+            for _ in range(2):
+                resps.append(await mcrest.mambu_get("B1", "branches"))
+            await mcrest.mambu_update("B1", "branches", {})
+            resps.append(await mcrest.mambu_get("B1", "branches"))
+            for _ in range(2):
+                resps.append(await mcrest.mambu_get("L1", "loans"))
+            return resps
+
+        self.assertEqual(
+            self.run_with(session, requests),
+            [b'{"id": "B1"}'] * 3 + [b'{"id": "L1"}'] * 2,
+        )
+        self.assertEqual(
+            [call[0] for call in session.calls], ["GET", "PUT", "GET", "GET", "GET"]
+        )
+        self.assertEqual(response_cache.stats(), {"hits": 1, "misses": 2, "size": 1})
+
+    def test_mambu_get_all(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        page = [{"id": str(i)} for i in range(50)]
+        session = FakeSession(
+            [
+                FakeResponse(200, json.dumps(page).encode()),
+                FakeResponse(200, b'[{"id": "50"}]'),
+            ]
+        )
+
+        resp = self.run_with(session, lambda: mcrest.mambu_get_all("someURL"))
+
+        self.assertEqual(
+            json.loads(resp.decode()), page + [{"id": "50"}]
+        )
+        self.assertEqual(
+            [call[2]["params"]["offset"] for call in session.calls], [0, 50]
+        )
+        self.assertEqual(
+            [call[2]["params"]["limit"] for call in session.calls], [50, 50]
+        )
+
+        # explicit limit smaller than the page
+        session = FakeSession([FakeResponse(200, b'[{"id": "0"}]')])
+        resp = self.run_with(
+            session, lambda: mcrest.mambu_get_all("someURL", limit=1)
+        )
+        self.assertEqual(json.loads(resp.decode()), [{"id": "0"}])
+        self.assertEqual(len(session.calls), 1)
+
+        # empty
+        session = FakeSession([FakeResponse(200, b"[]")])
+        resp = self.run_with(session, lambda: mcrest.mambu_get_all("someURL"))
+        self.assertEqual(resp, b"[]")
+
+    def test_mambu_get_all_workers(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        session = FakeSession(
+            [
+                FakeResponse(
+                    200,
+                    json.dumps([{"id": str(i)} for i in range(50)]).encode(),
+                    {"items-total": "120"},
+                ),
+                FakeResponse(
+                    200, json.dumps([{"id": str(i)} for i in range(50, 100)]).encode()
+                ),
+                FakeResponse(
+                    200, json.dumps([{"id": str(i)} for i in range(100, 120)]).encode()
+                ),
+            ]
+        )
+
+        resp = self.run_with(
+            session, lambda: mcrest.mambu_get_all("someURL", workers=2)
+        )
+
+        self.assertEqual(
+            json.loads(resp.decode()), [{"id": str(i)} for i in range(120)]
+        )
+        self.assertEqual(
+            session.calls[0][2]["params"]["paginationDetails"], "ON"
+        )
+        self.assertEqual(
+            [(call[2]["params"]["offset"], call[2]["params"]["limit"])
+             for call in session.calls],
+            [(0, 50), (50, 50), (100, 20)],
+        )
+
+    def test_mambu_iter_pages(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        page = [{"id": str(i)} for i in range(50)]
+        session = FakeSession(
+            [
+                FakeResponse(200, json.dumps(page).encode()),
+                FakeResponse(200, b"[]"),
+            ]
+        )
+
+        async def collect():
+            pages = [p async for p in mcrest.mambu_iter_pages("someURL")]
+            return pages
+
+        self.assertEqual(self.run_with(session, collect), [page])
+
+        session = FakeSession([FakeResponse(200, b'[{"id": "0"}]')])
+
+        async def collect_items():
+            return [
+                item
+                async for item in mcrest.mambu_iter_items("someURL", search=True)
+            ]
+
+        self.assertEqual(self.run_with(session, collect_items), [{"id": "0"}])
+        self.assertEqual(session.calls[0][0], "POST")
+
+    def test_mambu_search_keyset(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        page = [{"encodedKey": "k{:02}".format(i)} for i in range(50)]
+        session = FakeSession(
+            [
+                FakeResponse(200, json.dumps(page).encode()),
+                FakeResponse(200, b'[{"encodedKey": "k50"}]'),
+            ]
+        )
+
+        resp = self.run_with(
+            session, lambda: mcrest.mambu_search("someURL", pagination="keyset")
+        )
+
+        self.assertEqual(json.loads(resp.decode()), page + [{"encodedKey": "k50"}])
+        self.assertEqual(
+            [json.loads(call[2]["data"]).get("filterCriteria") for call in session.calls],
+            [None, [{"field": "encodedKey", "operator": "MORE_THAN", "value": "k49"}]],
+        )
+        self.assertNotIn("offset", session.calls[1][2]["params"])
+
+        session = FakeSession(
+            [
+                FakeResponse(200, json.dumps(page).encode()),
+                FakeResponse(200, b"[]"),
+            ]
+        )
+
+        async def collect():
+            return [
+                p
+                async for p in mcrest.mambu_iter_pages(
+                    "someURL", search=True, pagination="keyset"
+                )
+            ]
+
+        self.assertEqual(self.run_with(session, collect), [page])
+
+    def test_mambu_search(self):
+        mcrest = rest_async.MambuConnectorRESTAsync()
+        session = FakeSession([FakeResponse(200, b'[{"id": "0"}]')])
+        filterCriteria = [
+            {"field": "someField", "operator": "EQUALS", "value": "someValue"}
+        ]
+
+        resp = self.run_with(
+            session,
+            lambda: mcrest.mambu_search("someURL", filterCriteria=filterCriteria),
+        )
+
+        self.assertEqual(json.loads(resp.decode()), [{"id": "0"}])
+        method, url, kwargs = session.calls[0]
+        self.assertEqual(method, "POST")
+        self.assertEqual(url, "https://{}/api/someURL:search".format(apiurl))
+        self.assertEqual(kwargs["data"], json.dumps({"filterCriteria": filterCriteria}))
+
+
+if __name__ == "__main__":
+    unittest.main()
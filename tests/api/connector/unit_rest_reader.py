@@ -7,7 +7,7 @@ import mock
 
 sys.path.insert(0, os.path.abspath("."))
 
-from MambuPy.api.connector import rest
+from MambuPy.api.connector import cache, rest
 from MambuPy.mambuutil import (MambuError,
                                MambuPyError, apiurl)
 
@@ -94,6 +94,55 @@ class MambuConnectorReaderREST(unittest.TestCase):
             headers=mcrest._headers,
         )
 
+    @mock.patch("MambuPy.api.connector.rest.get_response_cache")
+    @mock.patch("MambuPy.api.connector.rest.MambuConnectorREST._list_request")
+    @mock.patch("MambuPy.api.connector.rest.MambuConnectorREST._request")
+    def test_mambu_get_cached(self, mock_request, mock_list_request, mock_get_cache):
+        response_cache = cache.ResponseCache(
+            maxsize=10, ttls={"branches": 60, "customfields": 60})
+        mock_get_cache.return_value = response_cache
+        mock_request.return_value = b'{"id": "12345"}'
+        mock_list_request.return_value = [{"id": "12345"}]
+
+        mcrest = rest.MambuConnectorREST()
+        for _ in range(2):
+            self.assertEqual(mcrest.mambu_get("12345", "branches"), b'{"id": "12345"}')
+        mock_request.assert_called_once_with(
+            "GET",
+            "https://{}/api/branches/12345".format(apiurl),
+            params={"detailsLevel": "BASIC"})
+        mcrest.mambu_get("12345", "branches", "FULL")
+        self.assertEqual(mock_request.call_count, 2)
+
+        # other credentials
+        rest.MambuConnectorREST(user="other", pwd="pwd").mambu_get("12345", "branches")
+        self.assertEqual(mock_request.call_count, 3)
+
+        # not cached prefixes
+        for _ in range(2):
+            mcrest.mambu_get("12345", "loans")
+            mcrest.mambu_loanaccount_getSchedule("12345")
+        self.assertEqual(mock_request.call_count, 7)
+
+        for _ in range(2):
+            mcrest.mambu_get_customfield("aCF")
+        self.assertEqual(mock_request.call_count, 8)
+
+        for _ in range(2):
+            branches = mcrest.mambu_get_all("branches", limit=5, workers=2, decode=True)
+            branches.append("modified by the caller")
+        mock_list_request.assert_called_once_with(
+            "GET",
+            "https://{}/api/branches".format(apiurl),
+            params={"paginationDetails": "OFF", "detailsLevel": "BASIC", "limit": 5},
+            workers=2,
+            decode=True)
+        self.assertEqual(
+            mcrest.mambu_get_all("branches", limit=5, workers=4, decode=True),
+            [{"id": "12345"}])
+        self.assertEqual(mock_list_request.call_count, 1)
+        self.assertEqual(response_cache.stats(), {"hits": 4, "misses": 5, "size": 5})
+
     def test_mambu_get_all_validations(self):
         mcrest = rest.MambuConnectorREST()
 
@@ -207,6 +256,143 @@ class MambuConnectorReaderREST(unittest.TestCase):
         ):
             mcrest.mambu_search("someURL", sortingCriteria={})
 
+    @mock.patch("MambuPy.api.connector.rest.requests")
+    def test_mambu_iter_pages(self, mock_requests):
+        resp1 = mock.Mock(status_code=200, content=b'[{"id":"1"},{"id":"2"}]')
+        resp2 = mock.Mock(status_code=200, content=b'[{"id":"3"}]')
+        mock_requests.Session().request.side_effect = [resp1, resp2]
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 2
+
+        mcrest = rest.MambuConnectorREST()
+
+        pages = mcrest.mambu_iter_pages("someURL", filters={"one": "two"})
+        mock_requests.Session().request.assert_not_called()
+        self.assertEqual(next(pages), [{"id": "1"}, {"id": "2"}])
+        mock_requests.Session().request.assert_called_once_with(
+            "GET",
+            "https://{}/api/someURL".format(apiurl),
+            params={"paginationDetails": "OFF", "detailsLevel": "BASIC",
+                    "one": "two", "limit": 2, "offset": 0},
+            data=None,
+            headers=mcrest._headers,
+        )
+        self.assertEqual(list(pages), [[{"id": "3"}]])
+        self.assertEqual(mock_requests.Session().request.call_count, 2)
+
+        # search, an empty last window is not yielded
+        mock_requests.Session().request.reset_mock()
+        resp3 = mock.Mock(status_code=200, content=b"[]")
+        mock_requests.Session().request.side_effect = [resp1, resp3]
+        items = mcrest.mambu_iter_items("someURL", search=True)
+        self.assertEqual(list(items), [{"id": "1"}, {"id": "2"}])
+        self.assertEqual(
+            mock_requests.Session().request.call_args_list[0][0],
+            ("POST", "https://{}/api/someURL:search".format(apiurl)))
+
+        # validations are made before iterating
+        with self.assertRaisesRegex(MambuPyError, r"^filters must be a dictionary"):
+            mcrest.mambu_iter_pages("someURL", filters=["12345"])
+        with self.assertRaisesRegex(
+            MambuPyError, r"^sortingCriteria must be a dictionary"
+        ):
+            mcrest.mambu_iter_items(
+                "someURL", search=True, sortingCriteria="sortingCriteria")
+
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 50
+
+    @mock.patch("MambuPy.api.connector.rest.uuid")
+    @mock.patch("MambuPy.api.connector.rest.requests")
+    def test_mambu_search_keyset(self, mock_requests, mock_uuid):
+        mock_uuid.uuid4.return_value = "An UUID"
+        headers = app_json_headers()
+        headers["Idempotency-Key"] = "An UUID"
+        mock_requests.Session().request.side_effect = [
+            mock.Mock(status_code=200,
+                      content=b'[{"encodedKey": "k1"}, {"encodedKey": "k2"}]'),
+            mock.Mock(status_code=200, content=b'[{"encodedKey": "k3"}]'),
+        ]
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 2
+        filterCriteria = [
+            {"field": "someField", "operator": "EQUALS", "value": "someValue"}
+        ]
+
+        mcrest = rest.MambuConnectorREST()
+        resp = mcrest.mambu_search(
+            "someURL", filterCriteria=filterCriteria, pagination="keyset", workers=4)
+
+        self.assertEqual(
+            json.loads(resp.decode()),
+            [{"encodedKey": "k1"}, {"encodedKey": "k2"}, {"encodedKey": "k3"}])
+        self.assertEqual(
+            mock_requests.Session().request.call_args_list,
+            [
+                mock.call(
+                    "POST",
+                    "https://{}/api/someURL:search".format(apiurl),
+                    params={"paginationDetails": "OFF", "detailsLevel": "BASIC",
+                            "limit": 2},
+                    data=json.dumps({
+                        "filterCriteria": filterCriteria,
+                        "sortingCriteria": {"field": "encodedKey", "order": "ASC"}}),
+                    headers=headers),
+                mock.call(
+                    "POST",
+                    "https://{}/api/someURL:search".format(apiurl),
+                    params={"paginationDetails": "OFF", "detailsLevel": "BASIC",
+                            "limit": 2},
+                    data=json.dumps({
+                        "filterCriteria": filterCriteria + [
+                            {"field": "encodedKey", "operator": "MORE_THAN",
+                             "value": "k2"}],
+                        "sortingCriteria": {"field": "encodedKey", "order": "ASC"}}),
+                    headers=headers),
+            ])
+
+        # ties on the sorting field, decoded, limited
+        mock_requests.Session().request.reset_mock()
+        mock_requests.Session().request.side_effect = [
+            mock.Mock(status_code=200, content=json.dumps([
+                {"encodedKey": "k1", "creationDate": "2024-01-01"},
+                {"encodedKey": "k2", "creationDate": "2024-01-02"},
+            ]).encode()),
+            mock.Mock(status_code=200, content=json.dumps([
+                {"encodedKey": "k2", "creationDate": "2024-01-02"},
+                {"encodedKey": "k3", "creationDate": "2024-01-02"},
+            ]).encode()),
+        ]
+        resp = mcrest.mambu_search(
+            "someURL",
+            sortingCriteria={"field": "creationDate", "order": "ASC"},
+            limit=3,
+            pagination="keyset",
+            decode=True)
+        self.assertEqual([elem["encodedKey"] for elem in resp], ["k1", "k2", "k3"])
+        self.assertEqual(
+            json.loads(mock_requests.Session().request.call_args[1]["data"])[
+                "filterCriteria"],
+            [{"field": "creationDate", "operator": "AFTER", "value": "2024-01-01"}])
+        self.assertEqual(
+            mock_requests.Session().request.call_args[1]["params"]["limit"], 2)
+
+        # iterating
+        mock_requests.Session().request.reset_mock()
+        mock_requests.Session().request.side_effect = [
+            mock.Mock(status_code=200,
+                      content=b'[{"encodedKey": "k1"}, {"encodedKey": "k2"}]'),
+            mock.Mock(status_code=200, content=b"[]"),
+        ]
+        pages = mcrest.mambu_iter_pages("someURL", search=True, pagination="keyset")
+        self.assertEqual(list(pages), [[{"encodedKey": "k1"}, {"encodedKey": "k2"}]])
+
+        rest.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 50
+
+        with self.assertRaisesRegex(MambuPyError, r"^pagination must be in"):
+            mcrest.mambu_search("someURL", pagination="cursor")
+        with self.assertRaisesRegex(MambuPyError, r"^offset is not allowed"):
+            mcrest.mambu_search("someURL", offset=10, pagination="keyset")
+        with self.assertRaisesRegex(MambuPyError, r"^keyset pagination is only"):
+            mcrest.mambu_iter_pages("someURL", pagination="keyset")
+
     @mock.patch("MambuPy.api.connector.rest.requests")
     def test_mambu_get_documents_metadata(self, mock_requests):
         mock_requests.Session().request().status_code = 200
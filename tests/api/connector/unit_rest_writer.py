@@ -8,7 +8,7 @@ import mock
 
 sys.path.insert(0, os.path.abspath("."))
 
-from MambuPy.api.connector import rest
+from MambuPy.api.connector import cache, rest
 from MambuPy.mambuutil import MAX_UPLOAD_SIZE, MambuError, apiurl
 
 from unit_rest import app_default_headers, app_json_headers
@@ -533,6 +533,45 @@ class MambuConnectorWriterREST(unittest.TestCase):
             headers=mcrest._headers
         )
 
+    @mock.patch("MambuPy.api.connector.rest.get_response_cache")
+    @mock.patch("MambuPy.api.connector.rest.MambuConnectorREST._request")
+    def test_writes_invalidate_cache(self, mock_request, mock_get_cache):
+        response_cache = cache.ResponseCache(
+            maxsize=10, ttls={"branches": 60, "loans": 60})
+        mock_get_cache.return_value = response_cache
+        mcrest = rest.MambuConnectorREST()
+
+        writes = [
+            ("branches", lambda: mcrest.mambu_update("B1", "branches", {})),
+            ("branches", lambda: mcrest.mambu_create("branches", {})),
+            ("branches", lambda: mcrest.mambu_patch(
+                "B1", "branches", [("REMOVE", "/name")])),
+            ("branches", lambda: mcrest.mambu_delete("B1", "branches")),
+            ("branches", lambda: mcrest.mambu_change_state(
+                "B1", "branches", "APPROVE", "")),
+            ("loans", lambda: mcrest.mambu_loanaccount_writeoff("L1", "")),
+            ("loans", lambda: mcrest.mambu_make_disbursement(
+                "L1", "", "2024-01-01", "2024-01-01", [])),
+            ("loans", lambda: mcrest.mambu_make_repayment(
+                "L1", 1, "", "2024-01-01", [], [])),
+            ("loans", lambda: mcrest.mambu_make_fee("L1", 1, 1, "", "2024-01-01", [])),
+            ("loans", lambda: mcrest.mambu_loantransaction_adjust("T1", "")),
+        ]
+        for prefix, write in writes:
+            response_cache.set("branches", "branch", b"{}")
+            response_cache.set("loans", "loan", b"{}")
+            write()
+            self.assertIsNone(response_cache.get(prefix[:-1]))
+            self.assertEqual(response_cache.stats()["size"], 1)
+        self.assertEqual(mock_request.call_count, len(writes))
+
+        # invalidated even if the write fails
+        response_cache.set("branches", "branch", b"{}")
+        mock_request.side_effect = MambuError("failed")
+        with self.assertRaises(MambuError):
+            mcrest.mambu_update("B1", "branches", {})
+        self.assertIsNone(response_cache.get("branch"))
+
 
 if __name__ == "__main__":
     unittest.main()
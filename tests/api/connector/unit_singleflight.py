@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.abspath("."))
+
+from MambuPy.api.connector import singleflight
+
+
+class SingleFlightTests(unittest.TestCase):
+    def setUp(self):
+        self.group = singleflight.SingleFlight()
+
+    def test_do(self):
+        self.assertEqual(self.group.do("key", lambda x: x * 2, 21), (42, False))
+        self.assertEqual(self.group.do("key", lambda: 1), (1, False))
+        self.assertEqual(
+            self.group.stats(), {"calls": 2, "collapsed": 0, "in_flight": 0})
+
+    def test_do_concurrent(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "response"
+
+        results = []
+
+        def call():
+            results.append(self.group.do("key", slow))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        waiters = [threading.Thread(target=call) for _ in range(4)]
+        for waiter in waiters:
+            waiter.start()
+        while self.group.stats()["collapsed"] < 4:
+            pass
+        # other keys are not collapsed
+        self.assertEqual(self.group.do("other", lambda: "other"), ("other", False))
+        release.set()
+        for thread in [leader] + waiters:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results.count(("response", True)), 5)
+        self.assertEqual(
+            self.group.stats(), {"calls": 2, "collapsed": 4, "in_flight": 0})
+
+    def test_do_error(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise ValueError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                self.group.do("key", failing)
+            except ValueError as ex:
+                errors.append(str(ex))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        while self.group.stats()["collapsed"] < 1:
+            pass
+        release.set()
+        leader.join()
+        waiter.join()
+
+        self.assertEqual(errors, ["boom", "boom"])
+        self.assertEqual(self.group.stats()["in_flight"], 0)
+
+    def test_reset(self):
+        self.group.do("key", lambda: 1)
+        self.group.reset()
+        self.assertEqual(
+            self.group.stats(), {"calls": 0, "collapsed": 0, "in_flight": 0})
+
+    def test_get_single_flight(self):
+        self.assertIs(singleflight.get_single_flight(), singleflight.get_single_flight())
+        self.assertIsInstance(singleflight.get_single_flight(), singleflight.SingleFlight)
+
+
+if __name__ == "__main__":
+    unittest.main()
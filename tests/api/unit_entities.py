@@ -1,4 +1,5 @@
 from datetime import datetime
+import asyncio
 import os
 import sys
 import unittest
@@ -7,19 +8,10 @@ import mock
 
 sys.path.insert(0, os.path.abspath("."))
 
-from MambuPy.api import entities
+from MambuPy.api import entities, session
 from MambuPy.mambuutil import MambuError, MambuPyError
 
 
-class mock_mambucustomfieldset:
-    def __init__(self, id, customFields=None):
-        self.id = id
-        if not customFields:
-            self.customFields = []
-        else:
-            self.customFields = customFields
-
-
 class MambuConnectorTests(unittest.TestCase):
     @mock.patch("MambuPy.api.entities.MambuConnectorREST")
     def test_has_mambuconnector(self, mock_mcrest):
@@ -57,8 +49,8 @@ class MambuEntityTests(unittest.TestCase):
         with mock.patch(
                 "MambuPy.api.mambucustomfield.MambuCustomFieldSet"
         ) as mock_mcf:
+            mock_mcf.get_field_paths.return_value = {}
             me = entities.MambuEntity()
-            me._mcfs = []
             me.aField = ""
 
             # default: event if not in attrs, returns /fieldname
@@ -86,19 +78,18 @@ class MambuEntityTests(unittest.TestCase):
             )
 
             # when a CF in a set, returns its path
-            mock_mcf.get_all.return_value = [
-                mock_mambucustomfieldset(
-                    "_otherCFSet",
-                    [{"id": "someAttrs"}, {"id": "otherAttrs"}, ]),
-                mock_mambucustomfieldset("_myCFSet", [{"id": "myAttrs"}])
-            ]
+            mock_mcf.get_field_paths.return_value = {
+                "someAttrs": "/_otherCFSet/someAttrs",
+                "myAttrs": "/_myCFSet/myAttrs",
+            }
             me = entities.MambuEntity()
             me._ownerType = "MyType"
             me._attrs = {"myAttrs": "myProp"}
             me._cf_class = entities.MambuEntityCF
             self.assertEqual(
                 me._extract_field_path("myAttrs"), "/_myCFSet/myAttrs")
-            mock_mcf.get_all.assert_called_once_with(availableFor="MyType")
+            mock_mcf.get_field_paths.assert_called_with(
+                "MyType", connector=me._connector)
 
     @mock.patch("MambuPy.api.entities.print")
     @mock.patch("MambuPy.api.entities.MambuConnectorREST")
@@ -138,9 +129,18 @@ class MambuEntityTests(unittest.TestCase):
         self.assertEqual(ms[3].__class__.__name__, "child_class")
         self.assertEqual(ms[3]._attrs, {"encodedKey": "jkl012", "id": "09876"})
         self.assertEqual(list(ms[3]._tzattrs.keys()), ["encodedKey", "id"])
+        # each instance with its own state, _resp serialized on demand
+        self.assertIsNot(ms[0]._attrs, ms[1]._attrs)
+        self.assertIsNot(ms[0]._tzattrs, ms[1]._tzattrs)
+        self.assertIsNone(ms[0]._resp_content)
+        self.assertEqual(
+            ms[0]._resp, b'{"encodedKey": "abc123", "id": "12345"}')
+        ms[0]._resp = b"{}"
+        self.assertEqual(ms[0]._resp, b"{}")
 
         mock_func.assert_called_with(
             "un_prefix",
+            decode=True,
             detailsLevel="BASIC",
         )
         self.assertEqual(mock_convertDict2Attrs.call_count, 4)
@@ -159,6 +159,7 @@ class MambuEntityTests(unittest.TestCase):
                "debug": True})
         mock_func.assert_called_with(
             "something else",
+            decode=True,
             detailsLevel="BASIC"
         )
         mock_print.assert_any_call(
@@ -172,17 +173,18 @@ class MambuEntityTests(unittest.TestCase):
         self.assertGreater(len(timing_calls), 0, "Expected timing print call not found")
         for elem in elems:
             elem._assignEntObjs.assert_called_with(
-                [], "BASIC", True, debug=True)
+                [], "BASIC", True, debug=True, prefetched={})
 
         entities.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 5
         self.child_class._get_several(
             mock_func, mock_connector_rest.return_value, detailsLevel="FULL")
-        mock_func.assert_called_with("un_prefix", detailsLevel="FULL")
+        mock_func.assert_called_with(
+            "un_prefix", decode=True, detailsLevel="FULL")
 
         self.child_class._get_several(
             mock_func, mock_connector_rest.return_value, offset=20, limit=2)
         mock_func.assert_called_with(
-            "un_prefix", offset=20, limit=2, detailsLevel="BASIC"
+            "un_prefix", decode=True, offset=20, limit=2, detailsLevel="BASIC"
         )
 
         mock_func.reset_mock()
@@ -197,10 +199,49 @@ class MambuEntityTests(unittest.TestCase):
         self.child_class._get_several(
             mock_func, mock_connector_rest.return_value, limit=4)
         self.assertEqual(mock_func.call_count, 1)
-        mock_func.assert_called_with("un_prefix", limit=4, detailsLevel="BASIC")
+        mock_func.assert_called_with(
+            "un_prefix", decode=True, limit=4, detailsLevel="BASIC")
 
         entities.OUT_OF_BOUNDS_PAGINATION_LIMIT_VALUE = 1000
 
+        # a decoded list responded by get_func
+        mock_func.reset_mock()
+        mock_func.side_effect = None
+        mock_func.return_value = [{"encodedKey": "abc123", "id": "12345"}]
+        ms = self.child_class._get_several(
+            mock_func, mock_connector_rest.return_value)
+        self.assertEqual(len(ms), 1)
+        self.assertEqual(ms[0]._attrs, {"encodedKey": "abc123", "id": "12345"})
+
+    @mock.patch("MambuPy.api.entities.MambuConnectorREST")
+    @mock.patch("MambuPy.api.mambustruct.MambuStruct._convertDict2Attrs")
+    def test__get_several_lazy(self, mock_convertDict2Attrs, mock_connector_rest):
+        mock_func = mock.Mock()
+        mock_func.return_value = [{"encodedKey": "abc123", "id": "12345", "num": "1"}]
+
+        ms = self.child_class._get_several(
+            mock_func, mock_connector_rest.return_value, lazy=True)
+        mock_func.assert_called_with("un_prefix", decode=True, detailsLevel="BASIC")
+        mock_convertDict2Attrs.assert_not_called()
+        self.assertEqual(ms[0]._lazy_keys, {"encodedKey", "id", "num"})
+        self.assertEqual(ms[0].num, 1)
+        self.assertEqual(ms[0]._lazy_keys, {"encodedKey", "id"})
+        self.assertEqual(mock_func.return_value[0]["num"], "1")
+
+        # the class may default to lazy
+        self.child_class._lazy = True
+        ms = self.child_class._get_several(
+            mock_func, mock_connector_rest.return_value)
+        mock_convertDict2Attrs.assert_not_called()
+        self.assertEqual(ms[0]._lazy_keys, {"encodedKey", "id", "num"})
+
+        # but not when instantiating other entities
+        ms = self.child_class._get_several(
+            mock_func, mock_connector_rest.return_value, get_entities=True)
+        mock_convertDict2Attrs.assert_called_once_with()
+        self.assertEqual(ms[0]._lazy_keys, frozenset())
+        del self.child_class._lazy
+
     @mock.patch("MambuPy.api.entities.print")
     @mock.patch("MambuPy.api.entities.MambuConnectorREST")
     @mock.patch("MambuPy.api.mambustruct.MambuStruct._convertDict2Attrs")
@@ -245,7 +286,129 @@ class MambuEntityTests(unittest.TestCase):
             ms._attrs["id"] +
             " 0:0:0.0")
         ms._assignEntObjs.assert_called_with(
-            [], "BASIC", True, debug=True)
+            [], "BASIC", True, debug=True, prefetched={})
+
+    @mock.patch("MambuPy.api.entities.MambuConnectorREST")
+    def test_get_session(self, mock_connector_rest):
+        mock_connector = mock_connector_rest.return_value
+        mock_connector.mambu_get.return_value = b'{"encodedKey":"abc123","id":"12345"}'
+
+        with session.mambupy_session() as idmap:
+            ms = self.child_class.get("12345")
+            self.assertIs(self.child_class.get("12345"), ms)
+            self.assertIs(self.child_class.get("abc123"), ms)
+            self.assertIsNot(self.child_class.get("12345", "FULL"), ms)
+        self.assertEqual(mock_connector.mambu_get.call_count, 2)
+        self.assertEqual(idmap.hits, 2)
+        self.assertEqual(idmap.misses, 2)
+
+        # outside of the session, always requested
+        self.assertIsNot(self.child_class.get("12345"), ms)
+        self.assertEqual(mock_connector.mambu_get.call_count, 3)
+
+    def test_get_many(self):
+        # not searchable, one get per distinct id
+        def get(entid, **kwargs):
+            if entid == "missing":
+                raise MambuError("not found")
+            return {"id": entid}
+
+        with mock.patch.object(self.child_class, "get", side_effect=get) as mock_get:
+            ents = self.child_class.get_many(
+                ["12345", "missing", "67890", "12345"], detailsLevel="FULL")
+        self.assertEqual(
+            ents, [{"id": "12345"}, None, {"id": "67890"}, {"id": "12345"}])
+        self.assertIs(ents[0], ents[3])
+        self.assertEqual(mock_get.call_count, 3)
+        mock_get.assert_any_call(
+            "67890", detailsLevel="FULL", get_entities=False, debug=False)
+
+        # searchable, by id and then by encodedKey
+        class searchable_child(self.child_class):
+            search = mock.Mock()
+
+        searchable_child.search.side_effect = [
+            [{"id": "12345", "encodedKey": "abc123"}],
+            [{"id": "67890", "encodedKey": "def456"}],
+        ]
+        with mock.patch.object(searchable_child, "get") as mock_get:
+            ents = searchable_child.get_many(["def456", "missing", "12345"])
+        self.assertEqual(
+            ents,
+            [{"id": "67890", "encodedKey": "def456"},
+             None,
+             {"id": "12345", "encodedKey": "abc123"}])
+        mock_get.assert_not_called()
+        searchable_child.search.assert_any_call(
+            filterCriteria=[{
+                "field": "id", "operator": "IN",
+                "values": ["def456", "missing", "12345"]}],
+            limit=3, detailsLevel="BASIC", get_entities=False, debug=False)
+        searchable_child.search.assert_called_with(
+            filterCriteria=[{
+                "field": "encodedKey", "operator": "IN",
+                "values": ["def456", "missing"]}],
+            limit=2, detailsLevel="BASIC", get_entities=False, debug=False)
+
+        # searchable, search not supported, one get per id
+        searchable_child.search.side_effect = MambuError("not supported")
+        with mock.patch.object(searchable_child, "get", side_effect=get) as mock_get:
+            ents = searchable_child.get_many(["12345", "missing"])
+        self.assertEqual(ents, [{"id": "12345"}, None])
+        self.assertEqual(mock_get.call_count, 2)
+
+    @mock.patch("MambuPy.api.entities.MambuConnectorRESTAsync")
+    @mock.patch("MambuPy.api.mambustruct.MambuStruct._convertDict2Attrs")
+    @mock.patch("MambuPy.api.mambustruct.MambuStruct._extractCustomFields")
+    @mock.patch("MambuPy.api.mambustruct.MambuStruct._extractVOs")
+    def test_get_async(
+        self,
+        mock_extractVOs, mock_extractCustomFields, mock_convertDict2Attrs,
+        mock_connector_rest_async
+    ):
+        async def response():
+            return b'{"encodedKey":"abc123","id":"12345"}'
+
+        mock_connector = mock_connector_rest_async.return_value
+        mock_connector.mambu_get.side_effect = lambda *args, **kwargs: response()
+
+        ms = asyncio.run(self.child_class.get_async("12345", "FULL", url="myurl"))
+
+        self.assertEqual(ms.__class__.__name__, "child_class")
+        self.assertEqual(ms._attrs, {"encodedKey": "abc123", "id": "12345"})
+        self.assertEqual(ms._detailsLevel, "FULL")
+        self.assertEqual(ms._connector, mock_connector.sync_connector.return_value)
+        mock_connector_rest_async.assert_called_with(url="myurl")
+        mock_connector.mambu_get.assert_called_with(
+            "12345", prefix="un_prefix", detailsLevel="FULL"
+        )
+        # async mode does not leak to synchronous calls
+        self.assertFalse(entities._async_mode.get())
+
+    @mock.patch("MambuPy.api.entities.MambuConnectorRESTAsync")
+    def test_get_all_async(self, mock_connector_rest_async):
+        async def response():
+            return b"""[
+            {"encodedKey":"abc123","id":"12345"},
+            {"encodedKey":"def456","id":"67890"}
+            ]"""
+
+        mock_connector = mock_connector_rest_async.return_value
+        mock_connector.mambu_get_all.side_effect = (
+            lambda *args, **kwargs: response())
+
+        ms = asyncio.run(self.child_class.get_all_async(limit=2))
+
+        self.assertEqual(len(ms), 2)
+        self.assertEqual(ms[0]._attrs, {"encodedKey": "abc123", "id": "12345"})
+        self.assertEqual(ms[1]._attrs, {"encodedKey": "def456", "id": "67890"})
+        self.assertEqual(
+            ms[0]._connector, mock_connector.sync_connector.return_value)
+        mock_connector.mambu_get_all.assert_called_with(
+            "un_prefix",
+            decode=True,
+            filters=None, offset=None, limit=2,
+            paginationDetails="OFF", detailsLevel="BASIC", sortBy=None)
 
     @mock.patch("MambuPy.api.mambustruct.MambuStruct._convertDict2Attrs")
     @mock.patch("MambuPy.api.mambustruct.MambuStruct._extractCustomFields")
@@ -303,6 +466,111 @@ class MambuEntityTests(unittest.TestCase):
         self.assertEqual(ms[1].__class__.__name__, "child_class")
         self.assertEqual(ms[1]._attrs, {"encodedKey": "def456", "id": "67890"})
 
+    @mock.patch("MambuPy.api.entities.MambuConnectorREST")
+    def test_iter_all(self, mock_connector_rest):
+        mock_connector = mock_connector_rest.return_value
+        mock_connector.mambu_iter_pages.return_value = iter([
+            [{"encodedKey": "abc123", "id": "12345"}],
+            [{"encodedKey": "def456", "id": "67890"}],
+        ])
+
+        ms = self.child_class.iter_all(limit=2, detailsLevel="FULL")
+
+        mock_connector.mambu_get_all.assert_not_called()
+        mock_connector.mambu_iter_pages.assert_called_once_with(
+            "un_prefix",
+            search=False,
+            filters=None,
+            offset=None,
+            limit=2,
+            paginationDetails="OFF",
+            detailsLevel="FULL",
+            sortBy=None)
+        self.assertEqual(next(ms)._attrs, {"encodedKey": "abc123", "id": "12345"})
+        elem = next(ms)
+        self.assertEqual(elem.__class__.__name__, "child_class")
+        self.assertEqual(elem._attrs, {"encodedKey": "def456", "id": "67890"})
+        self.assertEqual(elem._detailsLevel, "FULL")
+        with self.assertRaises(StopIteration):
+            next(ms)
+
+        # iterating mode does not leak to get_all
+        self.assertFalse(entities._iter_mode.get())
+        with self.assertRaisesRegex(MambuPyError, r"^key \w+ not in allowed "):
+            self.child_class.iter_all(filters={"Squad": "Red"})
+
+    @mock.patch("MambuPy.api.entities._partition_values")
+    @mock.patch("MambuPy.api.entities.MambuConnectorREST")
+    def test_get_all_partitioned(self, mock_connector_rest, mock_partition_values):
+        def mambu_get_all(prefix, filters, **kwargs):
+            return [
+                {"encodedKey": "{}{}".format(filters["branchId"], i), "id": str(i)}
+                for i in range(2)
+            ]
+
+        mock_connector = mock_connector_rest.return_value
+        mock_connector.mambu_get_all.side_effect = mambu_get_all
+        mock_connector.mambu_iter_pages.side_effect = (
+            lambda prefix, search, **kwargs: iter([mambu_get_all(prefix, **kwargs)])
+        )
+        mock_partition_values.return_value = ["B1", "B2", "B3"]
+        self.child_class._filter_keys = ["branchId", "accountState"]
+
+        ms = self.child_class.get_all(
+            filters={"accountState": "ACTIVE"},
+            partition_by="branchId",
+            workers=3,
+            user="myuser", pwd="mypwd", url="myurl")
+
+        self.assertEqual(
+            [m._attrs["encodedKey"] for m in ms],
+            ["B10", "B11", "B20", "B21", "B30", "B31"])
+        mock_partition_values.assert_called_once_with(
+            "branchId", user="myuser", pwd="mypwd", url="myurl")
+        mock_connector_rest.assert_called_with(
+            user="myuser", pwd="mypwd", url="myurl")
+        self.assertEqual(mock_connector.mambu_get_all.call_count, 3)
+        for call in mock_connector.mambu_get_all.call_args_list:
+            self.assertEqual(call[1]["filters"]["accountState"], "ACTIVE")
+            self.assertNotIn("workers", call[1])
+
+        # given partitions, limited
+        ms = self.child_class.get_all(
+            partition_by="branchId", partitions=["B2", "B1"], limit=3)
+        self.assertEqual([m._attrs["encodedKey"] for m in ms], ["B20", "B21", "B10"])
+        self.assertEqual(mock_partition_values.call_count, 1)
+        self.assertEqual(self.child_class.get_all(partition_by="branchId", partitions=[]), [])
+
+        # iterating, lazily
+        mock_connector.mambu_get_all.reset_mock()
+        ms = self.child_class.iter_all(
+            partition_by="branchId", partitions=["B1", "B2"], limit=3)
+        mock_connector.mambu_iter_pages.assert_not_called()
+        self.assertEqual([m._attrs["encodedKey"] for m in ms], ["B10", "B11", "B20"])
+        self.assertEqual(mock_connector.mambu_iter_pages.call_count, 2)
+        mock_connector.mambu_get_all.assert_not_called()
+
+        with self.assertRaisesRegex(MambuPyError, r"^key Squad not in allowed "):
+            self.child_class.get_all(partition_by="Squad")
+        with self.assertRaisesRegex(MambuPyError, r"^branchId is both a filter"):
+            self.child_class.get_all(filters={"branchId": "B1"}, partition_by="branchId")
+        with self.assertRaisesRegex(MambuPyError, r"^offset is not allowed"):
+            self.child_class.get_all(offset=10, partition_by="branchId")
+        with self.assertRaisesRegex(MambuPyError, r"^partition_by is not allowed"):
+            asyncio.run(self.child_class.get_all_async(partition_by="branchId"))
+
+    @mock.patch("mambupy.api.mambubranch.MambuBranch.get_all")
+    def test__partition_values(self, mock_get_all):
+        mock_get_all.return_value = [{"id": "B1"}, {"id": "B2"}]
+        self.assertEqual(
+            entities._partition_values("branchId", user="myuser"), ["B1", "B2"])
+        mock_get_all.assert_called_once_with(user="myuser")
+
+        with self.assertRaisesRegex(
+            MambuPyError, r"^values of accountState can't be enumerated"
+        ):
+            entities._partition_values("accountState")
+
     @mock.patch("MambuPy.api.entities.MambuEntity._get_several")
     def test_get_all_filters_n_sortby(self, mock_get_several):
         mock_get_several.return_value = "SupGetSeveral"
@@ -342,6 +610,104 @@ class MambuEntityTests(unittest.TestCase):
             hello="world")
 
 
+class ResolveEntitiesTests(unittest.TestCase):
+    @mock.patch("MambuPy.api.mambustruct.import_module")
+    def test__resolve_entities(self, mock_import):
+        searchable = mock_import.return_value.MambuSearchable
+        searchable.__name__ = "MambuSearchable"
+        searchable.search.return_value = [{"encodedKey": "ek1"}]
+        searchable.get.return_value = {"encodedKey": "ek2"}
+        getter = mock_import.return_value.MambuGetter
+        del getter.search
+        getter.get.side_effect = [TypeError(""), {"encodedKey": "ek3"}]
+
+        instances = []
+        for ek in ["ek1", "ek2", "ek1"]:
+            ms = entities.MambuStruct()
+            ms._entities = [
+                ("srch_key", "mod.MambuSearchable", "srch"),
+                ("get_key", "mod.MambuGetter", "getter"),
+            ]
+            ms._attrs = {"srch_key": ek, "get_key": "ek3"}
+            instances.append(ms)
+
+        entities._resolve_entities(instances, "FULL", True, debug=False)
+
+        searchable.search.assert_called_once_with(
+            filterCriteria=[
+                {"field": "encodedKey", "operator": "IN", "values": ["ek1", "ek2"]}
+            ],
+            limit=2,
+            detailsLevel="FULL",
+            get_entities=True,
+            debug=False,
+        )
+        searchable.get.assert_called_once_with(
+            "ek2", detailsLevel="FULL", get_entities=True, debug=False)
+        self.assertEqual(getter.get.call_count, 2)
+        getter.get.assert_called_with("ek3", get_entities=True, debug=False)
+        self.assertEqual(instances[0].srch, {"encodedKey": "ek1"})
+        self.assertEqual(instances[1].srch, {"encodedKey": "ek2"})
+        self.assertIs(instances[0].srch, instances[2].srch)
+        self.assertIs(instances[0].getter, instances[1].getter)
+        self.assertIs(instances[0].getter, instances[2].getter)
+
+        # chunked searches, failed searches fallback to get
+        searchable.reset_mock()
+        searchable.search.side_effect = MambuError("not supported")
+        searchable.get.side_effect = lambda ek, **kwargs: ek
+        instances = []
+        for ek in ["ek1", "ek2", "ek3"]:
+            ms = entities.MambuStruct()
+            ms._entities = [("srch_key", "mod.MambuSearchable", "srch")]
+            ms._attrs = {"srch_key": ek}
+            instances.append(ms)
+
+        with mock.patch("MambuPy.api.entities.BULK_CHUNK_SIZE", 2):
+            entities._resolve_entities(instances)
+
+        self.assertEqual(searchable.search.call_count, 2)
+        self.assertEqual(searchable.get.call_count, 3)
+        self.assertEqual([ms.srch for ms in instances], ["ek1", "ek2", "ek3"])
+
+        # entities in the identity map of the session are not searched
+        searchable.reset_mock()
+        searchable.search.side_effect = None
+        searchable.search.return_value = [{"encodedKey": "ek2"}]
+        searchable.__module__ = "MambuPy.api.mambustruct"
+        searchable.__name__ = "MambuStruct"
+        cached = entities.MambuStruct()
+        cached._attrs = {"encodedKey": "ek1"}
+        with session.mambupy_session() as idmap:
+            idmap.add(cached, "BASIC", True)
+            entities._resolve_entities(instances[:2])
+        searchable.search.assert_called_once_with(
+            filterCriteria=[
+                {"field": "encodedKey", "operator": "IN", "values": ["ek2"]}
+            ],
+            limit=1,
+            detailsLevel="BASIC",
+            get_entities=True,
+            debug=False,
+        )
+        self.assertIs(instances[0].srch, cached)
+        self.assertEqual(idmap.hits, 1)
+
+    def test__resolve_entities_unresolvable(self):
+        ms = entities.MambuStruct()
+        ms._entities = [
+            ("empty_key", "", "empty"),
+            ("missing_key", "mambuclient.MambuNope", "missing"),
+        ]
+        ms._attrs = {"empty_key": "ek1", "missing_key": "ek2"}
+        self.assertEqual(ms._entObjsKeys(), [("mambuclient.MambuNope", "ek2")])
+
+        entities._resolve_entities([ms])
+
+        self.assertIsNone(ms.empty)
+        self.assertIsNone(ms.missing)
+
+
 class MambuEntityCFTests(unittest.TestCase):
     def test___init__(self):
         ms = entities.MambuEntityCF("_VALUE_")
@@ -372,7 +738,7 @@ class MambuEntityCFTests(unittest.TestCase):
 
     @mock.patch("MambuPy.api.entities.import_module")
     def test_get_mcf(self, mock_import_module):
-        mock_import_module().MambuCustomField.get.return_value = "My_MambuCF"
+        mock_import_module().MambuCustomField.get_registered.return_value = "My_MambuCF"
 
         ms = entities.MambuEntityCF("_VALUE_", "_a_cf_set/_a_cf", "STANDARD")
 
@@ -380,23 +746,26 @@ class MambuEntityCFTests(unittest.TestCase):
 
         self.assertEqual(ms._attrs["mcf"], "My_MambuCF")
         mock_import_module.assert_called_with("MambuPy.api.mambucustomfield")
-        mock_import_module().MambuCustomField.get.assert_called_with("_a_cf")
-        self.assertEqual(mock_import_module().MambuCustomField.get.call_count, 1)
+        mock_import_module().MambuCustomField.get_registered.assert_called_with(
+            "_a_cf", connector=None)
+        self.assertEqual(mock_import_module().MambuCustomField.get_registered.call_count, 1)
 
         ms.get_mcf()
-        self.assertEqual(mock_import_module().MambuCustomField.get.call_count, 1)
+        self.assertEqual(mock_import_module().MambuCustomField.get_registered.call_count, 1)
 
-        mock_import_module().MambuCustomField.get.side_effect = [
+        mock_import_module().MambuCustomField.get_registered.side_effect = [
             "Other_MambuCF",
             MambuError,
         ]
         ms = entities.MambuEntityCF(
             [{"_KEY_": "_VALUE_", "_OTHER_": "_VAL_", "_index": 0}], "_a_cf_set/_a_cf", "GROUPED"
         )
-        ms.get_mcf()
+        ms.get_mcf(connector="a_connector")
         self.assertEqual(ms._attrs["mcf"], {"_KEY_": "Other_MambuCF", "_OTHER_": None, "_index": None})
+        mock_import_module().MambuCustomField.get_registered.assert_called_with(
+            "_OTHER_", connector="a_connector")
 
-        mock_import_module().MambuCustomField.get.side_effect = [
+        mock_import_module().MambuCustomField.get_registered.side_effect = [
             "Other_MambuCF",
             MambuError,
             "AnOther_MambuCF",
@@ -1,5 +1,7 @@
+import json
 import os
 import sys
+import tempfile
 import unittest
 
 import mock
@@ -19,6 +21,115 @@ class MambuCustomField(unittest.TestCase):
         mcf = mambucustomfield.MambuCustomField()
         self.assertEqual(mcf._prefix, "customfields")
 
+    @mock.patch("MambuPy.api.mambucustomfield.time")
+    @mock.patch("MambuPy.api.mambucustomfield.MambuConnectorREST")
+    @mock.patch("MambuPy.api.entities.MambuConnectorREST")
+    @mock.patch("MambuPy.api.mambucustomfield.MambuCustomField.get")
+    @mock.patch("MambuPy.api.mambucustomfield.MambuCustomField.get_all")
+    def test_registry(
+        self, mock_get_all, mock_get, mock_connector, mock_mcf_connector, mock_time
+    ):
+        mcf_class = mambucustomfield.MambuCustomField
+        mcf_class.clear_registry()
+        mock_time.monotonic.return_value = 1000
+        scope = mock_connector.return_value._credentials_key.return_value
+        mock_mcf_connector.return_value._credentials_key.return_value = scope
+        mock_get.return_value = mcf_class._build_from_json([{"id": "aCF"}])[0]
+
+        # a new instance on each call
+        self.assertIs(mcf_class.get_registered("aCF"), mock_get.return_value)
+        mock_get.assert_called_once_with("aCF")
+        mcf = mcf_class.get_registered("aCF")
+        self.assertIsNot(mcf, mock_get.return_value)
+        self.assertEqual(mcf._attrs, {"id": "aCF"})
+        mcf.id = "modified"
+        self.assertEqual(mcf_class.get_registered("aCF").id, "aCF")
+        self.assertEqual(mock_get.call_count, 1)
+
+        mock_get_all.return_value = mcf_class._build_from_json(
+            [{"id": "bCF"}, {"id": "cCF"}])
+        self.assertEqual(mcf_class.preload_registry(limit=5), 2)
+        mock_get_all.assert_called_once_with(limit=5)
+        self.assertEqual(mcf_class.get_registered("cCF").id, "cCF")
+        self.assertEqual(mock_get.call_count, 1)
+
+        # snapshots
+        mcf_class.clear_registry()
+        mcfs = mcf_class._build_from_json(
+            [{"id": "aCF", "type": "CLIENT_LINK"}, {"id": "bCF", "type": "FREE_TEXT"}]
+        )
+        mcf_class.register(mcfs)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "customfields.json")
+            mcf_class.save_registry(path)
+            with open(path) as snapshot:
+                self.assertEqual(
+                    json.load(snapshot),
+                    [{"id": "aCF", "type": "CLIENT_LINK"}, {"id": "bCF", "type": "FREE_TEXT"}])
+
+            mcf_class.clear_registry()
+            self.assertEqual(mcf_class.load_registry(path), 2)
+        mcf = mcf_class.get_registered("aCF")
+        self.assertIsInstance(mcf, mcf_class)
+        self.assertEqual(mcf.type, "CLIENT_LINK")
+        self.assertEqual(mock_get.call_count, 1)
+
+        # invalidated
+        mcf_class.clear_registry("aCF")
+        mcf_class.get_registered("bCF")
+        self.assertEqual(mock_get.call_count, 1)
+        mcf_class.get_registered("aCF")
+        self.assertEqual(mock_get.call_count, 2)
+        mcf_class.clear_registry()
+        mcf_class.get_registered("aCF")
+        self.assertEqual(mock_get.call_count, 3)
+
+        # expired
+        mock_time.monotonic.return_value = 1000 + mcf_class._registry_ttl
+        mcf_class.get_registered("aCF", user="someone", pwd="secret", url="mambu")
+        self.assertEqual(mock_get.call_count, 4)
+        mock_get.assert_called_with("aCF", user="someone", pwd="secret", url="mambu")
+        mock_mcf_connector.assert_called_with(user="someone", pwd="secret", url="mambu")
+
+        mcf_class.clear_registry()
+
+    @mock.patch("MambuPy.api.mambucustomfield.MambuCustomField.get")
+    def test_registry_by_tenant(self, mock_get):
+        mcf_class = mambucustomfield.MambuCustomField
+        mcf_class.clear_registry()
+        connectors = [mock.Mock(), mock.Mock()]
+        connectors[0]._credentials_key.return_value = ("tenant", "user")
+        connectors[1]._credentials_key.return_value = ("other tenant", "user")
+        connectors[0].mambu_get.return_value = b'{"id": "aCF", "type": "FREE_TEXT"}'
+        connectors[1].mambu_get.return_value = b'{"id": "aCF", "type": "CLIENT_LINK"}'
+
+        mcf = mcf_class.get_registered("aCF", connector=connectors[0])
+        self.assertEqual(mcf.type, "FREE_TEXT")
+        self.assertIs(mcf._connector, connectors[0])
+        connectors[0].mambu_get.assert_called_once_with("aCF", prefix="customfields")
+        mcf = mcf_class.get_registered("aCF", connector=connectors[1])
+        self.assertEqual(mcf.type, "CLIENT_LINK")
+        self.assertIs(mcf._connector, connectors[1])
+        connectors[1].mambu_get.assert_called_once_with("aCF", prefix="customfields")
+
+        # registered apart
+        self.assertEqual(
+            mcf_class.get_registered("aCF", connector=connectors[0]).type, "FREE_TEXT")
+        self.assertEqual(
+            mcf_class.get_registered("aCF", connector=connectors[1]).type, "CLIENT_LINK")
+        self.assertEqual(connectors[0].mambu_get.call_count, 1)
+        self.assertEqual(connectors[1].mambu_get.call_count, 1)
+        self.assertEqual(mock_get.call_count, 0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "customfields.json")
+            mcf_class.save_registry(path, connector=connectors[1])
+            with open(path) as snapshot:
+                self.assertEqual(
+                    json.load(snapshot), [{"id": "aCF", "type": "CLIENT_LINK"}])
+
+        mcf_class.clear_registry()
+
 
 class MambuCustomFieldSet(unittest.TestCase):
     def test_implements_interfaces(self):
@@ -60,6 +171,98 @@ class MambuCustomFieldSet(unittest.TestCase):
         ):
             mambucustomfield.MambuCustomFieldSet.get_all(sortBy="id:ASC")
 
+    @mock.patch("MambuPy.api.mambucustomfield.time")
+    @mock.patch("MambuPy.api.mambucustomfield.MambuCustomFieldSet.get_all")
+    def test_get_field_paths(self, mock_get_all, mock_time):
+        mcfs_class = mambucustomfield.MambuCustomFieldSet
+        mcfs_class.invalidate_cache()
+        mock_time.monotonic.return_value = 1000
+        cfsets = [mock.Mock(), mock.Mock()]
+        cfsets[0].id = "_otherCFSet"
+        cfsets[0].customFields = [{"id": "someAttrs"}, {"id": "myAttrs"}]
+        cfsets[1].id = "_myCFSet"
+        cfsets[1].customFields = [{"id": "myAttrs"}, {"id": "myOtherAttrs"}]
+        mock_get_all.return_value = cfsets
+
+        paths = mcfs_class.get_field_paths("CLIENT")
+        self.assertEqual(
+            paths,
+            {
+                "someAttrs": "/_otherCFSet/someAttrs",
+                "myAttrs": "/_otherCFSet/myAttrs",
+                "myOtherAttrs": "/_myCFSet/myOtherAttrs",
+            },
+        )
+        mock_get_all.assert_called_once_with(availableFor="CLIENT")
+
+        # cached, by owner type
+        self.assertIs(mcfs_class.get_field_paths("CLIENT"), paths)
+        self.assertEqual(mock_get_all.call_count, 1)
+        mcfs_class.get_field_paths("GROUP")
+        self.assertEqual(mock_get_all.call_count, 2)
+        mock_get_all.assert_called_with(availableFor="GROUP")
+
+        # expired
+        mock_time.monotonic.return_value = 1000 + mcfs_class._cache_ttl
+        mcfs_class.get_field_paths("CLIENT")
+        mcfs_class.get_field_paths("GROUP")
+        self.assertEqual(mock_get_all.call_count, 4)
+
+        # invalidated
+        mcfs_class.invalidate_cache("CLIENT")
+        mcfs_class.get_field_paths("GROUP")
+        self.assertEqual(mock_get_all.call_count, 4)
+        mcfs_class.get_field_paths("CLIENT")
+        self.assertEqual(mock_get_all.call_count, 5)
+        mcfs_class.invalidate_cache()
+        mcfs_class.get_field_paths("GROUP")
+        self.assertEqual(mock_get_all.call_count, 6)
+
+        # by tenant and user
+        mcfs_class.get_field_paths("GROUP", user="someone", pwd="secret")
+        self.assertEqual(mock_get_all.call_count, 7)
+        mock_get_all.assert_called_with(
+            availableFor="GROUP", user="someone", pwd="secret")
+        mcfs_class.get_field_paths("GROUP", user="someone", pwd="secret")
+        mcfs_class.get_field_paths("GROUP")
+        self.assertEqual(mock_get_all.call_count, 7)
+
+        mcfs_class.invalidate_cache()
+
+    @mock.patch("MambuPy.api.mambucustomfield.MambuCustomFieldSet._get_several")
+    def test_get_field_paths_connector(self, mock_get_several):
+        mcfs_class = mambucustomfield.MambuCustomFieldSet
+        mcfs_class.invalidate_cache()
+        connectors = [mock.Mock(), mock.Mock()]
+        connectors[0]._credentials_key.return_value = ("tenant", "user")
+        connectors[1]._credentials_key.return_value = ("other tenant", "user")
+        cfsets = [mock.Mock(), mock.Mock()]
+        cfsets[0].id = "_aCFSet"
+        cfsets[0].customFields = [{"id": "myAttrs"}]
+        cfsets[1].id = "_otherCFSet"
+        cfsets[1].customFields = [{"id": "myAttrs"}]
+        mock_get_several.side_effect = [[cfsets[0]], [cfsets[1]]]
+
+        self.assertEqual(
+            mcfs_class.get_field_paths("CLIENT", connector=connectors[0]),
+            {"myAttrs": "/_aCFSet/myAttrs"})
+        mock_get_several.assert_called_with(
+            connectors[0].mambu_get_all, connectors[0], availableFor="CLIENT")
+        self.assertEqual(
+            mcfs_class.get_field_paths("CLIENT", connector=connectors[1]),
+            {"myAttrs": "/_otherCFSet/myAttrs"})
+        mock_get_several.assert_called_with(
+            connectors[1].mambu_get_all, connectors[1], availableFor="CLIENT")
+
+        # cached apart
+        self.assertEqual(
+            mcfs_class.get_field_paths("CLIENT", connector=connectors[0]),
+            {"myAttrs": "/_aCFSet/myAttrs"})
+        self.assertEqual(mock_get_several.call_count, 2)
+
+        mcfs_class.invalidate_cache("CLIENT")
+        self.assertEqual(mcfs_class._cache, {})
+
 
 if __name__ == "__main__":
     unittest.main()
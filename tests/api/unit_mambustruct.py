@@ -204,6 +204,98 @@ class MambuStructTests(unittest.TestCase):
         for key, val in ms._attrs.items():
             self.assertEqual(val, data[key])
 
+    def test__convertDict2Attrs_plan(self):
+        """Test the conversion plan learned per class"""
+        class child_class(mambustruct.MambuStruct):
+            pass
+
+        values = [
+            ("123", "2021-10-23T10:36:00-05:00", "1.5", "abc", ["1", "true"]),
+            # values which don't fit the plan learned from the first ones
+            ("0123", "2021-13-23T10:36:00-05:00", "nan", "2021-10-23", ["x", "-0"]),
+            ("12.5", "ACTIVE", "7", "inf", ["1e3", "2.0"]),
+        ]
+        for num, vals in enumerate(values):
+            ms = child_class()
+            ms._attrs = dict(zip(["a", "b", "c", "d", "e"], vals))
+            ms._tzattrs = copy.deepcopy(ms._attrs)
+            expected = {
+                k: mambustruct._convert_by_trial(v, False)
+                if k != "e" else [mambustruct._convert_by_trial(e, False) for e in v]
+                for k, v in ms._attrs.items()}
+            ms._convertDict2Attrs()
+            self.assertEqual(repr(ms._attrs), repr(expected))
+            if num == 0:
+                plan = mambustruct._conversion_plans[child_class]
+                self.assertEqual(plan.child("a").rule, mambustruct._int_rule)
+                self.assertEqual(plan.child("b").rule, mambustruct._date_rule)
+                self.assertEqual(plan.child("c").rule, mambustruct._float_rule)
+                self.assertEqual(plan.child("d").rule, mambustruct._text_rule)
+                self.assertEqual(
+                    plan.child("e").child(None).rule, mambustruct._bool_rule)
+                self.assertEqual(
+                    ms._tzattrs, {"b": "UTC-05:00", "e": [None, None]})
+        self.assertEqual(ms._attrs["a"], 12.5)
+        self.assertEqual(ms._attrs["b"], "ACTIVE")
+
+    def test__setLazyAttrs(self):
+        """Test fields converted when accessed, the same way as eagerly"""
+        data = {
+            "id": "12345",
+            "aDate": "2021-10-23T10:36:00-05:00",
+            "aNum": "123",
+            "aList": ["1", "2021-10-23"],
+            "a_vo": {"aProp": "1.5"},
+            "_aCFSet": {"aCF": "true"},
+            "_aGroupedSet": [{"gCF": "10"}],
+        }
+        eager = mambustruct.MambuStruct(cf_class=entities.MambuEntityCF)
+        eager._vos = [("a_vo", "MambuValueObject")]
+        eager._attrs = copy.deepcopy(data)
+        eager._tzattrs = copy.deepcopy(data)
+        eager._convertDict2Attrs()
+        eager._extractCustomFields()
+        eager._extractVOs()
+
+        raw = copy.deepcopy(data)
+        ms = mambustruct.MambuStruct(cf_class=entities.MambuEntityCF)
+        ms._vos = [("a_vo", "MambuValueObject")]
+        ms._setLazyAttrs(raw)
+        self.assertEqual(ms._attrs, data)
+        self.assertEqual(ms._tzattrs, {})
+        self.assertEqual(ms._lazy_keys, set(data))
+
+        # just what is accessed gets converted
+        self.assertEqual(ms.aNum, 123)
+        self.assertEqual(ms["aList"], [1, datetime(2021, 10, 23)])
+        self.assertEqual(ms._tzattrs, {"aList": [None, None]})
+        self.assertEqual(ms._attrs["aDate"], "2021-10-23T10:36:00-05:00")
+        self.assertEqual(ms.a_vo.__class__.__name__, "MambuValueObject")
+        self.assertEqual(ms.a_vo.aProp, 1.5)
+        self.assertEqual(ms._lazy_keys, {"id", "aDate", "_aCFSet", "_aGroupedSet"})
+
+        # custom fields are not keys yet, so every custom field set gets
+        # converted when looking for them
+        self.assertEqual(ms.aCF, True)
+        self.assertTrue("gCF_0" in ms)
+        self.assertEqual(ms._lazy_keys, {"id", "aDate"})
+
+        # setting a lazy field leaves no conversion pending for it
+        ms.aDate = "something else"
+        self.assertEqual(ms._lazy_keys, {"id"})
+        ms.aDate = eager.aDate
+
+        # whole-struct operations convert everything
+        self.assertEqual(list(ms.keys()), list(eager.keys()))
+        self.assertEqual(ms._lazy_keys, set())
+        self.assertEqual(repr(ms._attrs), repr(eager._attrs))
+        self.assertEqual(raw, data)
+
+        ms._setLazyAttrs(data)
+        ms._serializeFields()
+        eager._serializeFields()
+        self.assertEqual(repr(ms._attrs), repr(eager._attrs))
+
     def test__serializeFields(self):
         """Test revert of conversion from dictionary elements (native datatype)
         to strings"""
@@ -730,6 +822,44 @@ class MambuStructTests(unittest.TestCase):
         self.assertEqual(ms._assignEntObjs(), [None])
         self.assertEqual(ms.an_ent, None)
 
+        # prefetched entities are not requested again
+        mock_import.reset_mock()
+        mock_import.return_value.MambuEntity.get.side_effect = ["Quickbeam"]
+        ms = mambustruct.MambuStruct()
+        ms._entities = [("an_ent_key", "entities.MambuEntity", "an_ent"),
+                        ("a_list_ent_keys", "entities.MambuEntity", "ents")]
+        ms._attrs = {
+            "an_ent_key": "abcdef12345",
+            "a_list_ent_keys": ["fedcba6789", "abcdef12345"],
+        }
+        ents = ms._assignEntObjs(
+            prefetched={"entities.MambuEntity": {"abcdef12345": "Treebeard"}})
+        self.assertEqual(ents, ["Treebeard", ["Quickbeam", "Treebeard"]])
+        mock_import.return_value.MambuEntity.get.assert_called_once_with(
+            "fedcba6789", detailsLevel="BASIC", get_entities=False, debug=False)
+
+    def test__entObjsKeys(self):
+        ms = mambustruct.MambuStruct()
+        ms._entities = [("an_ent_key", "entities.MambuEntity", "an_ent"),
+                        ("a_list_ent_keys", "entities.MambuEntity", "ents"),
+                        ("a_dict_ent_key", "mambuuser.MambuUser", "huorns"),
+                        ("an_INVALID_ent_key", "entities.MambuEntity", "none")]
+        ms._attrs = {
+            "an_ent_key": "abcdef12345",
+            "a_list_ent_keys": ["fedcba6789", "abcdef12345"],
+            "a_dict_ent_key": {"encodedKey": "fedcba54321"},
+        }
+
+        self.assertEqual(
+            ms._entObjsKeys(),
+            [("entities.MambuEntity", "abcdef12345"),
+             ("entities.MambuEntity", "fedcba6789"),
+             ("entities.MambuEntity", "abcdef12345"),
+             ("mambuuser.MambuUser", "fedcba54321")])
+        self.assertEqual(
+            ms._entObjsKeys([("a_dict_ent_key", "mambuuser.MambuUser", "x")]),
+            [("mambuuser.MambuUser", "fedcba54321")])
+
     @mock.patch("MambuPy.api.mambustruct.import_module")
     def test__assignEntObjs_customfields(self, mock_import):
         ms = mambustruct.MambuStruct(cf_class=entities.MambuEntityCF)
@@ -973,5 +1103,20 @@ class MambuStructTests(unittest.TestCase):
             ms.some_unexistent_property
 
 
+class EntityClassTests(unittest.TestCase):
+    def test__entity_class(self):
+        from MambuPy.api import mambuclient
+
+        self.assertEqual(
+            mambustruct._entity_class("mambuclient.MambuClient").__name__,
+            "MambuClient")
+        self.assertIs(
+            mambustruct._entity_class("MambuPy.api.mambuclient.MambuClient"),
+            mambuclient.MambuClient)
+        self.assertIsNone(mambustruct._entity_class(""))
+        self.assertIsNone(mambustruct._entity_class("mambuclient.MambuNope"))
+        self.assertIsNone(mambustruct._entity_class("mambunope.MambuNope"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 import unittest
@@ -60,7 +61,8 @@ class MambuTask(unittest.TestCase):
 
         self.assertEqual(mt._assignEntObjs(), mock_assign.return_value)
         mock_assign.assert_any_call(
-            mt._entities, detailsLevel="BASIC", get_entities=False, debug=False)
+            mt._entities, detailsLevel="BASIC", get_entities=False, debug=False,
+            prefetched=None)
         self.assertEqual(
             mt._entities[-1],
             ("taskLinkKey", "mambuclient.MambuClient", "taskLink"))
@@ -70,7 +72,8 @@ class MambuTask(unittest.TestCase):
             mock_assign.return_value)
         mock_assign.assert_called_with(
             [("assignedUserKey", "mambuuser.MambuUser", "assignedUser")],
-            detailsLevel="BASIC", get_entities=False, debug=False)
+            detailsLevel="BASIC", get_entities=False, debug=False,
+            prefetched=None)
 
         # link type GROUP
         mock_assign.reset_mock()
@@ -83,7 +86,8 @@ class MambuTask(unittest.TestCase):
 
         self.assertEqual(mt._assignEntObjs(), mock_assign.return_value)
         mock_assign.assert_any_call(
-            mt._entities, detailsLevel="BASIC", get_entities=False, debug=False)
+            mt._entities, detailsLevel="BASIC", get_entities=False, debug=False,
+            prefetched=None)
         self.assertEqual(
             mt._entities[-1],
             ("taskLinkKey", "mambugroup.MambuGroup", "taskLink"))
@@ -99,11 +103,59 @@ class MambuTask(unittest.TestCase):
 
         self.assertEqual(mt._assignEntObjs(), mock_assign.return_value)
         mock_assign.assert_any_call(
-            mt._entities, detailsLevel="BASIC", get_entities=False, debug=False)
+            mt._entities, detailsLevel="BASIC", get_entities=False, debug=False,
+            prefetched=None)
         self.assertEqual(
             mt._entities[-1],
             ("taskLinkKey", "", "taskLink"))
 
+    def test__entObjsKeys(self):
+        mt = mambutask.MambuTask()
+        mt._attrs = {
+            "assignedUserKey": "abcdef12345",
+            "taskLinkKey": "09876fedcba",
+            "taskLinkType": "CLIENT",
+        }
+        self.assertEqual(
+            mt._entObjsKeys(),
+            [("mambuuser.MambuUser", "abcdef12345"),
+             ("mambuclient.MambuClient", "09876fedcba")])
+
+        # unknown link type, the link is not keyed
+        mt = mambutask.MambuTask()
+        mt._attrs = {
+            "assignedUserKey": "abcdef12345",
+            "taskLinkKey": "09876fedcba",
+            "taskLinkType": "LOAN_ACCOUNT",
+        }
+        self.assertEqual(
+            mt._entObjsKeys(), [("mambuuser.MambuUser", "abcdef12345")])
+
+    @mock.patch("mambupy.api.mambuclient.MambuClient.search")
+    @mock.patch("mambupy.api.mambuuser.MambuUser.get")
+    @mock.patch("MambuPy.api.entities.MambuConnectorREST")
+    def test_get_all_get_entities(self, mock_connector_rest, mock_user_get, mock_client_search):
+        mock_connector_rest.return_value.mambu_get_all.return_value = json.dumps([
+            {"encodedKey": "t1", "id": "1", "assignedUserKey": "u1",
+             "taskLinkKey": "c1", "taskLinkType": "CLIENT"},
+            {"encodedKey": "t2", "id": "2", "assignedUserKey": "u1",
+             "taskLinkKey": "l1", "taskLinkType": "LOAN_ACCOUNT"},
+        ]).encode()
+        mock_user_get.return_value = {"encodedKey": "u1"}
+        mock_client_search.return_value = [{"encodedKey": "c1"}]
+
+        tasks = mambutask.MambuTask.get_all(get_entities=True)
+
+        self.assertEqual(len(tasks), 2)
+        mock_user_get.assert_called_once_with(
+            "u1", detailsLevel="BASIC", get_entities=True, debug=False)
+        mock_client_search.assert_called_once_with(
+            filterCriteria=[{"field": "encodedKey", "operator": "IN", "values": ["c1"]}],
+            limit=1, detailsLevel="BASIC", get_entities=True, debug=False)
+        self.assertIs(tasks[0].assignedUser, tasks[1].assignedUser)
+        self.assertEqual(tasks[0].taskLink, {"encodedKey": "c1"})
+        self.assertIsNone(tasks[1].taskLink)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -35,7 +35,8 @@ class MambuOwnableEntityTests(unittest.TestCase):
 
         self.assertEqual(mc._assignEntObjs(), mock_assign.return_value)
         mock_assign.assert_any_call(
-            mc._entities, detailsLevel="BASIC", get_entities=False, debug=False)
+            mc._entities, detailsLevel="BASIC", get_entities=False, debug=False,
+            prefetched=None)
         self.assertEqual(
             mc._entities[-1],
             ("accountHolderKey", "mambuclient.MambuClient", "accountHolder"))
@@ -50,7 +51,8 @@ class MambuOwnableEntityTests(unittest.TestCase):
 
         self.assertEqual(mc._assignEntObjs(), mock_assign.return_value)
         mock_assign.assert_any_call(
-            mc._entities, detailsLevel="BASIC", get_entities=False, debug=False)
+            mc._entities, detailsLevel="BASIC", get_entities=False, debug=False,
+            prefetched=None)
         self.assertEqual(
             mc._entities[-1],
             ("accountHolderKey", "mambugroup.MambuGroup", "accountHolder"))
@@ -65,7 +67,8 @@ class MambuOwnableEntityTests(unittest.TestCase):
 
         self.assertEqual(mc._assignEntObjs(), mock_assign.return_value)
         mock_assign.assert_any_call(
-            mc._entities, detailsLevel="BASIC", get_entities=False, debug=False)
+            mc._entities, detailsLevel="BASIC", get_entities=False, debug=False,
+            prefetched=None)
         self.assertEqual(
             mc._entities[-1],
             ("accountHolderKey", "", "accountHolder"))
@@ -83,7 +86,7 @@ class MambuOwnableEntityTests(unittest.TestCase):
         mock_assign.assert_any_call(
             [("accountHolderKey", "", "accountHolder")],
             detailsLevel="BASIC",
-            get_entities=False, debug=False)
+            get_entities=False, debug=False, prefetched=None)
         self.assertEqual(
             mc._entities[-1],
             ("accountHolderKey", "", "accountHolder"))
@@ -99,7 +102,7 @@ class MambuOwnableEntityTests(unittest.TestCase):
         mock_assign.assert_any_call(
             [],
             detailsLevel="BASIC",
-            get_entities=False, debug=False)
+            get_entities=False, debug=False, prefetched=None)
 
 
 if __name__ == "__main__":
@@ -46,6 +46,7 @@ class MambuSearchableEntityTests(unittest.TestCase):
 
         mock_connector_rest.return_value.mambu_search.assert_called_with(
             "",
+            decode=True,
             filterCriteria={"one": "two"},
             sortingCriteria=None,
             offset=None,
@@ -59,6 +60,47 @@ class MambuSearchableEntityTests(unittest.TestCase):
         self.assertEqual(ms[1].__class__.__name__, "child_class_searchable")
         self.assertEqual(ms[1]._attrs, {"encodedKey": "def456", "id": "67890"})
 
+        self.child_class_searchable.search(limit=5000, pagination="keyset")
+        mock_connector_rest.return_value.mambu_search.assert_called_with(
+            "",
+            decode=True,
+            filterCriteria=None,
+            sortingCriteria=None,
+            offset=None,
+            limit=5000,
+            paginationDetails="OFF",
+            detailsLevel="BASIC",
+            pagination="keyset")
+
+    @mock.patch("MambuPy.api.entities.MambuConnectorREST")
+    def test_iter_search(self, mock_connector_rest):
+        mock_connector = mock_connector_rest.return_value
+        mock_connector.mambu_iter_pages.return_value = iter([
+            [{"encodedKey": "abc123", "id": "12345"}],
+            [{"encodedKey": "def456", "id": "67890"}],
+        ])
+
+        ms = self.child_class_searchable.iter_search(
+            filterCriteria=[{"field": "one", "operator": "EQUALS", "value": "two"}],
+            limit=2)
+
+        mock_connector.mambu_search.assert_not_called()
+        mock_connector.mambu_iter_pages.assert_called_once_with(
+            "",
+            search=True,
+            filterCriteria=[{"field": "one", "operator": "EQUALS", "value": "two"}],
+            sortingCriteria=None,
+            offset=None,
+            limit=2,
+            paginationDetails="OFF",
+            detailsLevel="BASIC")
+        self.assertFalse(isinstance(ms, list))
+        ms = list(ms)
+        self.assertEqual(len(ms), 2)
+        self.assertEqual(ms[0].__class__.__name__, "child_class_searchable")
+        self.assertEqual(ms[0]._attrs, {"encodedKey": "abc123", "id": "12345"})
+        self.assertEqual(ms[1]._attrs, {"encodedKey": "def456", "id": "67890"})
+
 
 if __name__ == "__main__":
     unittest.main()
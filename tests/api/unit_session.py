@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.abspath("."))
+
+from MambuPy.api import session
+
+
+class an_entity:
+    def __init__(self, **attrs):
+        self._attrs = attrs
+
+
+class other_entity(an_entity):
+    pass
+
+
+class MambuIdentityMapTests(unittest.TestCase):
+    def test_get_add(self):
+        idmap = session.MambuIdentityMap()
+        self.assertIsNone(idmap.get(an_entity, "BASIC", "12345"))
+        self.assertEqual(idmap.misses, 1)
+
+        ent = an_entity(id="12345", encodedKey="abc123")
+        idmap.add(ent, "BASIC")
+        self.assertIs(idmap.get(an_entity, "BASIC", "12345"), ent)
+        self.assertIs(idmap.get(an_entity, "BASIC", "abc123"), ent)
+        self.assertIsNone(idmap.get(an_entity, "FULL", "12345"))
+        self.assertIsNone(idmap.get(other_entity, "BASIC", "12345"))
+        self.assertEqual(idmap.hits, 2)
+        self.assertEqual(idmap.misses, 3)
+        self.assertEqual(len(idmap), 1)
+
+        # get_entities
+        self.assertIsNone(idmap.get(an_entity, "BASIC", "12345", True))
+        ent_ents = an_entity(id="12345", encodedKey="abc123")
+        idmap.add(ent_ents, "BASIC", get_entities=True)
+        self.assertIs(idmap.get(an_entity, "BASIC", "12345", True), ent_ents)
+        self.assertIs(idmap.get(an_entity, "BASIC", "12345"), ent_ents)
+        idmap.add(ent, "BASIC")
+        self.assertIs(idmap.get(an_entity, "BASIC", "abc123"), ent_ents)
+
+        # no id
+        idmap.add(other_entity(encodedKey="def456"), "BASIC")
+        self.assertEqual(len(idmap), 2)
+
+        idmap.clear()
+        self.assertEqual(len(idmap), 0)
+        self.assertEqual((idmap.hits, idmap.misses), (0, 0))
+        self.assertIsNone(idmap.get(an_entity, "BASIC", "12345"))
+
+
+class MambuPySessionTests(unittest.TestCase):
+    def test_mambupy_session(self):
+        self.assertIsNone(session._session.get())
+        with session.mambupy_session() as idmap:
+            self.assertIsInstance(idmap, session.MambuIdentityMap)
+            self.assertIs(session._session.get(), idmap)
+            with session.mambupy_session() as inner:
+                self.assertIsNot(inner, idmap)
+                self.assertIs(session._session.get(), inner)
+            self.assertIs(session._session.get(), idmap)
+        self.assertIsNone(session._session.get())
+
+        idmap = session.MambuIdentityMap()
+        with session.mambupy_session(idmap) as same:
+            self.assertIs(same, idmap)
+
+    def test__in_session(self):
+        idmap = session.MambuIdentityMap()
+        result = []
+
+        def worker():
+            result.append(session._session.get())
+            result.append(session._in_session(idmap, session._session.get))
+            result.append(session._session.get())
+
+        with session.mambupy_session():
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(result, [None, idmap, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
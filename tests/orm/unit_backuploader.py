@@ -0,0 +1,173 @@
+from datetime import datetime
+from decimal import Decimal
+import io
+import os
+import sys
+import unittest
+import zipfile
+
+import mock
+
+sys.path.insert(0, os.path.abspath("."))
+
+from sqlalchemy import create_engine
+
+from MambuPy import mambuconfig
+
+for k, v in mambuconfig.default_configs.items():
+    setattr(mambuconfig, k, v)
+
+from MambuPy.mambuutil import MambuPyError
+from MambuPy.orm import backuploader, schema_orm
+from MambuPy.orm.schema_mambu import Client, LoanAccount, LoanProduct
+
+DUMP = """-- MySQL dump 10.13
+/*!40101 SET NAMES utf8 */;
+DROP TABLE IF EXISTS `client`;
+CREATE TABLE `client` (
+  `encodedKey` varchar(32) NOT NULL,
+  `unmappedColumn` varchar(32) DEFAULT NULL,
+  `id` varchar(32) DEFAULT NULL,
+  `firstName` varchar(256) DEFAULT NULL,
+  `lastName` varchar(256) DEFAULT NULL,
+  `creationDate` datetime DEFAULT NULL,
+  `loanCycle` int(11) DEFAULT NULL,
+  PRIMARY KEY (`encodedKey`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+LOCK TABLES `client` WRITE;
+INSERT INTO `client` VALUES ('8a1','x','C1','Ana','O\\'Neil','2020-01-02 03:04:05',1),\
+('8a2',NULL,'C2','Luis\\nAlberto','P''erez','0000-00-00 00:00:00',NULL),\
+('8a3',_binary 'y','C3','Eva','Díaz',NULL,b'1');
+INSERT INTO `client` VALUES ('8a4','z','C4','Juan',
+'Ruiz',NULL,2);
+UNLOCK TABLES;
+CREATE TABLE `loanproduct` (
+  `encodedKey` varchar(32) NOT NULL,
+  `id` varchar(32) DEFAULT NULL,
+  `productName` varchar(256) DEFAULT NULL,
+  `activated` bit(1) DEFAULT NULL
+) ENGINE=InnoDB;
+INSERT INTO `loanproduct` VALUES ('8p1','P1','Product; one',b'1');
+CREATE TABLE `loanaccount` (
+  `encodedKey` varchar(32) NOT NULL,
+  `id` varchar(32) DEFAULT NULL,
+  `loanAmount` decimal(50,10) DEFAULT NULL,
+  `accountState` varchar(256) DEFAULT NULL,
+  `productTypeKey` varchar(32) DEFAULT NULL
+) ENGINE=InnoDB;
+INSERT INTO `loanaccount` (`encodedKey`,`loanAmount`,`id`) VALUES ('8l1',1000.5000000000,'L1');
+CREATE TABLE `unmapped` (
+  `encodedKey` varchar(32) NOT NULL
+) ENGINE=InnoDB;
+INSERT INTO `unmapped` VALUES ('x'),('y');
+"""
+
+
+def make_backup(dump=DUMP, name="mambu_db.sql"):
+    backup = io.BytesIO()
+    with zipfile.ZipFile(backup, "w", zipfile.ZIP_DEFLATED) as zipped:
+        zipped.writestr("readme.txt", "not the dump")
+        zipped.writestr(name, dump)
+    backup.seek(0)
+    return backup
+
+
+class BackupLoaderTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        self.translated = self.engine.execution_options(
+            schema_translate_map={schema_orm.dbname: None})
+
+    def query(self, table, order_by="encodedKey"):
+        return self.translated.execute(
+            table.__table__.select().order_by(order_by)).fetchall()
+
+    def test_mapped_tables(self):
+        tables = backuploader.mapped_tables()
+        self.assertIn("loanaccount", tables)
+        self.assertIn("groupmember", tables)
+        self.assertEqual(
+            backuploader.mapped_tables([LoanAccount, "Client", "customfieldvalue"]),
+            {
+                "loanaccount": LoanAccount.__table__,
+                "client": Client.__table__,
+                "customfieldvalue": tables["customfieldvalue"],
+            })
+        with self.assertRaisesRegex(MambuPyError, r"^Nope is not mapped on the ORM$"):
+            backuploader.mapped_tables(["Nope"])
+
+    def test_load_backup(self):
+        loaded = backuploader.load_backup(
+            make_backup(), self.engine,
+            tables=["Client", "LoanProduct", "LoanAccount"],
+            batch_size=2, create=True)
+        self.assertEqual(loaded, {"client": 4, "loanproduct": 1, "loanaccount": 1})
+
+        clients = self.query(Client)
+        self.assertEqual(
+            [(c.encodedKey, c.id, c.firstName, c.lastName, c.creationDate, c.loanCycle)
+             for c in clients],
+            [
+                ("8a1", "C1", "Ana", "O'Neil", datetime(2020, 1, 2, 3, 4, 5), 1),
+                ("8a2", "C2", "Luis\nAlberto", "P'erez", None, None),
+                ("8a3", "C3", "Eva", "Díaz", None, 1),
+                ("8a4", "C4", "Juan", "Ruiz", None, 2),
+            ])
+        product = self.query(LoanProduct)[0]
+        self.assertEqual((product.productName, product.activated), ("Product; one", 1))
+        loan = self.query(LoanAccount)[0]
+        self.assertEqual((loan.id, loan.loanAmount, loan.accountState),
+                         ("L1", Decimal("1000.5"), None))
+
+        # refreshing replaces the rows, other tables are left alone
+        backuploader.load_backup(
+            make_backup(DUMP.replace("'Ana'", "'Ana María'")), self.engine,
+            tables=[Client])
+        clients = self.query(Client)
+        self.assertEqual(len(clients), 4)
+        self.assertEqual(clients[0].firstName, "Ana María")
+        self.assertEqual(len(self.query(LoanProduct)), 1)
+
+    def test_load_backup_errors(self):
+        with self.assertRaisesRegex(MambuPyError, r"^no SQL dump on the backup$"):
+            backuploader.load_backup(
+                make_backup(name="dump.txt"), self.engine, tables=[Client], create=True)
+
+        backuploader.load_backup(
+            make_backup(), self.engine, tables=[Client], create=True)
+        with self.assertRaisesRegex(MambuPyError, r"^unknown columns for client"):
+            backuploader.load_backup(
+                make_backup("INSERT INTO `client` VALUES ('8a5','C5');\n"),
+                self.engine, tables=[Client])
+        # the failed load left the table as it was
+        self.assertEqual(len(self.query(Client)), 4)
+
+    def test_load_backup_mysql(self):
+        engine = mock.MagicMock()
+        engine.dialect.name = "mysql"
+        conn = engine.begin.return_value.__enter__.return_value
+
+        with mock.patch.object(backuploader, "_load", return_value={"client": 4}):
+            self.assertEqual(
+                backuploader.load_backup(make_backup(), engine, tables=[Client]),
+                {"client": 4})
+        self.assertEqual(conn.execute.call_args_list[0], mock.call("SET FOREIGN_KEY_CHECKS=0"))
+        self.assertEqual(conn.execute.call_args_list[-1], mock.call("SET FOREIGN_KEY_CHECKS=1"))
+
+        # foreign key checks are enabled back on errors too
+        conn.execute.reset_mock()
+        with mock.patch.object(backuploader, "_load", side_effect=MambuPyError("nope")):
+            with self.assertRaisesRegex(MambuPyError, r"^nope$"):
+                backuploader.load_backup(make_backup(), engine, tables=[Client])
+        self.assertEqual(conn.execute.call_args_list[-1], mock.call("SET FOREIGN_KEY_CHECKS=1"))
+
+    def test__rows(self):
+        self.assertEqual(
+            list(backuploader._rows("('a\\\\b\\0',-1.5e3,0x4142,NULL),('',b'',3);")),
+            [["a\\b\0", "-1.5e3", b"AB", None], ["", 0, "3"]])
+        with self.assertRaisesRegex(MambuPyError, r"^can't parse the backup near: @"):
+            list(backuploader._rows("('a',@)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
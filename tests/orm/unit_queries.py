@@ -0,0 +1,121 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("."))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from MambuPy import mambuconfig
+
+for k, v in mambuconfig.default_configs.items():
+    setattr(mambuconfig, k, v)
+
+from MambuPy.orm import queries, schema_orm
+from MambuPy.orm.schema_mambu import (
+    Activity,
+    Address,
+    Branch,
+    Client,
+    CustomField,
+    CustomFieldValue,
+    DisbursementDetails,
+    FieldChangeItem,
+    IdentificationDocument,
+    LoanAccount,
+    LoanProduct,
+)
+
+LOANS = 40
+
+
+def generate(session):
+    """A branch with LOANS loans, each one with its own client holder."""
+    branch = Branch(encodedKey="b1", id="B1", name="Branch")
+    products = [LoanProduct(encodedKey="p%d" % i, id="P%d" % i) for i in range(3)]
+    fields = [CustomField(encodedKey="f%d" % i, id="F%d" % i) for i in range(2)]
+    session.add_all([branch] + products + fields)
+    for i in range(LOANS):
+        session.add_all([
+            Client(
+                encodedKey="c%d" % i, id="C%d" % i, assignedBranchKey="b1",
+                addresses=[Address(encodedKey="a%d" % i)],
+                identificationDocuments=[IdentificationDocument(encodedKey="i%d" % i)]),
+            LoanAccount(
+                encodedKey="l%d" % i, id="L%d" % i, assignedBranchKey="b1",
+                productTypeKey="p%d" % (i % 3), accountHolderKey="c%d" % i,
+                disbursementDetails=DisbursementDetails(encodedKey="d%d" % i),
+                customInformation=[
+                    CustomFieldValue(
+                        encodedKey="v%d-%d" % (i, j), customFieldKey="f%d" % j,
+                        value=str(j))
+                    for j in range(2)]),
+            Activity(
+                encodedKey="t%d" % i, loanAccountKey="l%d" % i,
+                fieldChanges=[FieldChangeItem(id="x%d-%d" % (i, j)) for j in range(2)]),
+        ])
+    session.commit()
+
+
+def walk_loans(loans):
+    return [
+        (loan.product.id, loan.disbursementDetails.encodedKey,
+         loan.holder_client.id, loan.holder_group,
+         [(cf.customField.id, cf.value) for cf in loan.customInformation])
+        for loan in loans
+    ]
+
+
+class QueriesTests(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://").execution_options(
+            schema_translate_map={schema_orm.dbname: None})
+        schema_orm.Base.metadata.create_all(engine)
+        self.session_factory = sessionmaker(bind=engine)
+        generate(self.session_factory())
+        self.queries = []
+        event.listen(engine.engine, "before_cursor_execute", self.count)
+
+    def count(self, conn, cursor, statement, *args):
+        self.queries.append(statement)
+
+    def test_query_loans(self):
+        # lazy loading: a query for the loans, plus N+1 for each relationship
+        session = self.session_factory()
+        lazy = walk_loans(
+            session.query(LoanAccount).filter(LoanAccount.assignedBranchKey == "b1"))
+        lazy_queries = len(self.queries)
+        self.assertGreater(lazy_queries, 4 * LOANS)
+
+        self.queries = []
+        session = self.session_factory()
+        eager = walk_loans(
+            queries.query_loans(session).filter(LoanAccount.assignedBranchKey == "b1"))
+        self.assertEqual(eager, lazy)
+        self.assertEqual(len(eager), LOANS)
+        # loans (with product, disbursement details and holder), custom
+        # field values (with custom fields)
+        self.assertEqual(len(self.queries), 2)
+
+    def test_query_clients(self):
+        session = self.session_factory()
+        clients = queries.query_clients(session).order_by(Client.id).all()
+        walk = [(c.addresses[0].encodedKey, c.identificationDocuments[0].encodedKey)
+                for c in clients]
+        self.assertEqual(walk[0], ("a0", "i0"))
+        self.assertEqual(len(walk), LOANS)
+        self.assertEqual(len(self.queries), 3)
+
+    def test_query_activities(self):
+        session = self.session_factory()
+        activities = queries.query_activities(session).all()
+        self.assertEqual(sum(len(a.fieldChanges) for a in activities), 2 * LOANS)
+        self.assertEqual(len(self.queries), 2)
+
+    def test_default_session(self):
+        self.assertIs(queries.query_loans().session, schema_orm.session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,6 +30,7 @@ tests=("unit_mambuconfig.py" \
            "api/unit_ownable.py" \
            "api/unit_searchable.py" \
            "api/unit_writable.py" \
+           "api/unit_session.py" \
 
            "api/unit_mambucustomfield.py" \
            "api/unit_mambuloan.py" \
@@ -43,11 +44,19 @@ tests=("unit_mambuconfig.py" \
            "api/unit_mambutask.py" \
            "api/unit_mambutransaction.py" \
 
+           "api/connector/unit_cache.py" \
+           "api/connector/unit_keyset.py" \
            "api/connector/unit_mambuconnector.py" \
+           "api/connector/unit_pagination.py" \
+           "api/connector/unit_ratelimit.py" \
            "api/connector/unit_rest.py" \
            "api/connector/unit_rest_reader.py" \
            "api/connector/unit_rest_writer.py" \
+           "api/connector/unit_rest_async.py" \
+           "api/connector/unit_singleflight.py" \
 
+           "orm/unit_backuploader.py" \
+           "orm/unit_queries.py" \
            "orm/unit_schema_orm.py" \
 
            "utils/unit_userdeactivate.py" \
@@ -52,6 +52,10 @@ Another=BrickInTheWall
             mambuconfig.activate_request_session_objects
         except AttributeError:
             self.fail("No activate_request_session_objects attribute in mambuconfig")
+        for attr in ["apipoolconnections", "apipoolmaxsize", "apikeepalive", "apipoolprewarm", "apiratelimit",
+                     "apicachesize", "apicachettl", "apicachefile", "apibackupcallbackport",
+                     "apibackupcallbackhost"]:
+            self.assertTrue(hasattr(mambuconfig, attr), "No {} attribute in mambuconfig".format(attr))
 
     def test_db_attrs(self):
         try:
@@ -78,6 +82,8 @@ Another=BrickInTheWall
             mambuconfig.dbeng
         except AttributeError:
             self.fail("No dbeng attribute in mambuconfig")
+        for attr in ["dbpoolclass", "dbpoolsize", "dbpoolpreping", "dbpoolrecycle"]:
+            self.assertTrue(hasattr(mambuconfig, attr), "No {} attribute in mambuconfig".format(attr))
 
     def test_mambupy_attrs(self):
         try:
@@ -90,13 +96,31 @@ Another=BrickInTheWall
         self.assertEqual(mambuconfig.default_configs.get("apiuser"), "mambu_api_user")
         self.assertEqual(mambuconfig.default_configs.get("apipwd"), "mambu_api_password")
         self.assertEqual(mambuconfig.default_configs.get("apipagination"), "50")
-        self.assertEqual(mambuconfig.default_configs.get("activate_request_session_objects"), "False")
+        self.assertEqual(mambuconfig.default_configs.get("activate_request_session_objects"), "True")
+        self.assertEqual(mambuconfig.default_configs.get("apipoolconnections"), "10")
+        self.assertEqual(mambuconfig.default_configs.get("apipoolmaxsize"), "32")
+        self.assertEqual(mambuconfig.default_configs.get("apikeepalive"), "True")
+        self.assertEqual(mambuconfig.default_configs.get("apipoolprewarm"), "0")
+        self.assertEqual(mambuconfig.default_configs.get("apiratelimit"), "0")
+        self.assertEqual(mambuconfig.default_configs.get("apicachesize"), "0")
+        self.assertEqual(
+            mambuconfig.default_configs.get("apicachettl"),
+            "loanproducts:3600,branches:3600,centres:3600,userroles:3600,"
+            "customfieldsets:3600,customfields:3600")
+        self.assertEqual(mambuconfig.default_configs.get("apicachefile"), "")
+        self.assertEqual(mambuconfig.default_configs.get("apibackupcallbackport"), "0")
+        self.assertEqual(
+            mambuconfig.default_configs.get("apibackupcallbackhost"), "127.0.0.1")
         self.assertEqual(mambuconfig.default_configs.get("dbname"), "mambu_db")
         self.assertEqual(mambuconfig.default_configs.get("dbuser"), "mambu_db_user")
         self.assertEqual(mambuconfig.default_configs.get("dbpwd"), "mambu_db_pwd")
         self.assertEqual(mambuconfig.default_configs.get("dbhost"), "localhost")
         self.assertEqual(mambuconfig.default_configs.get("dbport"), "3306")
         self.assertEqual(mambuconfig.default_configs.get("dbeng"), "mysql")
+        self.assertEqual(mambuconfig.default_configs.get("dbpoolclass"), "QueuePool")
+        self.assertEqual(mambuconfig.default_configs.get("dbpoolsize"), "5")
+        self.assertEqual(mambuconfig.default_configs.get("dbpoolpreping"), "True")
+        self.assertEqual(mambuconfig.default_configs.get("dbpoolrecycle"), "3600")
         self.assertEqual(mambuconfig.default_configs.get("loggingconf"), "")
 
     def test_get_conf(self):
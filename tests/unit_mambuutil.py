@@ -1,10 +1,18 @@
 # coding: utf-8
 
 from datetime import datetime
+import hashlib
+import json
 import logging
 import os
+import socket
 import sys
+import threading
+import time
 import unittest
+import urllib.error
+import urllib.parse
+import urllib.request
 
 logging.disable(logging.CRITICAL)
 sys.path.insert(0, os.path.abspath("."))
@@ -14,6 +22,9 @@ try:
 except ModuleNotFoundError:
     import unittest.mock as mock
 
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
 from MambuPy import mambuconfig
 
 for k, v in mambuconfig.default_configs.items():
@@ -28,6 +39,16 @@ except Exception as e:
 
 
 
+def _pid_square(num):
+    return os.getpid(), num * num
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
 class MambuUtilTests(unittest.TestCase):
     def test_attrs(self):
         for atr in ["apiurl",
@@ -137,10 +158,18 @@ class MambuUtilTests(unittest.TestCase):
                 self.headers = headers
 
         class response:
-            def __init__(self, code, content, request):
+            def __init__(self, code, content, request, headers=None):
                 self.status_code = code
                 self.content = content
                 self.request = request
+                self.headers = headers or {}
+
+            def iter_content(self, chunk_size):
+                for i in range(0, len(self.content), chunk_size):
+                    yield self.content[i:i + chunk_size]
+
+            def close(self):
+                pass
         mock_requests.post.return_value = response(
             code=202, content="hello world",
             request=request("url", "body", {"headers": "value"}))
@@ -158,12 +187,18 @@ class MambuUtilTests(unittest.TestCase):
             headers={
                 "Accept": "application/vnd.mambu.v2+zip",
             },
+            stream=True,
         )
         self.assertEqual(mock_requests.post.call_count, 1)
         self.assertEqual(mock_requests.get.call_count, 1)
 
         self.assertEqual(d["callback"], "da-callback")
         self.assertTrue(d["latest"])
+        self.assertEqual(d["size"], 11)
+        self.assertEqual(d["checksum"], hashlib.sha256(b"hello world").hexdigest())
+        with open("/tmp/out_test", "rb") as fr:
+            self.assertEqual(fr.read(), b"hello world")
+        self.assertFalse(os.path.exists("/tmp/out_test.part"))
         d = mambuutil.backup_db(
             callback="da-callback",
             bool_func=lambda: False,
@@ -251,6 +286,233 @@ class MambuUtilTests(unittest.TestCase):
                 verbose=True,
             )
 
+    @mock.patch("MambuPy.mambuutil.requests")
+    @mock.patch("MambuPy.mambuutil.sleep")
+    def test_backup_db_streaming(self, mock_sleep, mock_requests):
+        class response:
+            def __init__(self, code, chunks, headers=None, error=None):
+                self.status_code = code
+                self.content = b"".join(chunks)
+                self.chunks = chunks
+                self.headers = headers or {}
+                self.error = error
+                self.closed = False
+
+            def iter_content(self, chunk_size):
+                for chunk in self.chunks:
+                    yield chunk
+                if self.error:
+                    raise self.error
+
+            def close(self):
+                self.closed = True
+
+        def backup(**kwargs):
+            return mambuutil.backup_db(
+                callback="da-callback",
+                bool_func=lambda: True,
+                output_fname="/tmp/out_test",
+                justbackup=True,
+                **kwargs
+            )
+
+        backup_content = b"hello world"
+        checksum = hashlib.sha256(backup_content).hexdigest()
+
+        # dropped connection, resumed with a Range request
+        dropped = response(
+            200, [b"hello"], {"Content-Length": "11"},
+            ChunkedEncodingError("connection broken"))
+        mock_requests.get.side_effect = [
+            dropped,
+            response(206, [b" world"], {"Content-Range": "bytes 5-10/11"}),
+        ]
+        progress = mock.Mock()
+        d = backup(checksum=checksum.upper(), progress=progress, chunk_size=4)
+        self.assertTrue(dropped.closed)
+        self.assertEqual(mock_requests.get.call_count, 2)
+        self.assertEqual(
+            mock_requests.get.call_args.kwargs["headers"]["Range"], "bytes=5-")
+        self.assertNotIn("Range", mock_requests.get.call_args_list[0].kwargs["headers"])
+        self.assertEqual(progress.call_args_list, [mock.call(5, 11), mock.call(11, 11)])
+        self.assertEqual(d["size"], 11)
+        self.assertEqual(d["checksum"], checksum)
+        with open("/tmp/out_test", "rb") as fr:
+            self.assertEqual(fr.read(), backup_content)
+
+        # connection closed before the end, Range not honored: from the start
+        mock_requests.get.reset_mock()
+        mock_requests.get.side_effect = [
+            response(200, [b"hel"], {"Content-Length": "11"}),
+            response(200, [b"hello", b" world"], {"Content-Length": "11"}),
+        ]
+        d = backup(checksum=checksum)
+        self.assertEqual(mock_requests.get.call_count, 2)
+        self.assertEqual(d["size"], 11)
+        self.assertEqual(d["checksum"], checksum)
+        with open("/tmp/out_test", "rb") as fr:
+            self.assertEqual(fr.read(), backup_content)
+
+        # too many drops, the partial download is removed
+        mock_requests.get.reset_mock()
+        mock_requests.get.side_effect = [
+            response(200, [b"hel"], {"Content-Length": "11"}),
+            response(206, [b"lo"], {"Content-Range": "bytes 3-10/11"},
+                     RequestsConnectionError("reset")),
+        ]
+        with self.assertRaisesRegex(
+            mambuutil.MambuCommError,
+            r"^Error downloading database backup: ConnectionError\('reset'\)$",
+        ):
+            backup(resumes=1)
+        self.assertFalse(os.path.exists("/tmp/out_test.part"))
+
+        # checksum mismatch, the previous backup is kept
+        mock_requests.get.side_effect = [
+            response(200, [b"hello there"], {"Content-Length": "11"})]
+        with self.assertRaisesRegex(
+            mambuutil.MambuError, r"^Checksum mismatch on database backup"
+        ):
+            backup(checksum=checksum)
+        self.assertFalse(os.path.exists("/tmp/out_test.part"))
+        with open("/tmp/out_test", "rb") as fr:
+            self.assertEqual(fr.read(), backup_content)
+
+    @mock.patch("MambuPy.mambuutil.requests")
+    @mock.patch("MambuPy.mambuutil.sleep")
+    def test_backup_db_polling_backoff(self, mock_sleep, mock_requests):
+        mock_requests.post.return_value = mock.Mock(
+            status_code=202, request=mock.Mock(headers={}))
+        with self.assertRaisesRegex(mambuutil.MambuError, r"Tired of waiting"):
+            mambuutil.backup_db(
+                callback="da-callback",
+                bool_func=lambda: False,
+                output_fname="/tmp/out_test",
+                retries=5,
+                poll_interval=2,
+                max_poll_interval=10,
+            )
+        self.assertEqual(
+            [c.args[0] for c in mock_sleep.call_args_list], [2, 4, 8, 10, 10])
+
+    def test_backup_callback_receiver(self):
+        with mambuutil.BackupCallbackReceiver(port=0) as receiver:
+            self.assertEqual(
+                receiver.url,
+                "http://127.0.0.1:{}{}".format(receiver.port, receiver.path))
+            self.assertGreater(len(receiver.path), 20)
+            # requests to other paths are rejected
+            for path in ["/", "/backup", receiver.path + "x"]:
+                with self.assertRaisesRegex(urllib.error.HTTPError, "404"):
+                    urllib.request.urlopen(
+                        "http://127.0.0.1:{}{}".format(receiver.port, path),
+                        data=b"", timeout=5)
+            self.assertFalse(receiver.wait(0.01))
+            req = urllib.request.Request(
+                receiver.url,
+                data=json.dumps({"state": "COMPLETE"}).encode(),
+                method="POST")
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                self.assertEqual(resp.status, 200)
+            self.assertTrue(receiver.wait(5))
+            self.assertEqual(receiver.payload, {"state": "COMPLETE"})
+        with self.assertRaises(OSError):
+            urllib.request.urlopen(
+                "http://127.0.0.1:{}/".format(receiver.port), timeout=5)
+
+        # listening on every interface, Mambu calls back to this host
+        receiver = mambuutil.BackupCallbackReceiver(port=0, host="0.0.0.0")
+        receiver.stop()
+        self.assertTrue(receiver.url.startswith("http://{}:".format(socket.getfqdn())))
+
+    @mock.patch("MambuPy.mambuutil.requests")
+    @mock.patch("MambuPy.mambuutil.sleep")
+    def test_backup_db_callback_receiver(self, mock_sleep, mock_requests):
+        # stand-in for Mambu: calls the callback a while after the request
+        def request_backup(url, data, **kwargs):
+            callback = urllib.parse.urlparse(json.loads(data)["callback"])
+
+            def call_back():
+                time.sleep(0.2)
+                urllib.request.urlopen(
+                    "http://127.0.0.1:{}{}".format(callback.port, callback.path),
+                    data=b"", timeout=5)
+            threading.Thread(target=call_back).start()
+            return mock.Mock(status_code=202, request=mock.Mock(headers={}))
+
+        mock_requests.post.side_effect = request_backup
+        mock_requests.get.return_value = mock.Mock(
+            status_code=200, headers={}, iter_content=lambda chunk_size: [b"backup"])
+        start = time.monotonic()
+        port = free_port()
+        d = mambuutil.backup_db(
+            callback=None,
+            bool_func=None,
+            output_fname="/tmp/out_test",
+            poll_interval=30,
+            callback_port=port,
+        )
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertTrue(d["latest"])
+        self.assertTrue(d["callback"].startswith("http://127.0.0.1:{}/".format(port)))
+        mock_sleep.assert_not_called()
+        with open("/tmp/out_test", "rb") as fr:
+            self.assertEqual(fr.read(), b"backup")
+
+        # Mambu can't reach a random port
+        with self.assertRaisesRegex(
+            mambuutil.MambuPyError, r"^backup_db needs a callback URL Mambu can reach"
+        ):
+            mambuutil.backup_db(
+                callback=None, bool_func=None, output_fname="/tmp/out_test")
+
+    @mock.patch("MambuPy.mambuutil.requests")
+    def test_backup_db_callback_probe(self, mock_requests):
+        # Mambu never calls back, but the LATEST backup changes
+        probes = []
+
+        def get(url, headers, **kwargs):
+            if headers.get("Range") == "bytes=0-0":
+                probes.append(url)
+                modified = "Mon, 01 Jan 2024" if len(probes) < 3 else "Tue, 02 Jan 2024"
+                return mock.Mock(
+                    status_code=206,
+                    headers={"Last-Modified": modified, "Content-Range": "bytes 0-0/6"})
+            return mock.Mock(
+                status_code=200, headers={}, iter_content=lambda chunk_size: [b"backup"])
+
+        mock_requests.post.return_value = mock.Mock(
+            status_code=202, request=mock.Mock(headers={}))
+        mock_requests.get.side_effect = get
+        d = mambuutil.backup_db(
+            callback="https://backups.example.com/mambu/",
+            bool_func=None,
+            output_fname="/tmp/out_test",
+            poll_interval=0.01,
+        )
+        self.assertTrue(d["latest"])
+        self.assertRegex(d["callback"], r"^https://backups.example.com/mambu/[\w-]{20,}$")
+        self.assertEqual(len(probes), 3)
+        self.assertTrue(probes[0].endswith("database/backup/LATEST"))
+        with open("/tmp/out_test", "rb") as fr:
+            self.assertEqual(fr.read(), b"backup")
+
+        # no backup, or nothing telling them apart: not ready
+        mock_requests.get.side_effect = None
+        mock_requests.get.return_value = mock.Mock(status_code=404, headers={})
+        self.assertIsNone(mambuutil._backup_db_probe_latest(
+            "user", "pwd", {}, mambuutil.setup_logging("test")))
+        mock_requests.get.return_value = mock.Mock(status_code=200, headers={})
+        self.assertIsNone(mambuutil._backup_db_probe_latest(
+            "user", "pwd", {}, mambuutil.setup_logging("test")))
+        mock_requests.get.return_value.close.assert_called_once_with()
+
+    def test_process_map(self):
+        results = mambuutil.process_map(_pid_square, range(8), processes=2)
+        self.assertEqual([square for _, square in results], [0, 1, 4, 9, 16, 25, 36, 49])
+        self.assertNotIn(os.getpid(), [pid for pid, _ in results])
+        self.assertEqual(mambuutil.process_map(_pid_square, []), [])
+
 
 if __name__ == "__main__":
     unittest.main()